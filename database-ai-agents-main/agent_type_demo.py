@@ -6,15 +6,25 @@ with verbose mode enabled to see the reasoning process
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
-import pandas as pd
+from dataset import load_salaries, optimize_dataframe
+from ground_truth import load_ground_truth
+from llm_cassette import install_cassette
+from results_store import ResultsStore
+from scoring import score_answer
+from tracing import AgentTracer
 from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
 import time
 
 load_dotenv()
+
+# LLM_CASSETTE_MODE=record|replay|auto records or replays every LLM call
+cassette = install_cassette("agent_type_demo")
+
 openai_key = os.getenv("OPENAI_API_KEY")
 
 # Load data
-df = pd.read_csv("./data/salaries_2023.csv").fillna(value=0)
+# compact categorical/numeric dtypes before handing the frame to the agent
+df = optimize_dataframe(load_salaries("./data/salaries_2023.csv"))
 
 # Use a simpler question for clearer demonstration
 SIMPLE_QUESTION = "What is the average base salary?"
@@ -22,7 +32,7 @@ SIMPLE_QUESTION = "What is the average base salary?"
 # Use GPT-4.1-mini for consistency
 MODEL_NAME = "gpt-4.1-mini-2025-04-14"
 
-def run_with_agent_type(agent_type, question):
+def run_with_agent_type(agent_type, question, tracer=None):
     """Run query with specified agent type and return timing + output"""
     print(f"\n{'='*100}")
     print(f"AGENT TYPE: {agent_type}")
@@ -46,7 +56,7 @@ def run_with_agent_type(agent_type, question):
 
     start_time = time.time()
     try:
-        result = agent.invoke(question)
+        result = agent.invoke(question, config={"callbacks": [tracer] if tracer else []})
         elapsed = time.time() - start_time
 
         print("-" * 100)
@@ -79,14 +89,29 @@ def main():
     print("   • Number of steps taken")
     print("   • Speed difference")
 
+    store = ResultsStore()
+    run_id = store.start_run("agent_type_demo", config={"model": MODEL_NAME})
+    expected = load_ground_truth()["avg_base_salary"]
+
+    def run_and_record(agent_type):
+        tracer = AgentTracer(agent_type)
+        elapsed, output, error = run_with_agent_type(agent_type, SIMPLE_QUESTION, tracer)
+        store.record(
+            run_id, MODEL_NAME, agent_type, SIMPLE_QUESTION, answer_key="avg_base_salary",
+            success=error is None, correct=score_answer(output, expected, 1.0, SIMPLE_QUESTION)["correct"],
+            latency_seconds=elapsed, trace=tracer.summary(), error=error, output=output,
+        )
+        return elapsed, output, error
+
     # Test 1: zero-shot-react-description
-    time1, output1, error1 = run_with_agent_type("zero-shot-react-description", SIMPLE_QUESTION)
+    time1, output1, error1 = run_and_record("zero-shot-react-description")
 
     # Small pause for readability
     time.sleep(1)
 
     # Test 2: openai-tools
-    time2, output2, error2 = run_with_agent_type("openai-tools", SIMPLE_QUESTION)
+    time2, output2, error2 = run_and_record("openai-tools")
+    store.finish_run(run_id)
 
     # Summary comparison
     print("\n\n" + "█" * 100)
@@ -99,9 +124,9 @@ def main():
     status1 = "✅ Success" if not error1 else "❌ Error"
     status2 = "✅ Success" if not error2 else "❌ Error"
 
-    # Check if answers are correct (should be around $90,312)
-    correct1 = "✅" if output1 and "90,312" in output1 else "⚠️"
-    correct2 = "✅" if output2 and "90,312" in output2 else "⚠️"
+    # Check if answers are correct (the dataset's average base salary)
+    correct1 = "✅" if score_answer(output1, expected, 1.0, SIMPLE_QUESTION)["correct"] else "⚠️"
+    correct2 = "✅" if score_answer(output2, expected, 1.0, SIMPLE_QUESTION)["correct"] else "⚠️"
 
     print(f"{'zero-shot-react-description':<35} {f'{time1:.2f}s':>12} {status1:>15} {correct1:>20}")
     print(f"{'openai-tools':<35} {f'{time2:.2f}s':>12} {status2:>15} {correct2:>20}")
@@ -109,6 +134,7 @@ def main():
     if not error1 and not error2:
         speedup = time1 / time2
         print(f"\n⚡ Speed difference: openai-tools is {speedup:.2f}x faster")
+    print(f"\n🗄️  Results stored as run {run_id} in {store.path}")
 
     print("\n" + "█" * 100)
     print("KEY OBSERVATIONS:")
@@ -0,0 +1,254 @@
+"""
+Semantic Answer Cache for the Agents
+
+Sits in front of `sql_agent.invoke` / `agent.invoke` so a repeated or
+paraphrased question returns the stored answer instead of re-running the
+whole multi-step agent loop:
+- Exact hits: the question is normalized (case, punctuation, whitespace)
+  and looked up directly
+- Semantic hits: otherwise the question is embedded and compared (cosine)
+  with the cached questions; a match above the threshold is returned only
+  if it has the same content words - stopwords, plurals and the few
+  synonyms in SYNONYMS may differ, so "highest" never answers "lowest",
+  "average" never answers "median" and "above 5000" never answers
+  "above 50000"
+- The embedder is pluggable: anything with LangChain's `embed_query`
+  (e.g. OpenAIEmbeddings) works; HashingEmbedder is a deterministic local
+  default that needs no network
+- Entries are tied to a data version (see loader.table_version); when the
+  version changes the cache is cleared
+- LRU eviction beyond max_entries, TTL expiry, hit-rate metrics
+
+Example:
+
+    answer_cache = AnswerCache(version=lambda: table_version("./db/salary.db"))
+    res = answer_cache.cached_invoke(sql_agent.invoke, question)
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+MAX_ENTRIES = 256
+TTL_SECONDS = 3600
+SIMILARITY_THRESHOLD = 0.9
+EMBEDDING_DIM = 512
+
+STOPWORDS = {
+    "a", "an", "and", "are", "by", "can", "do", "does", "for", "give", "has",
+    "have", "how", "i", "in", "is", "me", "of", "on", "please", "show",
+    "tell", "the", "there", "to", "what", "whats", "which", "with", "you",
+}
+
+# Words a paraphrase may swap without changing the question (after plural folding)
+SYNONYMS = {
+    "largest": "highest",
+    "biggest": "highest",
+    "maximum": "highest",
+    "max": "highest",
+    "smallest": "lowest",
+    "minimum": "lowest",
+    "min": "lowest",
+    "mean": "average",
+    "avg": "average",
+    "dept": "department",
+    "staff": "employee",
+    "worker": "employee",
+    "count": "many",
+    "number": "many",
+}
+
+
+def normalize_question(question):
+    """Lowercase, drop punctuation (keeping decimals) and collapse whitespace."""
+    text = question.lower().replace("'", "")
+    text = re.sub(r"(?<!\d)\.|\.(?!\d)|[^\w.]+", " ", text)
+    return " ".join(text.split())
+
+
+def _fold_plural(word):
+    """Crude plural folding so "salaries"/"salary", "departments"/"department" match."""
+    if len(word) <= 3:
+        return word
+    return re.sub(r"(ies|s)$", lambda m: "y" if m.group(1) == "ies" else "", word)
+
+
+def content_words(normalized):
+    """Words of a normalized question minus stopwords, plural-folded and synonym-mapped."""
+    words = (_fold_plural(word) for word in normalized.split() if word not in STOPWORDS)
+    return frozenset(SYNONYMS.get(word, word) for word in words)
+
+
+class HashingEmbedder(Embeddings):
+    """Deterministic bag-of-terms embedding (word unigrams + bigrams, hashed)."""
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+
+    def _index(self, term):
+        return int.from_bytes(hashlib.md5(term.encode("utf-8")).digest()[:4], "little") % self.dim
+
+    def embed_query(self, text):
+        words = [_fold_plural(word) for word in normalize_question(text).split() if word not in STOPWORDS]
+        words = [SYNONYMS.get(word, word) for word in words]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            vector[self._index(term)] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+class AnswerCache:
+    """LRU + TTL answer cache with exact and embedding-similarity lookup."""
+
+    def __init__(
+        self,
+        embedder=None,
+        version=None,
+        max_entries=MAX_ENTRIES,
+        ttl_seconds=TTL_SECONDS,
+        similarity_threshold=SIMILARITY_THRESHOLD,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.version = version  # callable returning the current data version
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.entries = OrderedDict()  # normalized question -> entry dict
+        self.data_version = None
+        self.lock = threading.Lock()
+        self.counters = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def _check_version(self):
+        if self.version is None:
+            return
+        current = self.version()
+        if current != self.data_version:
+            if self.entries:
+                self.counters["invalidations"] += 1
+            self.entries.clear()
+            self.data_version = current
+
+    def _expire(self, now):
+        expired = [key for key, entry in self.entries.items() if now - entry["created"] > self.ttl_seconds]
+        for key in expired:
+            del self.entries[key]
+        self.counters["evictions"] += len(expired)
+
+    def get(self, question):
+        """Cached answer for the question (or a paraphrase of it), else None."""
+        key = normalize_question(question)
+        with self.lock:
+            self._check_version()
+            self._expire(time.time())
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.counters["exact_hits"] += 1
+                return entry["answer"]
+            if not self.entries:
+                self.counters["misses"] += 1
+                return None
+            keys = list(self.entries)
+            matrix = np.array([self.entries[k]["vector"] for k in keys])
+
+        vector = np.asarray(self.embedder.embed_query(question), dtype=np.float32)
+        similarities = matrix @ vector / (
+            np.linalg.norm(matrix, axis=1) * (np.linalg.norm(vector) or 1.0) + 1e-12
+        )
+        words = content_words(key)
+
+        with self.lock:
+            for index in np.argsort(similarities)[::-1]:
+                if similarities[index] < self.similarity_threshold:
+                    break
+                entry = self.entries.get(keys[index])
+                # Similar is not the same: one differing word can change the answer
+                if entry is not None and entry["words"] == words:
+                    self.entries.move_to_end(keys[index])
+                    self.counters["semantic_hits"] += 1
+                    return entry["answer"]
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, question, answer):
+        """Store the answer for the question."""
+        key = normalize_question(question)
+        vector = np.asarray(self.embedder.embed_query(question), dtype=np.float32)
+        with self.lock:
+            self._check_version()
+            self.entries[key] = {
+                "answer": answer,
+                "vector": vector,
+                "words": content_words(key),
+                "created": time.time(),
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def cached_invoke(self, invoke, question, prompt=None):
+        """invoke(prompt or question) unless the question was already answered.
+
+        The cache key is the bare question, so prefix/suffix prompt
+        templates don't defeat matching.
+        """
+        answer = self.get(question)
+        if answer is None:
+            answer = invoke(question if prompt is None else prompt)
+            self.put(question, answer)
+        return answer
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Counters plus hit rate and current size."""
+        with self.lock:
+            hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+            lookups = hits + self.counters["misses"]
+            return {
+                **self.counters,
+                "entries": len(self.entries),
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+if __name__ == "__main__":
+    cache = AnswerCache()
+    cache.put("What is the highest average salary by department?", "answer 1")
+    cache.put("How many employees have overtime pay above 5000?", "answer 2")
+    questions = [
+        "what is the highest average salary by department",
+        "What's the highest average salary by departments?",
+        "Highest average salary by department, please",
+        "What is the largest mean salary by departments?",
+        "How many employees have overtime pay above 50000?",
+        "What is the number of employees with overtime pay above 5000?",
+        "What is the lowest average salary by department?",
+        "What is the highest median salary by department?",
+        "What is the highest average salary by division?",
+        "Which grade has the highest average base salary?",
+    ]
+    for question in questions:
+        start_time = time.perf_counter()
+        answer = cache.get(question)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        print(f"{elapsed_ms:6.2f} ms  {str(answer):<10} {question}")
+    print(cache.stats())
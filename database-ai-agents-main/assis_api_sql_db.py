@@ -1,23 +1,13 @@
-import json
-from langchain.schema import HumanMessage, SystemMessage
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
-import pandas as pd
 
-from sqlalchemy import create_engine
-import numpy as np
-from sqlalchemy import text
 from openai import OpenAI
 
+from assistant_manager import AssistantManager, print_manager_report
+from assistant_runner import RunDriver, print_run_metrics
 import helpers
-from helpers import (
-    get_avg_salary_and_female_count_for_division,
-    get_total_overtime_pay_for_department,
-    get_total_longevity_pay_for_grade,
-    get_employee_count_by_gender_in_department,
-    get_employees_with_overtime_above,
-)
+from tracing import AgentTracer, instrument_registry
 
 
 # Load environment variables from .env file
@@ -33,84 +23,40 @@ model = ChatOpenAI(api_key=openai_key, model=llm_name)
 client = OpenAI(api_key=openai_key)
 
 
-# Step 1: create the assistant
-assistant = client.beta.assistants.create(
+# Step 1: get the assistant and this session's thread (reused across runs)
+assistant_manager = AssistantManager(client)
+assistant_id = assistant_manager.get_assistant(
     name="Salary Assistant",
     description="Assistant to help with salary data",
     model=llm_name,
     tools=helpers.tools_sql,
 )
-
-# create a thread
-thread = client.beta.threads.create()
-print(thread.id)
+thread_id = assistant_manager.get_thread(os.getenv("ASSISTANT_SESSION_ID", "default"))
+print(thread_id)
 
 message = client.beta.threads.messages.create(
-    thread_id=thread.id,
+    thread_id=thread_id,
     role="user",
     content="""What is the total overtime pay for the Alcohol Beverage Services department?""",
 )
 
-messages = client.beta.threads.messages.list(thread_id=thread.id)
+messages = client.beta.threads.messages.list(thread_id=thread_id)
 print(messages)
 
-# Run the assistant
-run = client.beta.threads.runs.create(
-    thread_id=thread.id,
-    assistant_id=assistant.id,
-)
-
-import time
-
-start_time = time.time()
-
-status = run.status
-
-while status not in ["completed", "cancelled", "expired", "failed"]:
-    time.sleep(5)
-    run = client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
-    print(
-        "Elapsed time: {} minutes {} seconds".format(
-            int((time.time() - start_time) // 60), int((time.time() - start_time) % 60)
-        )
-    )
-    status = run.status
-    print(f"Status: {status}")
-    if status == "requires_action":
-        available_functions = {
-            "get_avg_salary_and_female_count_for_division": get_avg_salary_and_female_count_for_division,
-            "get_total_overtime_pay_for_department": get_total_overtime_pay_for_department,
-            "get_total_longevity_pay_for_grade": get_total_longevity_pay_for_grade,
-            "get_employee_count_by_gender_in_department": get_employee_count_by_gender_in_department,
-            "get_employees_with_overtime_above": get_employees_with_overtime_above,
-        }
-
-        tool_outputs = []
-
-        for tool_call in run.required_action.submit_tool_outputs.tool_calls:
-            function_name = tool_call.function.name
-            function_to_call = available_functions[function_name]
-            function_args = json.loads(tool_call.function.arguments)
-            if function_name == "get_employees_with_overtime_above":
-                function_response = function_to_call(amount=function_args.get("amount"))
-            elif function_name == "get_total_longevity_pay_for_grade":
-                function_response = function_to_call(grade=function_args.get("grade"))
-            else:
-                function_response = function_to_call(**function_args)
-
-            print(f"Function response: {function_response}")
-            print(tool_call.id)
-
-            tool_outputs.append(
-                {"tool_call_id": tool_call.id, "output": str(function_response)}
-            )
-
-            run = client.beta.threads.runs.submit_tool_outputs(
-                thread_id=thread.id,
-                run_id=run.id,
-                tool_outputs=tool_outputs,
-            )
-
-messages = client.beta.threads.messages.list(thread_id=thread.id)
+# Run the assistant: tool calls are handled as soon as the run requires
+# action and all outputs of a step are submitted together
+instrument_registry(helpers.registry)
+tracer = AgentTracer("assistant run")
+with tracer.activate(), RunDriver(client, helpers.registry.execute) as driver:
+    run, run_metrics = driver.run(thread_id=thread_id, assistant_id=assistant_id)
+print(f"Status: {run.status if run else 'unknown'}")
+print_run_metrics(run_metrics)
+print(f"Helper time: {tracer.summary()['helper_seconds']:.3f}s")
+
+# Delete superseded assistants and expired threads left by earlier runs
+assistant_manager.cleanup()
+print_manager_report(assistant_manager.report())
+
+messages = client.beta.threads.messages.list(thread_id=thread_id)
 
 print(messages.model_dump_json(indent=2))
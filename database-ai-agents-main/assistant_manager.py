@@ -0,0 +1,199 @@
+"""
+Assistant and Thread Lifecycle Cache
+
+Reuses server-side Assistants API objects across runs instead of creating
+a new assistant and thread on every execution:
+- Assistant IDs are persisted keyed by the model and a hash of the whole
+  configuration (name, instructions, description, tool schemas, ...);
+  changing any of it creates a fresh assistant and marks the old one (same
+  name and model) as superseded; other models under the same name are kept
+- Threads are reused per session ID until they are older than a TTL
+  (counted from creation, so a busy session still rotates its thread)
+- cleanup() deletes superseded assistants and expired threads on the server
+- Metrics report objects created vs reused and the setup latency saved
+  (reuses x the measured mean create time)
+
+State lives in ./data/.cache/assistants.json. The client only needs the
+`client.beta.assistants` / `client.beta.threads` create/retrieve/delete
+calls, so a fake API server works the same way (see fake_assistants.py).
+
+Run `python assistant_manager.py` to list the cached objects.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from openai import NotFoundError
+
+STATE_PATH = "./data/.cache/assistants.json"
+STATE_VERSION = 1
+THREAD_TTL_SECONDS = 24 * 3600
+
+
+def config_hash(config):
+    """Stable hash of JSON-able create arguments (key order and whitespace don't matter)."""
+    encoded = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+class AssistantManager:
+    """Hands out cached assistant and thread IDs, creating them only when needed."""
+
+    def __init__(self, client, state_path=STATE_PATH, thread_ttl=THREAD_TTL_SECONDS):
+        self.client = client
+        self.state_path = state_path
+        self.thread_ttl = thread_ttl
+        self.state = self._load_state()
+        self.metrics = {
+            "assistants_created": 0,
+            "assistants_reused": 0,
+            "threads_created": 0,
+            "threads_reused": 0,
+            "deleted": 0,
+            "setup_seconds": 0.0,
+        }
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if not state or state.get("version") != STATE_VERSION:
+            state = {"version": STATE_VERSION, "assistants": {}, "threads": {}, "superseded": []}
+        return state
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def _timed_create(self, create, kind, **kwargs):
+        start_time = time.perf_counter()
+        created = create(**kwargs)
+        seconds = time.perf_counter() - start_time
+        self.metrics["setup_seconds"] += seconds
+        self.metrics[f"{kind}_created"] += 1
+        # Running mean of create latency, used to estimate the time saved
+        timings = self.state.setdefault("create_seconds", {})
+        count, mean = timings.get(kind, (0, 0.0))
+        timings[kind] = (count + 1, mean + (seconds - mean) / (count + 1))
+        return created
+
+    def get_assistant(self, name, model, tools, verify=False, **assistant_kwargs):
+        """Assistant ID for this model and configuration; created on first use.
+
+        With verify=True the cached ID is checked with a retrieve call first,
+        which costs a round-trip but survives assistants deleted elsewhere.
+        """
+        config = {"name": name, "tools": tools, **assistant_kwargs}
+        key = f"{model}:{config_hash(config)}"
+        entry = self.state["assistants"].get(key)
+        if entry is not None and verify:
+            try:
+                self.client.beta.assistants.retrieve(entry["id"])
+            except NotFoundError:
+                entry = None
+        if entry is not None:
+            self.metrics["assistants_reused"] += 1
+            return entry["id"]
+
+        assistant = self._timed_create(
+            self.client.beta.assistants.create,
+            "assistants",
+            name=name,
+            model=model,
+            tools=tools,
+            **assistant_kwargs,
+        )
+        # Older assistants with the same name and model are now stale; the
+        # key starts with the model (entries saved before it was stored)
+        for old_key, old_entry in list(self.state["assistants"].items()):
+            old_model = old_entry.get("model", old_key.rsplit(":", 1)[0])
+            if old_entry["name"] == name and old_model == model:
+                self.state["superseded"].append(old_entry["id"])
+                del self.state["assistants"][old_key]
+        self.state["assistants"][key] = {
+            "id": assistant.id, "name": name, "model": model, "created_at": time.time(),
+        }
+        self._save_state()
+        return assistant.id
+
+    def get_thread(self, session_id="default"):
+        """Thread ID for a session, reused until it is thread_ttl seconds old."""
+        now = time.time()
+        entry = self.state["threads"].get(session_id)
+        if entry is not None and now - entry["created_at"] <= self.thread_ttl:
+            self.metrics["threads_reused"] += 1
+        else:
+            if entry is not None:
+                self.state["superseded"].append(entry["id"])
+            thread = self._timed_create(self.client.beta.threads.create, "threads")
+            entry = {"id": thread.id, "created_at": now}
+            self.state["threads"][session_id] = entry
+        entry["last_used"] = now
+        self._save_state()
+        return entry["id"]
+
+    def cleanup(self):
+        """Delete superseded assistants and threads older than the TTL. Returns the count."""
+        now = time.time()
+        for session_id, entry in list(self.state["threads"].items()):
+            if now - entry["created_at"] > self.thread_ttl:
+                self.state["superseded"].append(entry["id"])
+                del self.state["threads"][session_id]
+
+        remaining = []
+        deleted = 0
+        for object_id in self.state["superseded"]:
+            delete = (
+                self.client.beta.threads.delete
+                if object_id.startswith("thread_")
+                else self.client.beta.assistants.delete
+            )
+            try:
+                delete(object_id)
+            except NotFoundError:
+                pass  # already gone
+            except Exception as e:
+                print(f"Could not delete {object_id}: {e}")
+                remaining.append(object_id)
+                continue
+            deleted += 1
+        self.state["superseded"] = remaining
+        self.metrics["deleted"] += deleted
+        self._save_state()
+        return deleted
+
+    def report(self):
+        """Metrics plus the estimated setup latency saved by reuse."""
+        timings = self.state.get("create_seconds", {})
+        saved = sum(
+            self.metrics[f"{kind}_reused"] * timings.get(kind, (0, 0.0))[1]
+            for kind in ("assistants", "threads")
+        )
+        return {**self.metrics, "setup_seconds_saved": saved}
+
+
+def print_manager_report(report):
+    """Print the lifecycle cache metrics."""
+    print(f"Assistants: {report['assistants_created']} created, {report['assistants_reused']} reused")
+    print(f"Threads: {report['threads_created']} created, {report['threads_reused']} reused")
+    print(f"Deleted stale objects: {report['deleted']}")
+    print(f"Setup time: {report['setup_seconds']:.2f}s spent, ~{report['setup_seconds_saved']:.2f}s saved")
+
+
+if __name__ == "__main__":
+    manager = AssistantManager(client=None)
+    print(f"State: {manager.state_path}")
+    for key, entry in manager.state["assistants"].items():
+        print(f"assistant {entry['id']} ({entry['name']}, {key})")
+    for session_id, entry in manager.state["threads"].items():
+        age = time.time() - entry["created_at"]
+        idle = time.time() - entry["last_used"]
+        print(f"thread {entry['id']} (session {session_id}, age {age / 60:.0f} min, idle {idle / 60:.0f} min)")
+    print(f"Pending cleanup: {len(manager.state['superseded'])}")
@@ -0,0 +1,169 @@
+"""
+Assistants API Run Driver
+
+Drives a thread run to completion without fixed-interval polling:
+- Streams run events (runs.stream / runs.submit_tool_outputs_stream) so
+  tool calls are handled the moment the run requires action
+- Falls back to adaptive exponential-backoff polling when streaming isn't
+  available (or use_streaming=False)
+- Executes all tool calls of a step in parallel and submits every output
+  in a single submission
+- Records time to first event, time to first action, tool time and total
+  run latency
+
+The client only needs the `client.beta.threads.runs` methods used below,
+so the in-process fake in fake_assistants.py can stand in for OpenAI.
+Use the driver as a context manager (or call close()) to shut down its
+tool executor.
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TERMINAL_STATUSES = {"completed", "cancelled", "expired", "failed", "incomplete"}
+TERMINAL_EVENTS = {f"thread.run.{status}" for status in TERMINAL_STATUSES}
+
+INITIAL_POLL_INTERVAL = 0.25
+MAX_POLL_INTERVAL = 5.0
+POLL_BACKOFF = 1.6
+TOOL_WORKERS = 8
+
+
+class RunDriver:
+    """Run an assistant on a thread, executing tool calls with execute_tool(tool_call) -> str."""
+
+    def __init__(
+        self,
+        client,
+        execute_tool,
+        use_streaming=True,
+        initial_poll_interval=INITIAL_POLL_INTERVAL,
+        max_poll_interval=MAX_POLL_INTERVAL,
+        poll_backoff=POLL_BACKOFF,
+        tool_workers=TOOL_WORKERS,
+    ):
+        self.client = client
+        self.execute_tool = execute_tool
+        self.use_streaming = use_streaming
+        self.initial_poll_interval = initial_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff = poll_backoff
+        self.executor = ThreadPoolExecutor(max_workers=tool_workers, thread_name_prefix="assistant-tool")
+
+    def close(self):
+        """Shut down the tool executor."""
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    @property
+    def runs(self):
+        return self.client.beta.threads.runs
+
+    def run(self, thread_id, assistant_id, **run_kwargs):
+        """Run to a terminal status. Returns (run, metrics)."""
+        streaming = self.use_streaming and hasattr(self.runs, "stream")
+        metrics = {
+            "mode": "stream" if streaming else "poll",
+            "time_to_first_event": None,
+            "time_to_first_action": None,
+            "tool_seconds": 0.0,
+            "tool_calls": 0,
+            "submissions": 0,
+            "polls": 0,
+            "total_seconds": None,
+        }
+        self._start_time = time.perf_counter()
+        if streaming:
+            run = self._run_streaming(thread_id, assistant_id, metrics, run_kwargs)
+        else:
+            run = self._run_polling(thread_id, assistant_id, metrics, run_kwargs)
+        metrics["total_seconds"] = self._elapsed()
+        return run, metrics
+
+    def _elapsed(self):
+        return time.perf_counter() - self._start_time
+
+    def _execute_tool_calls(self, run, metrics):
+        """Run every tool call of the step in parallel; return the tool_outputs list."""
+        if metrics["time_to_first_action"] is None:
+            metrics["time_to_first_action"] = self._elapsed()
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+        start_time = time.perf_counter()
+        # Each call runs in a copy of the caller's context (e.g. the active tracer)
+        futures = [
+            self.executor.submit(contextvars.copy_context().run, self.execute_tool, tool_call)
+            for tool_call in tool_calls
+        ]
+        outputs = [future.result() for future in futures]
+        metrics["tool_seconds"] += time.perf_counter() - start_time
+        metrics["tool_calls"] += len(tool_calls)
+        metrics["submissions"] += 1
+        return [
+            {"tool_call_id": tool_call.id, "output": output}
+            for tool_call, output in zip(tool_calls, outputs)
+        ]
+
+    def _run_streaming(self, thread_id, assistant_id, metrics, run_kwargs):
+        manager = self.runs.stream(thread_id=thread_id, assistant_id=assistant_id, **run_kwargs)
+        run = None
+        while True:
+            action_run = None
+            with manager as stream:
+                for event in stream:
+                    if metrics["time_to_first_event"] is None:
+                        metrics["time_to_first_event"] = self._elapsed()
+                    if event.event == "thread.run.requires_action":
+                        action_run = event.data
+                    elif event.event in TERMINAL_EVENTS:
+                        run = event.data
+            if action_run is None:
+                return run
+            # One submission with every output; the response is the continued stream
+            manager = self.runs.submit_tool_outputs_stream(
+                thread_id=thread_id,
+                run_id=action_run.id,
+                tool_outputs=self._execute_tool_calls(action_run, metrics),
+            )
+
+    def _run_polling(self, thread_id, assistant_id, metrics, run_kwargs):
+        run = self.runs.create(thread_id=thread_id, assistant_id=assistant_id, **run_kwargs)
+        interval = self.initial_poll_interval
+        while run.status not in TERMINAL_STATUSES:
+            if run.status == "requires_action":
+                run = self.runs.submit_tool_outputs(
+                    thread_id=thread_id,
+                    run_id=run.id,
+                    tool_outputs=self._execute_tool_calls(run, metrics),
+                )
+                # The run is active again; check back quickly
+                interval = self.initial_poll_interval
+                continue
+            time.sleep(interval)
+            interval = min(interval * self.poll_backoff, self.max_poll_interval)
+            run = self.runs.retrieve(thread_id=thread_id, run_id=run.id)
+            metrics["polls"] += 1
+            if metrics["time_to_first_event"] is None and run.status != "queued":
+                metrics["time_to_first_event"] = self._elapsed()
+        return run
+
+
+def print_run_metrics(metrics):
+    """Print the run latency summary."""
+    def seconds(value):
+        return "n/a" if value is None else f"{value:.2f}s"
+
+    print(f"Mode: {metrics['mode']}")
+    print(f"Time to first event: {seconds(metrics['time_to_first_event'])}")
+    print(f"Time to first action: {seconds(metrics['time_to_first_action'])}")
+    print(f"Tool time: {metrics['tool_seconds']:.3f}s ({metrics['tool_calls']} calls, "
+          f"{metrics['submissions']} submissions)")
+    if metrics["mode"] == "poll":
+        print(f"Polls: {metrics['polls']}")
+    print(f"Total run latency: {seconds(metrics['total_seconds'])}")
@@ -0,0 +1,206 @@
+"""
+Parallel Benchmark Runner
+
+Runs a benchmark matrix (model x query cells) on a thread pool instead of
+one cell after another, so wall time approaches the slowest cell rather
+than the sum of all LLM latencies:
+- Per-provider concurrency limits (semaphores), so one provider's rate
+  limits don't throttle the others
+- Rate-limit-aware retries: 429s back off exponentially with jitter,
+  honouring Retry-After when the provider sends it, and give the
+  provider slot back while waiting
+- Results come back in cell order regardless of completion order
+
+Cells are plain objects; the caller supplies run_cell(cell) -> result and
+provider_of(cell) -> provider name. Agents hold per-run state (the pandas
+REPL locals), so run_cell should borrow agents from an AgentPool: one
+thread uses an agent at a time, and agents built during warmups are reused
+by the measured runs whichever worker thread picks them up.
+
+The pandas REPL tool captures print() output with contextlib.redirect_stdout,
+which swaps the process-wide sys.stdout; cells running at once would read
+each other's output. run() first installs a ThreadLocalStdout so each
+thread's redirect only affects that thread.
+"""
+
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+PROVIDER_CONCURRENCY = {"openai": 4, "anthropic": 2}
+DEFAULT_CONCURRENCY = 2
+MAX_WORKERS = 16
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+
+def is_rate_limit_error(error):
+    """True for provider rate-limit errors (HTTP 429) from any SDK."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    if type(error).__name__ == "RateLimitError":
+        return True
+    return "rate limit" in str(error).lower()
+
+
+def retry_after_seconds(error):
+    """Retry-After header of a rate-limit error, if the provider sent one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_seconds(attempt, error=None):
+    """Delay before retry number `attempt` (1-based)."""
+    retry_after = retry_after_seconds(error) if error is not None else None
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX_SECONDS)
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempt - 1), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class AgentPool:
+    """Idle instances of create(*key) per key, each borrowed by one thread at a time."""
+
+    def __init__(self, create):
+        self.create = create
+        self.created = 0
+        self._idle = {}  # key -> [instance]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self, *key):
+        """An idle instance for key, or a new one when all are in use; returned afterwards."""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            instance = idle.pop() if idle else None
+        if instance is None:
+            instance = self.create(*key)
+            with self._lock:
+                self.created += 1
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                self._idle[key].append(instance)
+
+
+class ThreadLocalStdout:
+    """sys.stdout stand-in that writes to a per-thread target (default: the real stdout)."""
+
+    def __init__(self, default):
+        self.default = default
+        self._local = threading.local()
+
+    def _target(self):
+        return getattr(self._local, "target", None) or self.default
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        return self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+    @contextmanager
+    def redirect(self, target):
+        """Drop-in for contextlib.redirect_stdout that only affects the calling thread."""
+        previous = getattr(self._local, "target", None)
+        self._local.target = target
+        try:
+            yield target
+        finally:
+            self._local.target = previous
+
+
+_stdout_lock = threading.Lock()
+
+
+def install_thread_local_stdout():
+    """Route sys.stdout through a ThreadLocalStdout and make the pandas REPL tool use it."""
+    with _stdout_lock:
+        if not isinstance(sys.stdout, ThreadLocalStdout):
+            sys.stdout = ThreadLocalStdout(sys.stdout)
+        proxy = sys.stdout
+        try:
+            from langchain_experimental.tools.python import tool as python_tool
+        except ImportError:
+            python_tool = None
+        if python_tool is not None:
+            python_tool.redirect_stdout = proxy.redirect
+    return proxy
+
+
+class BenchmarkRunner:
+    """Run benchmark cells concurrently under per-provider limits."""
+
+    def __init__(self, provider_limits=None, max_workers=MAX_WORKERS, max_retries=MAX_RETRIES):
+        self.provider_limits = {**PROVIDER_CONCURRENCY, **(provider_limits or {})}
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self._semaphores = {}
+        self._lock = threading.Lock()
+        self.stats = {"cells": 0, "retries": 0, "backoff_seconds": 0.0, "wall_seconds": 0.0}
+
+    def _semaphore(self, provider):
+        with self._lock:
+            if provider not in self._semaphores:
+                limit = self.provider_limits.get(provider, DEFAULT_CONCURRENCY)
+                self._semaphores[provider] = threading.BoundedSemaphore(limit)
+            return self._semaphores[provider]
+
+    def _run_with_retries(self, run_cell, cell, provider):
+        semaphore = self._semaphore(provider)
+        for attempt in range(self.max_retries + 1):
+            with semaphore:
+                try:
+                    return run_cell(cell)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == self.max_retries:
+                        raise
+                    delay = backoff_seconds(attempt + 1, e)
+            # Sleep outside the semaphore so other cells can use the slot
+            with self._lock:
+                self.stats["retries"] += 1
+                self.stats["backoff_seconds"] += delay
+            time.sleep(delay)
+
+    def run(self, cells, run_cell, provider_of, on_result=None, on_error=None):
+        """Run every cell; returns results in the same order as cells.
+
+        on_result(index, cell, result) is called as each cell finishes
+        (from the worker thread), e.g. for progress output. If a cell still
+        fails after the retries, on_error(cell, error) supplies its result;
+        without on_error the error is raised.
+        """
+        cells = list(cells)
+        install_thread_local_stdout()
+        start_time = time.perf_counter()
+
+        def work(index):
+            cell = cells[index]
+            try:
+                result = self._run_with_retries(run_cell, cell, provider_of(cell))
+            except Exception as e:
+                if on_error is None:
+                    raise
+                result = on_error(cell, e)
+            if on_result is not None:
+                on_result(index, cell, result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bench") as executor:
+            results = list(executor.map(work, range(len(cells))))
+
+        self.stats["cells"] += len(cells)
+        self.stats["wall_seconds"] += time.perf_counter() - start_time
+        return results
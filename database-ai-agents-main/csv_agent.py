@@ -2,7 +2,10 @@ from langchain.schema import HumanMessage, SystemMessage
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
-import pandas as pd
+from answer_cache import AnswerCache
+from dataset import load_salaries, optimize_dataframe
+from loader import fingerprint_csv
+from sandbox import SandboxPool, SandboxedPythonTool, use_sandbox
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,7 +16,9 @@ llm_name = "gpt-4.1-mini-2025-04-14"
 model = ChatOpenAI(api_key=openai_key, model=llm_name)
 
 # read csv file
-df = pd.read_csv("./data/salaries_2023.csv").fillna(value=0)
+# compact categorical/numeric dtypes before handing the frame to the agent
+csv_path = "./data/salaries_2023.csv"
+df = optimize_dataframe(load_salaries(csv_path))
 
 # print(df.head())
 
@@ -37,6 +42,7 @@ agent = create_pandas_dataframe_agent(
 CSV_PROMPT_PREFIX = """
 First set the pandas display options to show all the columns,
 get the column names, then answer the question.
+The text columns are pandas categoricals, so pass observed=True to groupby.
 """
 
 CSV_PROMPT_SUFFIX = """
@@ -60,11 +66,44 @@ to the final answer.
 """
 QUESTION = "Which grade has the highest average base salary, and compare the average female pay vs male pay?"
 
-res = agent.invoke(CSV_PROMPT_PREFIX + QUESTION + CSV_PROMPT_SUFFIX)
+import streamlit as st
 
-# print(f"Final result: {res["output"]}")
 
-import streamlit as st
+# Keyed on the bare question; a changed CSV (size/mtime) clears the cache.
+# cache_resource keeps it across Streamlit reruns.
+@st.cache_resource
+def get_answer_cache():
+    return AnswerCache(
+        version=lambda: tuple(fingerprint_csv(csv_path, with_hash=False).values())
+    )
+
+
+answer_cache = get_answer_cache()
+
+
+# Agent code runs in worker processes with CPU/memory/time limits instead of
+# this process; one pool is shared by every Streamlit session.
+@st.cache_resource
+def get_sandbox_pool():
+    return SandboxPool(csv_path)
+
+
+sandbox_pool = get_sandbox_pool()
+# Every rerun rebuilds the agent with a new sandbox session; drop the
+# previous one's variables instead of leaving them to LRU eviction
+previous_session = st.session_state.get("sandbox_session_id")
+if previous_session is not None:
+    sandbox_pool.close_session(previous_session)
+use_sandbox(agent, sandbox_pool)
+st.session_state["sandbox_session_id"] = next(
+    tool.session_id for tool in agent.tools if isinstance(tool, SandboxedPythonTool)
+)
+
+res = answer_cache.cached_invoke(
+    agent.invoke, QUESTION, prompt=CSV_PROMPT_PREFIX + QUESTION + CSV_PROMPT_SUFFIX
+)
+
+# print(f"Final result: {res["output"]}")
 
 st.title("Database AI Agent with LangChain")
 
@@ -81,6 +120,6 @@ question = st.text_input(
 # Run the agent and display the result
 if st.button("Run Query"):
     QUERY = CSV_PROMPT_PREFIX + question + CSV_PROMPT_SUFFIX
-    res = agent.invoke(QUERY)
+    res = answer_cache.cached_invoke(agent.invoke, question, prompt=QUERY)
     st.write("### Final Answer")
     st.markdown(res["output"])
@@ -4,14 +4,45 @@ CSV Agent Performance Benchmark: GPT-4.1-mini vs Claude Haiku
 Compares models across multiple dimensions:
 - Accuracy: Correct answers
 - Speed: Response time
-- Cost: Token usage
+- Cost: Token usage and USD cost per answer (usage.py)
 - Quality: Answer formatting and explanation
 - Reasoning: Thought process quality
+
+Each run is traced (tracing.py): the report breaks response time into LLM,
+tool, pandas and framework time, and the spans are written to
+./data/traces/ (Chrome trace format + JSON).
+
+Every cell runs after warmups and is repeated (trials.py); latency is
+reported as p50/p90/p99 with confidence intervals, outliers and
+per-category histograms instead of a single mean.
 """
 
 import os
+import threading
 import time
-import pandas as pd
+from contextlib import contextmanager
+from benchmark_runner import AgentPool, BenchmarkRunner, is_rate_limit_error
+from dataset import load_salaries, optimize_dataframe
+from ground_truth import benchmark_queries
+from llm_cassette import install_cassette
+from results_store import ResultsStore
+from scoring import score_query
+from tracing import (
+    AgentTracer,
+    average_summaries,
+    instrument_repl_tool,
+    print_trace_summary,
+    write_chrome_trace,
+    write_trace_json,
+)
+from trials import (
+    interleave_trials,
+    latency_stats,
+    print_latency_histograms,
+    print_latency_stats,
+    trial_settings,
+)
+from usage import UsageLedger, print_usage_report
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
@@ -20,57 +51,22 @@ from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe
 # Load environment variables
 load_dotenv()
 
+# LLM_CASSETTE_MODE=record|replay|auto records or replays every LLM call
+cassette = install_cassette("csv_agent_benchmark")
+
 openai_key = os.getenv("OPENAI_API_KEY")
 anthropic_key = os.getenv("ANTHROPIC_API_KEY")
 
+AGENT_TYPE = "zero-shot-react-description"  # the create_pandas_dataframe_agent default
+TRACE_PATH = "./data/traces/csv_agent_benchmark.trace.json"
+TRACE_JSON_PATH = "./data/traces/csv_agent_benchmark.spans.json"
+
 # Load data
-df = pd.read_csv("./data/salaries_2023.csv").fillna(value=0)
-
-# Test queries with expected answers for accuracy checking
-test_queries = [
-    {
-        "query": "How many rows are in the dataframe?",
-        "expected": 10291,
-        "category": "Simple",
-    },
-    {
-        "query": "What is the average base salary?",
-        "expected": 90312.17,  # Approximate
-        "category": "Simple",
-        "tolerance": 1.0,  # Allow $1 difference
-    },
-    {
-        "query": "How many unique departments are there?",
-        "expected": 42,
-        "category": "Simple",
-    },
-    {
-        "query": "What is the highest base salary?",
-        "expected": 292000.0,
-        "category": "Simple",
-    },
-    {
-        "query": "How many male vs female employees are there?",
-        "expected": {"M": 5929, "F": 4362},
-        "category": "Intermediate",
-    },
-    {
-        "query": "What is the average base salary by gender?",
-        "expected": {"F": 87497.50, "M": 92382.93},
-        "category": "Intermediate",
-        "tolerance": 1.0,
-    },
-    {
-        "query": "Which department has the most employees?",
-        "expected": "HHS",
-        "category": "Intermediate",
-    },
-    {
-        "query": "What grade has the highest average base salary?",
-        "expected": None,  # Need to verify
-        "category": "Complex",
-    },
-]
+# compact categorical/numeric dtypes before handing the frame to the agent
+df = optimize_dataframe(load_salaries("./data/salaries_2023.csv"))
+
+# Test queries; expected answers are computed from the dataset (ground_truth.py)
+test_queries = benchmark_queries()
 
 
 def create_agent(model_name, model_type="openai"):
@@ -84,35 +80,56 @@ def create_agent(model_name, model_type="openai"):
 
     agent = create_pandas_dataframe_agent(
         llm=model,
-        df=df,
+        df=df,  # replaced by a fresh copy per query, see reset_repl_state
+        agent_type=AGENT_TYPE,
         verbose=False,  # Set to False for cleaner output
         allow_dangerous_code=True,
     )
+    instrument_repl_tool(agent)  # pandas exec spans
 
     return agent, model_name, model_type
 
 
-def run_benchmark(agent, model_name, query):
+def reset_repl_state(agent):
+    """Give the agent's python_repl_ast tool a fresh namespace: its own copy of df, no leftovers.
+
+    Pooled agents are reused across queries, trials and warmups; without this
+    the variables (and any df mutations) of one run would be visible to the next.
+    """
+    for tool in getattr(agent, "tools", []):
+        if tool.name == "python_repl_ast":
+            tool.locals = {"df": df.copy()}
+            tool.globals = {}
+    return agent
+
+
+def run_benchmark(agent, model_name, query, callbacks=()):
     """Run a single query and measure performance."""
-    start_time = time.time()
+    tracer = AgentTracer(f"{model_name} | {query}")
+    start_time = time.perf_counter()
 
     try:
-        result = agent.invoke(query)
-        end_time = time.time()
+        with tracer.activate():
+            result = agent.invoke(query, config={"callbacks": [tracer, *callbacks]})
+        end_time = time.perf_counter()
 
         return {
             "success": True,
             "output": result.get("output", ""),
             "response_time": end_time - start_time,
             "error": None,
+            "tracer": tracer,
         }
     except Exception as e:
-        end_time = time.time()
+        if is_rate_limit_error(e):
+            raise  # BenchmarkRunner backs off and retries the cell
+        end_time = time.perf_counter()
         return {
             "success": False,
             "output": None,
             "response_time": end_time - start_time,
             "error": str(e),
+            "tracer": tracer,
         }
 
 
@@ -140,6 +157,8 @@ def compare_models():
     print_header("CSV AGENT PERFORMANCE BENCHMARK")
     print(f"\nDataset: salaries_2023.csv ({len(df)} rows, {len(df.columns)} columns)")
     print(f"Test Queries: {len(test_queries)}")
+    warmups, trials = trial_settings()
+    print(f"Trials: {trials} per cell after {warmups} warmup run(s)")
 
     # Initialize models
     models = [
@@ -147,34 +166,130 @@ def compare_models():
         ("Claude Haiku 4.5", "claude-haiku-4-5-20251001", "anthropic"),
     ]
 
-    results = {}
-
-    # Run tests for each model
-    for model_display, model_name, model_type in models:
-        print_header(f"Testing: {model_display}")
-        print(f"Model: {model_name}")
-        print(f"Provider: {model_type.upper()}")
-
-        agent, _, _ = create_agent(model_name, model_type)
-        model_results = []
-
-        for i, test in enumerate(test_queries, 1):
-            query = test["query"]
-            print(f"\n[{i}/{len(test_queries)}] {test['category']}: {query}")
-
-            result = run_benchmark(agent, model_display, query)
-            result["category"] = test["category"]
-            result["query"] = query
-            model_results.append(result)
+    # Every model x query x trial cell runs in parallel, limited per
+    # provider; agents are pooled per model, so the ones the warmups build
+    # are the ones the trials use (each run starts from a fresh REPL namespace)
+    cells = [(model, i, test) for model in models for i, test in enumerate(test_queries, 1)]
+    trial_cells = interleave_trials(cells, trials)
+    agents = AgentPool(lambda model_name, model_type: create_agent(model_name, model_type)[0])
+
+    @contextmanager
+    def cell_agent(model_name, model_type):
+        """A pooled agent whose REPL namespace belongs to this cell alone.
+
+        Cells run in parallel and hand agents to each other through the pool:
+        the namespace is fresh on borrow and emptied on return, so an idle
+        agent holds no frame copy or variables of a finished cell.
+        """
+        with agents.borrow(model_name, model_type) as agent:
+            reset_repl_state(agent)
+            try:
+                yield agent
+            finally:
+                for tool in getattr(agent, "tools", []):
+                    if tool.name == "python_repl_ast":
+                        tool.locals, tool.globals = {}, {}
+
+    print_lock = threading.Lock()
+
+    ledger = UsageLedger()
+    store = ResultsStore()
+    run_id = store.start_run("csv_agent_benchmark", config={
+        "models": [model_name for _, model_name, _ in models],
+        "agent_type": AGENT_TYPE,
+        "cassette": cassette.mode if cassette else "off",
+        "warmups": warmups,
+        "trials": trials,
+    })
+
+    def warm_cell(cell):
+        (model_display, model_name, model_type), _, test = cell
+        with cell_agent(model_name, model_type) as agent:
+            return run_benchmark(agent, model_display, test["query"])
+
+    def run_cell(trial_cell):
+        ((model_display, model_name, model_type), i, test), trial = trial_cell
+        labels = {
+            "model": model_display, "category": test["category"], "agent_type": AGENT_TYPE,
+            "query_id": i, "trial": trial,
+        }
+        with cell_agent(model_name, model_type) as agent:
+            result = run_benchmark(agent, model_display, test["query"], callbacks=[ledger.handler(**labels)])
+        result["score"] = score_query(result["output"], test) if result["success"] else None
+        result["correct"] = bool(result["score"] and result["score"]["correct"])
+        ledger.record_run(labels, answered=result["success"], correct=result["correct"])
+        result["category"] = test["category"]
+        result["query"] = test["query"]
+        result["query_id"] = i
+        result["trial"] = trial
+        return result
+
+    def cell_failed(trial_cell, error):
+        (_, i, test), trial = trial_cell
+        return {
+            "success": False,
+            "output": None,
+            "response_time": 0.0,
+            "error": f"{type(error).__name__}: {error}",
+            "score": None,
+            "correct": False,
+            "category": test["category"],
+            "query": test["query"],
+            "query_id": i,
+            "trial": trial,
+            "tracer": AgentTracer(f"{trial_cell[0][0][0]} | {test['query']}"),
+        }
 
-            status = "✅" if result["success"] else "❌"
-            print(f"{status} Time: {result['response_time']:.2f}s")
+    def report_progress(_, trial_cell, result):
+        ((model_display, _, _), i, test), trial = trial_cell
+        status = "✅" if result["success"] else "❌"
+        with print_lock:
+            print(f"\n{status} [{model_display}] [{i}/{len(test_queries)}] [trial {trial + 1}/{trials}] "
+                  f"{test['category']}: {test['query']}")
+            print(f"   Time: {result['response_time']:.2f}s")
             if result["success"]:
                 print(f"   Answer: {result['output'][:150]}{'...' if len(result['output']) > 150 else ''}")
+                print(f"   Correct: {'✅' if result['correct'] else '❌'} (expected {test['expected']})")
             else:
                 print(f"   Error: {result['error']}")
 
-        results[model_display] = model_results
+    print_header("Running benchmark matrix")
+    for model_display, model_name, model_type in models:
+        print(f"{model_display}: {model_name} ({model_type.upper()})")
+
+    # Warmups: not scored, costed or stored; failures don't matter here
+    if warmups:
+        print(f"\nWarming up: {warmups} unmeasured run(s) of each of the {len(cells)} cells...")
+        BenchmarkRunner().run(
+            [cell for _ in range(warmups) for cell in cells], warm_cell,
+            provider_of=lambda cell: cell[0][2], on_error=lambda cell, error: None,
+        )
+        print(f"Warm agents ready for the trials: {agents.created}")
+
+    runner = BenchmarkRunner()
+    cell_results = runner.run(
+        trial_cells, run_cell, provider_of=lambda trial_cell: trial_cell[0][0][2],
+        on_result=report_progress, on_error=cell_failed,
+    )
+
+    # Every trial of every query, grouped by model
+    results = {model_display: [] for model_display, _, _ in models}
+    for (((model_display, _, _), _, _), _), result in zip(trial_cells, cell_results):
+        results[model_display].append(result)
+
+    # Keep the run in the results history (python results_store.py compare)
+    cell_costs = ledger.summary(by=("model", "query_id", "trial"))
+    for (((model_display, _, _), i, test), trial), result in zip(trial_cells, cell_results):
+        usage = cell_costs.get((model_display, i, trial))
+        store.record(
+            run_id, model_display, AGENT_TYPE, test["query"],
+            category=test["category"], answer_key=test["answer"], trial=trial,
+            success=result["success"], correct=result["correct"],
+            latency_seconds=result["response_time"], trace=result["tracer"].summary(),
+            cost=usage["cost"] if usage and not usage["unpriced_calls"] else None,
+            error=result["error"], output=result["output"], score=result["score"],
+        )
+    store.finish_run(run_id)
 
     # Generate comparison report
     print_header("COMPARATIVE ANALYSIS")
@@ -186,41 +301,64 @@ def compare_models():
         success_rate = (success_count / len(model_results)) * 100
         print(f"  {model_name:20s}: {success_count}/{len(model_results)} ({success_rate:.1f}%)")
 
-    # Average Response Time
-    print("\n⚡ AVERAGE RESPONSE TIME:")
+    # Accuracy against the ground truth
+    print("\n🎯 ACCURACY:")
     for model_name, model_results in results.items():
-        successful_results = [r for r in model_results if r["success"]]
-        if successful_results:
-            avg_time = sum(r["response_time"] for r in successful_results) / len(
-                successful_results
-            )
-            print(f"  {model_name:20s}: {avg_time:.2f}s")
-        else:
-            print(f"  {model_name:20s}: N/A (no successful queries)")
+        correct_count = sum(1 for r in model_results if r["correct"])
+        accuracy = (correct_count / len(model_results)) * 100
+        by_category = ", ".join(
+            f"{category} {sum(1 for r in model_results if r['category'] == category and r['correct'])}"
+            f"/{sum(1 for r in model_results if r['category'] == category)}"
+            for category in ("Simple", "Intermediate", "Complex")
+        )
+        print(f"  {model_name:20s}: {correct_count}/{len(model_results)} ({accuracy:.1f}%) - {by_category}")
+
+    # Latency distribution over all trials (successful runs only)
+    print("\n⚡ RESPONSE TIME DISTRIBUTION (all queries):")
+    print_latency_stats({
+        model_name: latency_stats([r["response_time"] for r in model_results if r["success"]])
+        for model_name, model_results in results.items()
+    })
 
     # Response Time by Category
     print("\n⏱️  RESPONSE TIME BY CATEGORY:")
     categories = ["Simple", "Intermediate", "Complex"]
+    category_samples = {}
     for category in categories:
-        print(f"\n  {category}:")
         for model_name, model_results in results.items():
-            category_results = [
-                r for r in model_results if r["category"] == category and r["success"]
+            category_samples[f"{model_name} / {category}"] = [
+                r["response_time"] for r in model_results if r["category"] == category and r["success"]
             ]
-            if category_results:
-                avg_time = sum(r["response_time"] for r in category_results) / len(
-                    category_results
-                )
-                print(f"    {model_name:20s}: {avg_time:.2f}s")
-
-    # Fastest vs Slowest
-    print("\n🏆 FASTEST RESPONSES:")
+    print_latency_stats({label: latency_stats(samples) for label, samples in category_samples.items()})
+
+    print("\n📊 LATENCY HISTOGRAMS BY CATEGORY:")
+    print_latency_histograms(category_samples)
+
+    # Where the time went, per model (averaged over successful queries)
+    print("\n🔬 LATENCY BREAKDOWN (per query):")
+    breakdown = {}
+    for model_name, model_results in results.items():
+        summaries = [r["tracer"].summary() for r in model_results if r["success"]]
+        if summaries:
+            breakdown[model_name] = average_summaries(summaries)
+    print_trace_summary(breakdown)
+
+    tracers = [r["tracer"] for r in cell_results]
+    write_chrome_trace(tracers, TRACE_PATH)
+    write_trace_json(tracers, TRACE_JSON_PATH)
+    print(f"\n  Trace: {TRACE_PATH} (chrome://tracing or ui.perfetto.dev), spans: {TRACE_JSON_PATH}")
+
+    print_usage_report(ledger.summary(by=("model",)), "TOKEN USAGE AND COST BY MODEL")
+    print_usage_report(ledger.summary(by=("model", "category")), "TOKEN USAGE AND COST BY CATEGORY")
+
+    # Fastest vs Slowest, by median over the trials
+    print("\n🏆 FASTEST RESPONSES (p50 over trials):")
     for i, test in enumerate(test_queries, 1):
         times = {}
         for model_name, model_results in results.items():
-            result = model_results[i - 1]
-            if result["success"]:
-                times[model_name] = result["response_time"]
+            stats = latency_stats([r["response_time"] for r in model_results if r["query_id"] == i and r["success"]])
+            if stats:
+                times[model_name] = stats["p50"]
 
         if times:
             fastest = min(times.items(), key=lambda x: x[1])
@@ -238,17 +376,24 @@ def compare_models():
     for model_name, model_results in results.items():
         successful_results = [r for r in model_results if r["success"]]
         success_rate = (len(successful_results) / len(model_results)) * 100
-        avg_time = (
-            sum(r["response_time"] for r in successful_results) / len(successful_results)
-            if successful_results
-            else 0
-        )
+        stats = latency_stats([r["response_time"] for r in successful_results])
 
         print(f"\n{model_name}:")
         print(f"  Success Rate: {success_rate:.1f}%")
-        print(f"  Avg Response Time: {avg_time:.2f}s")
+        print(f"  Accuracy: {sum(1 for r in model_results if r['correct']) / len(model_results) * 100:.1f}%")
+        if stats:
+            print(f"  Response Time: p50 {stats['p50']:.2f}s, p90 {stats['p90']:.2f}s, "
+                  f"p99 {stats['p99']:.2f}s (mean {stats['mean']:.2f}s ± {stats['std']:.2f}s)")
         print(f"  Total Time: {sum(r['response_time'] for r in model_results):.2f}s")
 
+    cell_seconds = sum(r["response_time"] for r in cell_results)
+    print(f"\nWall time: {runner.stats['wall_seconds']:.2f}s for {cell_seconds:.2f}s of cell time "
+          f"({cell_seconds / max(runner.stats['wall_seconds'], 1e-9):.1f}x parallelism, "
+          f"{runner.stats['retries']} rate-limit retries)")
+
+    print(f"\nResults stored as run {run_id} in {store.path} "
+          "(python results_store.py compare to diff against the previous run)")
+
     print("\n" + "=" * 100)
     print("BENCHMARK COMPLETED")
     print("=" * 100)
@@ -0,0 +1,170 @@
+"""
+Precomputed Aggregate Cube for the Salary Dimensions
+
+Materializes count, sum, sum of squares, min and max of every pay measure
+for each observed (Department, Department_Name, Division, Gender, Grade)
+combination in a `salaries_2023_cube` table. Any roll-up over those
+dimensions is answered from the cube in O(groups) instead of scanning rows.
+
+- Built chunk by chunk at ingest time (loader.py) with UPSERTs, so appending
+  rows later is the same incremental update_cube() call
+- Indexes on Division, Department_Name and Grade serve the helpers.py
+  cube lookups without scanning the cube
+- rollup() answers count/sum/avg/min/max/std grouped by or filtered on any
+  subset of the dimensions
+"""
+
+import math
+
+import pandas as pd
+
+from schema import TABLE_NAME
+
+CUBE_TABLE = f"{TABLE_NAME}_cube"
+
+DIMENSIONS = ["Department", "Department_Name", "Division", "Gender", "Grade"]
+MEASURES = ["Base_Salary", "Overtime_Pay", "Longevity_Pay"]
+STATISTICS = ["count", "sum", "avg", "min", "max", "std"]
+
+# Index name suffix -> columns, for the helpers.py cube lookups. The UNIQUE
+# key already leads with Department, so filters on it need no extra index.
+CUBE_INDEXES = {
+    "division_gender": ("Division", "Gender"),
+    "department_name_gender": ("Department_Name", "Gender"),
+    "grade": ("Grade",),
+}
+
+
+def _measure_columns():
+    columns = ["row_count"]
+    for measure in MEASURES:
+        columns += [f"{measure}_sum", f"{measure}_sumsq", f"{measure}_min", f"{measure}_max"]
+    return columns
+
+
+CUBE_COLUMNS = DIMENSIONS + _measure_columns()
+
+
+def create_cube_table(connection, table_name=CUBE_TABLE):
+    """Create the cube table with a unique key over the dimensions."""
+    dimension_ddl = [f'"{dimension}" TEXT NOT NULL' for dimension in DIMENSIONS]
+    measure_ddl = ['"row_count" INTEGER NOT NULL'] + [
+        f'"{column}" REAL NOT NULL' for column in _measure_columns()[1:]
+    ]
+    columns = ",\n    ".join(dimension_ddl + measure_ddl)
+    key = ", ".join(f'"{dimension}"' for dimension in DIMENSIONS)
+    connection.execute(
+        f'CREATE TABLE "{table_name}" (\n    {columns},\n    UNIQUE ({key})\n)'
+    )
+
+
+def create_cube_indexes(connection, table_name=CUBE_TABLE):
+    """Create the secondary indexes on the cube's filter columns."""
+    for suffix, columns in CUBE_INDEXES.items():
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        connection.execute(
+            f'CREATE INDEX IF NOT EXISTS "idx_{table_name}_{suffix}" '
+            f'ON "{table_name}" ({column_list})'
+        )
+
+
+def partial_cube(chunk):
+    """Aggregate one DataFrame chunk to cube rows (one per observed combination)."""
+    frame = chunk[DIMENSIONS + MEASURES].copy()
+    for measure in MEASURES:
+        frame[f"{measure}_sq"] = frame[measure] * frame[measure]
+
+    aggregations = {"row_count": (MEASURES[0], "size")}
+    for measure in MEASURES:
+        aggregations[f"{measure}_sum"] = (measure, "sum")
+        aggregations[f"{measure}_sumsq"] = (f"{measure}_sq", "sum")
+        aggregations[f"{measure}_min"] = (measure, "min")
+        aggregations[f"{measure}_max"] = (measure, "max")
+
+    grouped = frame.groupby(DIMENSIONS, observed=True, sort=False).agg(**aggregations)
+    return grouped.reset_index()[CUBE_COLUMNS]
+
+
+def update_cube(connection, chunk, table_name=CUBE_TABLE):
+    """Fold a chunk of new rows into the cube table (UPSERT per group)."""
+    cube = partial_cube(chunk)
+    updates = ["row_count = row_count + excluded.row_count"]
+    for measure in MEASURES:
+        updates += [
+            f"{measure}_sum = {measure}_sum + excluded.{measure}_sum",
+            f"{measure}_sumsq = {measure}_sumsq + excluded.{measure}_sumsq",
+            f"{measure}_min = MIN({measure}_min, excluded.{measure}_min)",
+            f"{measure}_max = MAX({measure}_max, excluded.{measure}_max)",
+        ]
+    key = ", ".join(f'"{dimension}"' for dimension in DIMENSIONS)
+    connection.executemany(
+        f'INSERT INTO "{table_name}" VALUES ({", ".join("?" for _ in CUBE_COLUMNS)}) '
+        f"ON CONFLICT ({key}) DO UPDATE SET {', '.join(updates)}",
+        cube.itertuples(index=False, name=None),
+    )
+    return len(cube)
+
+
+def _std(count, total, sum_of_squares):
+    """Sample standard deviation from count, sum and sum of squares."""
+    if not count or count < 2:
+        return None
+    variance = (sum_of_squares - total * total / count) / (count - 1)
+    return math.sqrt(max(variance, 0.0))
+
+
+def rollup(connection, measure, group_by=(), where=None, table_name=CUBE_TABLE):
+    """Roll the cube up to the given dimensions.
+
+    Returns a list of dicts with the group_by columns plus count, sum, avg,
+    min, max and std of the measure, e.g.
+
+        rollup(conn, "Base_Salary", group_by=["Gender"], where={"Grade": "M3"})
+    """
+    if measure not in MEASURES:
+        raise ValueError(f"Unknown measure: {measure}")
+    where = where or {}
+    for dimension in list(group_by) + list(where):
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+
+    select = [f'"{dimension}"' for dimension in group_by] + [
+        "SUM(row_count)",
+        f"SUM({measure}_sum)",
+        f"SUM({measure}_sumsq)",
+        f"MIN({measure}_min)",
+        f"MAX({measure}_max)",
+    ]
+    query = f'SELECT {", ".join(select)} FROM "{table_name}"'
+    if where:
+        query += " WHERE " + " AND ".join(f'"{dimension}" = ?' for dimension in where)
+    if group_by:
+        dimension_list = ", ".join(f'"{dimension}"' for dimension in group_by)
+        query += f" GROUP BY {dimension_list} ORDER BY {dimension_list}"
+
+    results = []
+    for row in connection.execute(query, tuple(where.values())):
+        keys = dict(zip(group_by, row[: len(group_by)]))
+        count, total, sum_of_squares, minimum, maximum = row[len(group_by):]
+        count = count or 0
+        results.append(
+            {
+                **keys,
+                "count": count,
+                "sum": total,
+                "avg": total / count if count else None,
+                "min": minimum,
+                "max": maximum,
+                "std": _std(count, total, sum_of_squares),
+            }
+        )
+    return results
+
+
+def cube_frame(connection, measure, group_by=(), where=None, table_name=CUBE_TABLE):
+    """rollup() as a DataFrame indexed by the group_by dimensions."""
+    frame = pd.DataFrame(
+        rollup(connection, measure, group_by, where, table_name),
+        columns=list(group_by) + STATISTICS,
+    )
+    return frame.set_index(list(group_by)) if group_by else frame
@@ -0,0 +1,227 @@
+"""
+Columnar Dataset Cache
+
+Converts data/salaries_2023.csv once into memory-mapped NumPy column files
+and serves DataFrames straight from them, so scripts start without
+re-parsing the CSV text.
+
+- String columns are dictionary-encoded: int codes on disk, categories in
+  meta.json, exposed as pandas categoricals
+- Numeric columns are raw float64 arrays
+- meta.json records the CSV fingerprint; a changed CSV rebuilds the cache
+- Columns are opened copy-on-write, so code that mutates the DataFrame
+  never touches the files
+
+Run `python dataset.py` to build (or validate) the cache.
+"""
+
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from ingest import CATEGORY_COLUMNS, CSV_PATH, SALARY_COLUMNS, iter_salary_chunks
+from loader import file_sha256, fingerprint_csv
+
+CACHE_ROOT = "./data/.cache"
+META_FILE = "meta.json"
+CACHE_VERSION = 1
+
+
+def cache_dir_for(csv_path, cache_root=CACHE_ROOT):
+    """Cache directory for a CSV, e.g. ./data/.cache/salaries_2023."""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_root, name)
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def fingerprint_matches(stored, csv_path):
+    """True if a stored fingerprint_csv() result still describes the CSV."""
+    current = fingerprint_csv(csv_path, with_hash=False)
+    if (stored["size"], stored["mtime_ns"]) == (current["size"], current["mtime_ns"]):
+        return True
+    # Touched or copied: fall back to comparing content hashes
+    return stored["size"] == current["size"] and stored["sha256"] == file_sha256(csv_path)
+
+
+def cache_is_fresh(csv_path, cache_dir):
+    """True if the cache was built from the CSV as it is now."""
+    meta = _read_meta(cache_dir)
+    return meta is not None and fingerprint_matches(meta["fingerprint"], csv_path)
+
+
+def _smallest_code_dtype(n_categories):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def build_cache(csv_path=CSV_PATH, cache_dir=None, chunksize=None):
+    """Stream the CSV into columnar files and return the cache metadata."""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    build_dir = f"{cache_dir}.building-{os.getpid()}"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+
+    fingerprint = fingerprint_csv(csv_path)
+    # Global dictionaries: category value -> code, in first-seen order
+    dictionaries = {column: {} for column in CATEGORY_COLUMNS}
+    files = {
+        column: open(os.path.join(build_dir, f"{column}.bin"), "wb")
+        for column in SALARY_COLUMNS
+    }
+    rows = 0
+    kwargs = {"chunksize": chunksize} if chunksize else {}
+    try:
+        for chunk in iter_salary_chunks(csv_path, **kwargs):
+            for column in SALARY_COLUMNS:
+                series = chunk[column]
+                if column in dictionaries:
+                    dictionary = dictionaries[column]
+                    # Remap this chunk's local codes to global codes
+                    mapping = np.array(
+                        [
+                            dictionary.setdefault(value, len(dictionary))
+                            for value in series.cat.categories
+                        ],
+                        dtype=np.int32,
+                    )
+                    values = mapping[series.cat.codes.to_numpy()]
+                else:
+                    values = series.to_numpy(dtype=np.float64)
+                files[column].write(np.ascontiguousarray(values).tobytes())
+            rows += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    columns = {}
+    for column in SALARY_COLUMNS:
+        if column in dictionaries:
+            dictionary = dictionaries[column]
+            categories = sorted(dictionary)
+            dtype = _smallest_code_dtype(len(categories))
+            # Re-number codes so categories come out sorted
+            remap = np.empty(len(categories), dtype=dtype)
+            remap[[dictionary[value] for value in categories]] = np.arange(len(categories))
+            path = os.path.join(build_dir, f"{column}.bin")
+            remap[np.fromfile(path, dtype=np.int32)].tofile(path)
+            columns[column] = {"kind": "category", "dtype": dtype.str, "categories": categories}
+        else:
+            columns[column] = {"kind": "numeric", "dtype": np.dtype(np.float64).str}
+
+    meta = {
+        "version": CACHE_VERSION,
+        "source_path": os.path.abspath(csv_path),
+        "fingerprint": fingerprint,
+        "rows": rows,
+        "columns": columns,
+        "built_at": time.time(),
+    }
+    with open(os.path.join(build_dir, META_FILE), "w") as f:
+        json.dump(meta, f)
+
+    # Swap the finished build into place
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(build_dir, cache_dir)
+    return meta
+
+
+def read_cache(cache_dir):
+    """Open the cached columns as a DataFrame backed by memory maps."""
+    meta = _read_meta(cache_dir)
+    rows = meta["rows"]
+    data = {}
+    for column, info in meta["columns"].items():
+        path = os.path.join(cache_dir, f"{column}.bin")
+        dtype = np.dtype(info["dtype"])
+        if rows == 0:
+            values = np.empty(0, dtype=dtype)
+        else:
+            # mode="c": copy-on-write, writes stay in this process
+            values = np.memmap(path, dtype=dtype, mode="c", shape=(rows,))
+        if info["kind"] == "category":
+            data[column] = pd.Categorical.from_codes(values, info["categories"], validate=False)
+        else:
+            data[column] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def frame_memory_mb(df):
+    """Deep memory footprint of a DataFrame in MB."""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def optimize_dataframe(df, max_category_ratio=0.5):
+    """Return a compact copy of df for handing to an agent.
+
+    - String columns whose distinct/total ratio is below max_category_ratio
+      become categoricals
+    - Integer columns are downcast to the smallest integer type
+    - Float columns are downcast to float32 only when that is lossless
+      (salary cents usually are not, so pay columns stay float64)
+    """
+    optimized = {}
+    for column in df.columns:
+        series = df[column]
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            if len(series) and series.nunique(dropna=False) / len(series) < max_category_ratio:
+                series = series.astype("category")
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            series = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series.dtype) and series.dtype != np.float32:
+            downcast = series.astype(np.float32)
+            if np.array_equal(downcast.to_numpy(np.float64), series.to_numpy(np.float64), equal_nan=True):
+                series = downcast
+        optimized[column] = series
+    return pd.DataFrame(optimized, index=df.index, copy=False)
+
+
+def memory_report(before, after):
+    """Print per-column deep memory usage before and after optimization."""
+    before_usage = before.memory_usage(deep=True, index=False)
+    after_usage = after.memory_usage(deep=True, index=False)
+    print(f"{'Column':<20} {'Before':>12} {'After':>12} {'Dtype':>12}")
+    print("-" * 60)
+    for column in before.columns:
+        print(
+            f"{column:<20} {before_usage[column] / 1024:>10.1f}KB "
+            f"{after_usage[column] / 1024:>10.1f}KB {str(after[column].dtype):>12}"
+        )
+    print("-" * 60)
+    print(
+        f"{'Total':<20} {frame_memory_mb(before):>10.2f}MB {frame_memory_mb(after):>10.2f}MB "
+        f"({frame_memory_mb(before) / frame_memory_mb(after):.1f}x smaller)"
+    )
+
+
+def load_salaries(csv_path=CSV_PATH, cache_dir=None):
+    """Return the salary DataFrame, (re)building the columnar cache if stale."""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    if not cache_is_fresh(csv_path, cache_dir):
+        build_cache(csv_path, cache_dir)
+    return read_cache(cache_dir)
+
+
+if __name__ == "__main__":
+    cache_dir = cache_dir_for(CSV_PATH)
+    fresh = cache_is_fresh(CSV_PATH, cache_dir)
+    start_time = time.perf_counter()
+    df = load_salaries()
+    elapsed = time.perf_counter() - start_time
+    print(f"Cache: {cache_dir} ({'warm' if fresh else 'rebuilt'})")
+    print(f"Loaded {len(df):,} rows x {len(df.columns)} columns in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,127 @@
+"""
+SQLite Connection Pool for Tool Execution
+
+Keeps one read-only connection per thread instead of opening a fresh
+SQLAlchemy connection (and building a pandas DataFrame) for every tool call.
+
+- Read-only URI connections with query_only set
+- WAL journal mode so readers never block the loader
+- Per-connection statement cache for the parameterized tool queries
+- Lightweight row path returning plain dicts
+"""
+
+import os
+import sqlite3
+import threading
+from urllib.request import pathname2url
+
+# Pragmas applied to every pooled reader connection
+READER_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",  # ~16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",  # 256 MB memory-mapped I/O
+)
+
+
+def enable_wal(database_file_path):
+    """Switch the database to WAL mode (persistent, so only needed once).
+
+    Opens read-write without create, so a missing database raises instead of
+    being created empty.
+    """
+    path = pathname2url(os.path.abspath(database_file_path))
+    connection = sqlite3.connect(f"file:{path}?mode=rw", uri=True)
+    try:
+        mode = connection.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    finally:
+        connection.close()
+    return mode
+
+
+class SQLitePool:
+    """Per-thread pool of SQLite connections with cached prepared statements."""
+
+    def __init__(self, database_file_path, read_only=True, cached_statements=256):
+        self.database_file_path = database_file_path
+        self.read_only = read_only
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._wal_checked = False
+
+    def _uri(self):
+        path = pathname2url(os.path.abspath(self.database_file_path))
+        mode = "ro" if self.read_only else "rwc"
+        return f"file:{path}?mode={mode}"
+
+    def _connect(self):
+        with self._lock:
+            if not self._wal_checked:
+                # WAL has to be set from a writable connection; best effort
+                # because the database may live on a read-only filesystem.
+                try:
+                    enable_wal(self.database_file_path)
+                except sqlite3.Error as e:
+                    print(e)
+                self._wal_checked = True
+
+        connection = sqlite3.connect(
+            self._uri(),
+            uri=True,
+            cached_statements=self.cached_statements,
+            # each connection stays on its thread; this only lets close_all()
+            # close them from whichever thread shuts the pool down
+            check_same_thread=False,
+        )
+        for pragma in READER_PRAGMAS if self.read_only else READER_PRAGMAS[1:]:
+            connection.execute(pragma)
+
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def connection(self):
+        """Return the calling thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    def fetch_all(self, query, params=()):
+        """Run a parameterized query and return every row as a dict."""
+        cursor = self.connection().execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def fetch_one(self, query, params=()):
+        """Run a parameterized query and return the first row as a dict (or None)."""
+        cursor = self.connection().execute(query, params)
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def iterate(self, query, params=(), batch_size=64):
+        """Stream rows as dicts without materializing the whole result."""
+        cursor = self.connection().execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(zip(columns, row))
+        finally:
+            cursor.close()
+
+    def close_all(self):
+        """Close every connection handed out by this pool."""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
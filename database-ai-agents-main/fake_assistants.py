@@ -0,0 +1,333 @@
+"""
+Fakes of the Assistants API
+
+An in-process fake of the runs API and a local HTTP fake of the
+assistant/thread endpoints, so RunDriver and AssistantManager can be
+exercised without OpenAI.
+
+FakeRuns stands in for `client.beta.threads.runs`:
+- Each run follows a script of steps; every step requires action with one
+  or more tool calls, then the run completes
+- FakeStreamingRuns adds runs.stream / runs.submit_tool_outputs_stream,
+  which yield run events like the SDK's stream managers; plain FakeRuns
+  lacks them, so RunDriver falls back to polling
+- runs.create / runs.retrieve / runs.submit_tool_outputs serve the polling
+  path; a run stays queued or in progress for a few retrieves per step
+- Every retrieve time and every submission is recorded, so the polling
+  backoff and the one-submission-per-step batching can be checked
+
+FakeAssistantsServer serves /v1/assistants and /v1/threads (create,
+retrieve, delete) on localhost, so a real OpenAI client pointed at its
+base_url drives AssistantManager end to end and each created or deleted
+object can be counted.
+
+Run `python fake_assistants.py` to drive both against RunDriver and
+AssistantManager and check the recorded calls.
+"""
+
+import itertools
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from assistant_manager import AssistantManager, print_manager_report
+from assistant_runner import RunDriver, print_run_metrics
+
+DEFAULT_SCRIPT = [
+    [("get_total_longevity_pay_for_grade", {"grade": "M3"}),
+     ("get_employee_count_by_gender_in_department", {"department_name": "Department of Police"})],
+    [("get_total_overtime_pay_for_department", {"department_name": "Alcohol Beverage Services"})],
+]
+
+
+class FakeStream:
+    """Context manager over a list of events, like the SDK's AssistantStreamManager."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def __enter__(self):
+        return iter(self.events)
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class FakeRuns:
+    """The polling `client.beta.threads.runs` methods (create/retrieve/submit)."""
+
+    def __init__(self, script=DEFAULT_SCRIPT, retrieves_per_step=3):
+        self.script = script
+        self.retrieves_per_step = retrieves_per_step
+        self.runs = {}
+        self.retrieve_times = []
+        self.submissions = []
+        self._ids = itertools.count(1)
+
+    # -- run state machine --------------------------------------------------
+
+    def _new_run(self, thread_id, assistant_id):
+        run_id = f"run_{next(self._ids)}"
+        self.runs[run_id] = {"thread_id": thread_id, "assistant_id": assistant_id,
+                             "step": 0, "status": "queued", "pending": None, "retrieves": 0}
+        return run_id
+
+    def _advance(self, run_id):
+        """Move an active run to its next step's required action, or complete it."""
+        state = self.runs[run_id]
+        if state["step"] < len(self.script):
+            tool_calls = [
+                SimpleNamespace(
+                    id=f"call_{next(self._ids)}",
+                    type="function",
+                    function=SimpleNamespace(name=name, arguments=json.dumps(arguments)),
+                )
+                for name, arguments in self.script[state["step"]]
+            ]
+            state["status"] = "requires_action"
+            state["pending"] = {tool_call.id for tool_call in tool_calls}
+            state["tool_calls"] = tool_calls
+        else:
+            state["status"] = "completed"
+            state["pending"] = None
+
+    def _run_object(self, run_id):
+        state = self.runs[run_id]
+        required_action = None
+        if state["status"] == "requires_action":
+            required_action = SimpleNamespace(
+                type="submit_tool_outputs",
+                submit_tool_outputs=SimpleNamespace(tool_calls=state["tool_calls"]),
+            )
+        return SimpleNamespace(id=run_id, thread_id=state["thread_id"],
+                               status=state["status"], required_action=required_action)
+
+    def _submit(self, run_id, tool_outputs):
+        state = self.runs[run_id]
+        if state["status"] != "requires_action":
+            raise ValueError(f"Run {run_id} is {state['status']}, not requires_action")
+        submitted = {output["tool_call_id"] for output in tool_outputs}
+        if submitted != state["pending"]:
+            raise ValueError(f"Run {run_id} expects outputs for {sorted(state['pending'])}, "
+                             f"got {sorted(submitted)}")
+        self.submissions.append({"run_id": run_id, "step": state["step"], "tool_outputs": tool_outputs})
+        state["step"] += 1
+        state["status"] = "in_progress"
+        state["retrieves"] = 0
+
+    def _events_until_pause(self, run_id):
+        """Events from an active run up to its next required action or completion."""
+        events = [SimpleNamespace(event="thread.run.in_progress", data=self._run_object(run_id))]
+        self._advance(run_id)
+        status = self.runs[run_id]["status"]
+        events.append(SimpleNamespace(event=f"thread.run.{status}", data=self._run_object(run_id)))
+        return events
+
+    # -- polling ------------------------------------------------------------
+
+    def create(self, thread_id, assistant_id, **kwargs):
+        return self._run_object(self._new_run(thread_id, assistant_id))
+
+    def retrieve(self, run_id, thread_id, **kwargs):
+        self.retrieve_times.append(time.perf_counter())
+        state = self.runs[run_id]
+        state["retrieves"] += 1
+        if state["status"] == "queued":
+            state["status"] = "in_progress"
+        elif state["status"] == "in_progress" and state["retrieves"] >= self.retrieves_per_step:
+            self._advance(run_id)
+        return self._run_object(run_id)
+
+    def submit_tool_outputs(self, thread_id, run_id, tool_outputs, **kwargs):
+        self._submit(run_id, tool_outputs)
+        return self._run_object(run_id)
+
+
+class FakeStreamingRuns(FakeRuns):
+    """FakeRuns plus the streaming methods, which RunDriver prefers."""
+
+    def stream(self, thread_id, assistant_id, **kwargs):
+        run_id = self._new_run(thread_id, assistant_id)
+        created = SimpleNamespace(event="thread.run.created", data=self._run_object(run_id))
+        return FakeStream([created, *self._events_until_pause(run_id)])
+
+    def submit_tool_outputs_stream(self, thread_id, run_id, tool_outputs, **kwargs):
+        self._submit(run_id, tool_outputs)
+        return FakeStream(self._events_until_pause(run_id))
+
+
+def fake_client(runs):
+    """An object shaped like OpenAI() for `client.beta.threads.runs`."""
+    return SimpleNamespace(beta=SimpleNamespace(threads=SimpleNamespace(runs=runs)))
+
+
+class _FakeAPIHandler(BaseHTTPRequestHandler):
+    PATH_PATTERN = re.compile(r"^/v1/(?P<kind>assistants|threads)(?:/(?P<object_id>[\w-]+))?$")
+
+    def log_message(self, *args):
+        pass  # keep the demo output readable
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self):
+        match = self.PATH_PATTERN.match(self.path.split("?")[0])
+        if match is None:
+            self._reply(404, {"error": {"message": f"No route {self.path}", "type": "invalid_request_error"}})
+            return None, None
+        return match.group("kind"), match.group("object_id")
+
+    def _not_found(self, object_id):
+        self._reply(404, {"error": {"message": f"No such object: {object_id}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        kind, object_id = self._route()
+        if kind is None:
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if object_id is not None:
+            self._reply(405, {"error": {"message": "Updates are not supported", "type": "invalid_request_error"}})
+            return
+        self._reply(200, self.server.create(kind, body))
+
+    def do_GET(self):
+        kind, object_id = self._route()
+        if kind is None:
+            return
+        found = self.server.objects[kind].get(object_id)
+        if found is None:
+            self._not_found(object_id)
+        else:
+            self._reply(200, found)
+
+    def do_DELETE(self):
+        kind, object_id = self._route()
+        if kind is None:
+            return
+        with self.server.lock:
+            found = self.server.objects[kind].pop(object_id, None)
+            if found is not None:
+                self.server.counts[f"{kind}_deleted"] += 1
+        if found is None:
+            self._not_found(object_id)
+        else:
+            self._reply(200, {"id": object_id, "object": f"{found['object']}.deleted", "deleted": True})
+
+
+class FakeAssistantsServer(ThreadingHTTPServer):
+    """Local HTTP fake of the assistant/thread endpoints; use as a context manager."""
+
+    daemon_threads = True
+    PREFIXES = {"assistants": ("asst", "assistant"), "threads": ("thread", "thread")}
+
+    def __init__(self, port=0):
+        super().__init__(("127.0.0.1", port), _FakeAPIHandler)
+        self.lock = threading.Lock()
+        self.objects = {"assistants": {}, "threads": {}}
+        self.counts = {f"{kind}_{action}": 0 for kind in self.objects for action in ("created", "deleted")}
+        self._ids = itertools.count(1)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def create(self, kind, body):
+        prefix, object_type = self.PREFIXES[kind]
+        with self.lock:
+            created = {"id": f"{prefix}_{next(self._ids)}", "object": object_type,
+                       "created_at": int(time.time()), "metadata": {}, **body}
+            self.objects[kind][created["id"]] = created
+            self.counts[f"{kind}_created"] += 1
+        return created
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+        return False
+
+
+def _echo_tool(tool_call):
+    time.sleep(0.05)
+    return json.dumps({"tool": tool_call.function.name, "arguments": json.loads(tool_call.function.arguments)})
+
+
+def _check_batches(runs):
+    for step, (submission, expected) in enumerate(zip(runs.submissions, runs.script)):
+        assert submission["step"] == step, submission
+        assert len(submission["tool_outputs"]) == len(expected), "outputs of a step split over submissions"
+    assert len(runs.submissions) == len(runs.script), "expected one submission per step"
+
+
+if __name__ == "__main__":
+    with RunDriver(fake_client(FakeStreamingRuns()), _echo_tool) as driver:
+        runs = driver.runs
+        run, metrics = driver.run(thread_id="thread_1", assistant_id="asst_1")
+        print("Streaming")
+        print_run_metrics(metrics)
+        assert run.status == "completed" and metrics["mode"] == "stream"
+        _check_batches(runs)
+        # Tool calls of a step run in parallel: the three 50 ms calls take ~100 ms, not 150
+        assert metrics["tool_seconds"] < 0.05 * 3
+
+    with RunDriver(fake_client(FakeRuns()), _echo_tool,
+                   initial_poll_interval=0.01, max_poll_interval=0.05) as driver:
+        runs = driver.runs
+        run, metrics = driver.run(thread_id="thread_1", assistant_id="asst_1")
+        print("\nPolling")
+        print_run_metrics(metrics)
+        assert run.status == "completed" and metrics["mode"] == "poll"
+        _check_batches(runs)
+        gaps = [later - earlier for earlier, later in zip(runs.retrieve_times, runs.retrieve_times[1:])]
+        print(f"Poll gaps: {', '.join(f'{gap * 1000:.0f}ms' for gap in gaps)}")
+        # Backoff grows the interval while the run is idle, capped at max_poll_interval
+        assert gaps[1] > gaps[0] * 1.3 and max(gaps) < 0.05 * 1.5 + 0.1
+
+    print("\nOK: streaming, polling backoff and batched submissions behave as expected")
+
+    from openai import OpenAI
+
+    tools = [{"type": "function", "function": {"name": "noop", "parameters": {"type": "object", "properties": {}}}}]
+    with FakeAssistantsServer() as server, tempfile.TemporaryDirectory() as state_dir:
+        client = OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+        manager = AssistantManager(client, state_path=os.path.join(state_dir, "assistants.json"), thread_ttl=0.2)
+
+        first = manager.get_assistant(name="Salary Assistant", model="gpt-4o-mini", tools=tools, instructions="v1")
+        assert manager.get_assistant(name="Salary Assistant", model="gpt-4o-mini", tools=tools,
+                                     instructions="v1", verify=True) == first
+        # New instructions (or name, description, tools, model) make a new assistant
+        second = manager.get_assistant(name="Salary Assistant", model="gpt-4o-mini", tools=tools, instructions="v2")
+        assert second != first and first in manager.state["superseded"]
+        # Another model under the same name is a separate assistant, not a replacement
+        other = manager.get_assistant(name="Salary Assistant", model="gpt-4.1-mini", tools=tools, instructions="v2")
+        assert other != second and second not in manager.state["superseded"]
+        assert manager.get_assistant(name="Salary Assistant", model="gpt-4o-mini", tools=tools,
+                                     instructions="v2") == second
+
+        thread = manager.get_thread("session")
+        assert manager.get_thread("session") == thread
+        time.sleep(0.25)
+        # Expiry counts from creation: the use above doesn't keep the thread alive
+        assert manager.get_thread("session") != thread
+
+        deleted = manager.cleanup()
+        print()
+        print_manager_report(manager.report())
+        print(f"Server: {server.counts}")
+        assert deleted == 2 and first not in server.objects["assistants"] and thread not in server.objects["threads"]
+
+    print("\nOK: assistants keyed by their configuration, threads expire by age")
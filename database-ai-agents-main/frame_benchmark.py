@@ -0,0 +1,76 @@
+"""
+DataFrame Representation Benchmark: object strings vs compact categoricals
+
+Compares the frame the pandas agent used to receive
+(`pd.read_csv(...).fillna(value=0)`, object-dtype strings) with the
+optimized frame (dataset.optimize_dataframe):
+- Memory: memory_usage(deep=True) per column
+- Speed: the groupby-heavy code agents write (see verify_ground_truth.py)
+"""
+
+import time
+
+import pandas as pd
+
+from dataset import frame_memory_mb, memory_report, optimize_dataframe
+
+REPEATS = 50
+
+# Typical agent-generated aggregations
+AGENT_OPERATIONS = {
+    "avg salary by grade": lambda df: df.groupby("Grade", observed=True)["Base_Salary"]
+    .mean()
+    .sort_values(ascending=False),
+    "avg salary by grade+gender": lambda df: df.groupby(["Grade", "Gender"], observed=True)[
+        "Base_Salary"
+    ]
+    .mean()
+    .unstack(),
+    "avg salary by gender": lambda df: df.groupby("Gender", observed=True)["Base_Salary"].mean(),
+    "employees per department": lambda df: df["Department"].value_counts(),
+    "overtime by division": lambda df: df.groupby("Division", observed=True)["Overtime_Pay"].sum(),
+    "filter one grade": lambda df: df[df["Grade"] == "M3"]["Base_Salary"].mean(),
+}
+
+
+def time_operation(operation, df, repeats=REPEATS):
+    """Best-of-N wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        operation(df)
+        best = min(best, time.perf_counter() - start_time)
+    return best * 1000
+
+
+def main():
+    print("=" * 80)
+    print("DATAFRAME REPRESENTATION BENCHMARK")
+    print("=" * 80)
+
+    raw = pd.read_csv("./data/salaries_2023.csv").fillna(value=0)
+    compact = optimize_dataframe(raw)
+
+    print("\n📦 MEMORY (deep):\n")
+    memory_report(raw, compact)
+
+    print(f"\n⚡ AGENT OPERATIONS (best of {REPEATS}):\n")
+    print(f"{'Operation':<30} {'Object (ms)':>12} {'Compact (ms)':>14} {'Speedup':>10}")
+    print("-" * 80)
+    total_raw = total_compact = 0.0
+    for label, operation in AGENT_OPERATIONS.items():
+        raw_ms = time_operation(operation, raw)
+        compact_ms = time_operation(operation, compact)
+        total_raw += raw_ms
+        total_compact += compact_ms
+        print(f"{label:<30} {raw_ms:>12.3f} {compact_ms:>14.3f} {raw_ms / compact_ms:>9.1f}x")
+    print("-" * 80)
+    print(f"{'Total':<30} {total_raw:>12.3f} {total_compact:>14.3f} {total_raw / total_compact:>9.1f}x")
+
+    datasets_per_gb = 1024 / frame_memory_mb(compact)
+    print(f"\n💡 ~{datasets_per_gb:,.0f} compact copies of this dataset fit in 1 GB "
+          f"(vs ~{1024 / frame_memory_mb(raw):,.0f} object-dtype copies)")
+
+
+if __name__ == "__main__":
+    main()
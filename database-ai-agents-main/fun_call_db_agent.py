@@ -1,22 +1,14 @@
-import json
+import asyncio
 import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
-import pandas as pd
 
-from sqlalchemy import create_engine
-import numpy as np
-from sqlalchemy import text
-from openai import OpenAI
+from loader import load_salary_csv
+from openai import AsyncOpenAI, OpenAI
 
 import helpers
-from helpers import (
-    get_avg_salary_and_female_count_for_division,
-    get_total_overtime_pay_for_department,
-    get_total_longevity_pay_for_grade,
-    get_employee_count_by_gender_in_department,
-    get_employees_with_overtime_above,
-)
+from tool_runner import MAX_STEPS, print_latency_report, run_tool_loop
+from tracing import AgentTracer, instrument_registry, write_chrome_trace
 
 
 # Load environment variables from .env file
@@ -41,19 +33,22 @@ from langchain_community.utilities import SQLDatabase
 database_file_path = "./db/salary.db"
 
 
-# Create an engine to connect to the SQLite database
-# SQLite only requires the path to the database file
-engine = create_engine(f"sqlite:///{database_file_path}")
 file_url = "./data/salaries_2023.csv"
-os.makedirs(os.path.dirname(database_file_path), exist_ok=True)
-df = pd.read_csv(file_url).fillna(value=0)
-df.to_sql("salaries_2023", con=engine, if_exists="replace", index=False)
+# skips the ingest entirely when the CSV hasn't changed since the last load
+load_salary_csv(file_url, database_file_path)
 
+# helper spans go to whichever tracer is active (see tracing.py)
+instrument_registry(helpers.registry)
 
-def run_conversation(
+TRACE_PATH = "./data/traces/fun_call_db_agent.trace.json"
+
+
+async def run_conversation_async(
     query="""What is the average salary and the count of female employees
     #                   in the ABS 85 Administrative Services division?""",
+    max_steps=MAX_STEPS,
 ):
+    """Run the tool loop; returns (final_response, per-turn latency breakdown)."""
 
     messages = [
         # {
@@ -71,67 +66,42 @@ def run_conversation(
         # },
     ]
 
-    # Call the model with the conversation and available functions
-    response = client.chat.completions.create(
-        model=llm_name,
-        messages=messages,
-        tools=helpers.tools_sql,
-        tool_choice="auto",  # auto is default, but we'll be explicit
-    )
-    response_message = response.choices[0].message
-    # print(response_message.model_dump_json(indent=2))
-    # print("tool calls: ", response_message.tool_calls)
-
-    tool_calls = response_message.tool_calls
-    if tool_calls:
-        # Step 3: call the function
-        available_functions = {
-            "get_avg_salary_and_female_count_for_division": get_avg_salary_and_female_count_for_division,
-            "get_total_overtime_pay_for_department": get_total_overtime_pay_for_department,
-            "get_total_longevity_pay_for_grade": get_total_longevity_pay_for_grade,
-            "get_employee_count_by_gender_in_department": get_employee_count_by_gender_in_department,
-            "get_employees_with_overtime_above": get_employees_with_overtime_above,
-        }
-        messages.append(response_message)  # extend conversation with assistant's reply
-
-        # Step 4: send the info for each function call and function response to the model
-        for tool_call in tool_calls:
-            function_name = tool_call.function.name
-            function_to_call = available_functions[function_name]
-            function_args = json.loads(tool_call.function.arguments)
-            if function_name == "get_employees_with_overtime_above":
-                function_response = function_to_call(amount=function_args.get("amount"))
-            elif function_name == "get_total_longevity_pay_for_grade":
-                function_response = function_to_call(grade=function_args.get("grade"))
-            else:
-                function_response = function_to_call(**function_args)
-            messages.append(
-                {
-                    "tool_call_id": tool_call.id,
-                    "role": "tool",
-                    "name": function_name,
-                    "content": str(function_response),
-                }
-            )  # extend conversation with function responses
-            second_response = client.chat.completions.create(
-                model=llm_name,
-                messages=messages,
-            )  # get a new response from the model where it can see the function response
-
-        return second_response
+    # Tool calls of each turn run concurrently; one follow-up completion per turn
+    async with AsyncOpenAI(api_key=openai_key) as async_client:
+        return await run_tool_loop(
+            async_client,
+            llm_name,
+            messages,
+            helpers.tools_sql,
+            helpers.registry.execute,
+            max_steps=max_steps,
+        )
+
+
+def run_conversation(
+    query="""What is the average salary and the count of female employees
+    #                   in the ABS 85 Administrative Services division?""",
+    max_steps=MAX_STEPS,
+):
+    response, _ = asyncio.run(run_conversation_async(query, max_steps))
+    return response
 
 
 # Example calls to the functions
 if __name__ == "__main__":
-    res = (
-        run_conversation(
-            query="""What is the total longevity pay for employees with the grade 'M3'?"""
+    tracer = AgentTracer("fun_call_db_agent")
+    with tracer.activate():
+        response, turns = asyncio.run(
+            run_conversation_async(
+                query="""What is the total longevity pay for employees with the grade 'M3'?"""
+            )
         )
-        .choices[0]
-        .message.content
-    )
+    res = response.choices[0].message.content
 
     print(res)
+    print_latency_report(turns)
+    print(f"Helper time: {tracer.summary()['helper_seconds']:.3f}s (trace: {TRACE_PATH})")
+    write_chrome_trace([tracer], TRACE_PATH)
     # run_conversation()
     # Step 1: First direct call to the functions =
     # division_name = "ABS 85 Administrative Services"
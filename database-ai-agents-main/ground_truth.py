@@ -0,0 +1,169 @@
+"""
+Benchmark Ground Truth
+
+Computes the expected answer for every benchmark question straight from the
+dataset, so the benchmark scripts don't hardcode numbers that go stale when
+the data changes:
+- One grouped aggregation per dimension (department, gender, grade x
+  gender); overall figures and the per-grade roll-up are derived from
+  those shared results instead of re-scanning the frame
+- Answers are cached in ./data/.cache/<csv name>.ground_truth.json with the
+  CSV fingerprint and recomputed only when the CSV changes
+- BENCHMARK_QUERIES maps each question to an answer key; benchmark_queries()
+  fills in the expected values
+
+Run `python ground_truth.py` to print every answer.
+"""
+
+import json
+import os
+import time
+
+from dataset import CACHE_ROOT, fingerprint_matches, load_salaries
+from ingest import CSV_PATH
+from loader import fingerprint_csv
+
+GROUND_TRUTH_VERSION = 1
+
+# Benchmark questions: the answer key names an entry of compute_ground_truth()
+BENCHMARK_QUERIES = [
+    {"query": "How many rows are in the dataframe?", "answer": "row_count", "category": "Simple"},
+    {
+        "query": "What is the average base salary?",
+        "answer": "avg_base_salary",
+        "category": "Simple",
+        "tolerance": 1.0,  # Allow $1 difference
+    },
+    {
+        "query": "How many unique departments are there?",
+        "answer": "unique_departments",
+        "category": "Simple",
+    },
+    {"query": "What is the highest base salary?", "answer": "max_base_salary", "category": "Simple"},
+    {
+        "query": "How many male vs female employees are there?",
+        "answer": "gender_counts",
+        "category": "Intermediate",
+    },
+    {
+        "query": "What is the average base salary by gender?",
+        "answer": "avg_base_salary_by_gender",
+        "category": "Intermediate",
+        "tolerance": 1.0,
+    },
+    {
+        "query": "Which department has the most employees?",
+        "answer": "department_most_employees",
+        "category": "Intermediate",
+    },
+    {
+        "query": "What grade has the highest average base salary?",
+        "answer": "grade_highest_avg_base_salary",
+        "category": "Complex",
+    },
+]
+
+
+def _python(value):
+    """NumPy scalars -> plain Python, for JSON and comparisons."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def compute_ground_truth(df):
+    """Every benchmark answer from the salary DataFrame, as JSON-safe values."""
+    salary = "Base_Salary"
+
+    # The shared intermediate results: one grouped aggregation per dimension
+    by_grade_gender = df.groupby(["Grade", "Gender"], observed=True)[salary].agg(["size", "sum", "max"])
+    by_department = df.groupby("Department", observed=True)[salary].agg(["size"])
+
+    by_gender = by_grade_gender.groupby(level="Gender", observed=True).agg(
+        {"size": "sum", "sum": "sum", "max": "max"}
+    )
+    by_grade = by_grade_gender.groupby(level="Grade", observed=True).agg(
+        {"size": "sum", "sum": "sum", "max": "max"}
+    )
+    grade_means = (by_grade["sum"] / by_grade["size"]).sort_values(ascending=False)
+    gender_means = by_gender["sum"] / by_gender["size"]
+
+    # Grades where every gender is represented
+    genders_per_grade = by_grade_gender["size"].groupby(level="Grade", observed=True).size()
+    mixed_grades = genders_per_grade[genders_per_grade == len(by_gender)].index
+    mixed_means = grade_means[grade_means.index.isin(mixed_grades)]
+    top_mixed_grade = mixed_means.index[0]
+    top_mixed = by_grade_gender.loc[top_mixed_grade]
+
+    row_count = int(by_gender["size"].sum())
+    male_avg, female_avg = gender_means.get("M"), gender_means.get("F")
+
+    return {
+        "row_count": row_count,
+        "avg_base_salary": _python(by_gender["sum"].sum() / row_count),
+        "max_base_salary": _python(by_gender["max"].max()),
+        "unique_departments": int(len(by_department)),
+        "department_most_employees": str(by_department["size"].idxmax()),
+        "gender_counts": {str(gender): int(count) for gender, count in by_gender["size"].items()},
+        "avg_base_salary_by_gender": {
+            str(gender): _python(mean) for gender, mean in gender_means.items()
+        },
+        "gender_pay_gap": _python(abs(male_avg - female_avg)),
+        "gender_pay_gap_higher": "M" if male_avg > female_avg else "F",
+        "grade_highest_avg_base_salary": str(grade_means.index[0]),
+        "grade_highest_avg_base_salary_value": _python(grade_means.iloc[0]),
+        "grade_highest_avg_base_salary_gender_counts": {
+            str(gender): int(count)
+            for gender, count in by_grade_gender.loc[grade_means.index[0], "size"].items()
+        },
+        "grade_both_genders_highest_avg": str(top_mixed_grade),
+        "grade_both_genders_highest_avg_value": _python(mixed_means.iloc[0]),
+        "grade_both_genders_avg_by_gender": {
+            str(gender): _python(row["sum"] / row["size"]) for gender, row in top_mixed.iterrows()
+        },
+    }
+
+
+def _cache_path(csv_path, cache_root=CACHE_ROOT):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_root, f"{name}.ground_truth.json")
+
+
+def load_ground_truth(csv_path=CSV_PATH, cache_root=CACHE_ROOT):
+    """Ground truth for the CSV, from the cache when the CSV hasn't changed."""
+    path = _cache_path(csv_path, cache_root)
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        if cached.get("version") == GROUND_TRUTH_VERSION and fingerprint_matches(
+            cached["fingerprint"], csv_path
+        ):
+            return cached["answers"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    fingerprint = fingerprint_csv(csv_path)
+    answers = compute_ground_truth(load_salaries(csv_path))
+    os.makedirs(cache_root, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(
+            {"version": GROUND_TRUTH_VERSION, "fingerprint": fingerprint, "answers": answers},
+            f,
+            indent=2,
+        )
+    os.replace(temp_path, path)
+    return answers
+
+
+def benchmark_queries(answers=None, queries=BENCHMARK_QUERIES):
+    """BENCHMARK_QUERIES with "expected" filled in from the ground truth."""
+    answers = answers if answers is not None else load_ground_truth()
+    return [{**query, "expected": answers[query["answer"]]} for query in queries]
+
+
+if __name__ == "__main__":
+    start_time = time.perf_counter()
+    answers = load_ground_truth()
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    print(f"Ground truth for {CSV_PATH} ({elapsed_ms:.1f} ms)")
+    for key, value in answers.items():
+        print(f"  {key:<45} {value}")
@@ -1,126 +1,136 @@
-from sqlalchemy import create_engine, text
-import pandas as pd
+import base64
+import sqlite3
+
 import numpy as np
 import json
 
-# Create an engine to connect to the SQLite database
+from db_pool import SQLitePool
+from tool_registry import ToolRegistry
+
+# Pooled, read-only connections to the SQLite database (one per thread)
 database_file_path = "./db/salary.db"
-engine = create_engine(f"sqlite:///{database_file_path}")
-
-
-tools_sql = [
-    {
-        "type": "function",
-        "function": {
-            "name": "get_avg_salary_and_female_count_for_division",
-            "description": """Retrieves the average salary and the count of 
-                              female employees in a specific division.""",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "division_name": {
-                        "type": "string",
-                        "description": """The name of the division 
-                                          (e.g., 'ABS 85 Administrative Services').""",
-                    }
-                },
-                "required": ["division_name"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_total_overtime_pay_for_department",
-            "description": """Retrieves the total overtime pay for a 
-                              specific department.""",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "department_name": {
-                        "type": "string",
-                        "description": """The name of the department
-                                          (e.g., 'Alcohol Beverage Services').""",
-                    }
-                },
-                "required": ["department_name"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_total_longevity_pay_for_grade",
-            "description": """Retrieves the total longevity pay for a 
-                              specific grade.""",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "grade": {
-                        "type": "string",
-                        "description": """The grade of the employees
-                                          (e.g., 'M3', 'N25').""",
-                    }
-                },
-                "required": ["grade"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_employee_count_by_gender_in_department",
-            "description": """Retrieves the count of employees by gender 
-                              in a specific department.""",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "department_name": {
-                        "type": "string",
-                        "description": """The name of the department
-                                          (e.g., 'Alcohol Beverage Services').""",
-                    }
-                },
-                "required": ["department_name"],
-            },
-        },
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_employees_with_overtime_above",
-            "description": """Retrieves the employees with overtime pay 
-                              above a specified amount.""",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "amount": {
-                        "type": "number",
-                        "description": """The minimum amount of overtime pay
-                                          (e.g., 1000.0).""",
-                    }
-                },
-                "required": ["amount"],
-            },
-        },
-    },
-]
-
-
-def get_avg_salary_and_female_count_for_division(division_name):
+pool = SQLitePool(database_file_path)
+
+# Every tool below registers itself here; tools_sql is generated from it
+registry = ToolRegistry()
+
+# Parameterized queries; sqlite3 keeps the compiled statements cached per connection
+AVG_SALARY_AND_FEMALE_COUNT_SQL = """
+SELECT AVG(Base_Salary) AS avg_salary, COUNT(*) AS female_count
+FROM salaries_2023
+WHERE Division = ? AND Gender = 'F';
+"""
+
+TOTAL_OVERTIME_PAY_SQL = """
+SELECT SUM(Overtime_Pay) AS total_overtime_pay
+FROM salaries_2023
+WHERE Department_Name = ?;
+"""
+
+# Result-size guard for get_employees_with_overtime_above: every call returns
+# count + aggregates, then at most one page of rows (highest overtime first)
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+MAX_PAGE_BYTES = 8_000  # serialized rows per page, keeps the prompt bounded
+
+OVERTIME_ABOVE_SUMMARY_SQL = """
+SELECT COUNT(*) AS total_count,
+       SUM(Overtime_Pay) AS total_overtime_pay,
+       AVG(Overtime_Pay) AS avg_overtime_pay,
+       MAX(Overtime_Pay) AS max_overtime_pay
+FROM salaries_2023
+WHERE Overtime_Pay > ?;
+"""
+
+# Keyset pagination walking the Overtime_Pay index backwards (ties by rowid)
+OVERTIME_ABOVE_FIRST_PAGE_SQL = """
+SELECT rowid AS _rowid, *
+FROM salaries_2023
+WHERE Overtime_Pay > ?
+ORDER BY Overtime_Pay DESC, rowid DESC;
+"""
+
+OVERTIME_ABOVE_NEXT_PAGE_SQL = """
+SELECT rowid AS _rowid, *
+FROM salaries_2023
+WHERE Overtime_Pay > ?
+  AND (Overtime_Pay < ? OR (Overtime_Pay = ? AND rowid < ?))
+ORDER BY Overtime_Pay DESC, rowid DESC;
+"""
+
+EMPLOYEE_COUNT_BY_GENDER_SQL = """
+SELECT Gender, COUNT(*) AS employee_count
+FROM salaries_2023
+WHERE Department_Name = ?
+GROUP BY Gender;
+"""
+
+TOTAL_LONGEVITY_PAY_SQL = """
+SELECT SUM(Longevity_Pay) AS total_longevity_pay
+FROM salaries_2023
+WHERE Grade = ?;
+"""
+
+# The same aggregates answered from the precomputed cube (see cube.py)
+CUBE_AVG_SALARY_AND_FEMALE_COUNT_SQL = """
+SELECT SUM(Base_Salary_sum) / SUM(row_count) AS avg_salary,
+       COALESCE(SUM(row_count), 0) AS female_count
+FROM salaries_2023_cube
+WHERE Division = ? AND Gender = 'F';
+"""
+
+CUBE_TOTAL_OVERTIME_PAY_SQL = """
+SELECT SUM(Overtime_Pay_sum) AS total_overtime_pay
+FROM salaries_2023_cube
+WHERE Department_Name = ?;
+"""
+
+CUBE_EMPLOYEE_COUNT_BY_GENDER_SQL = """
+SELECT Gender, SUM(row_count) AS employee_count
+FROM salaries_2023_cube
+WHERE Department_Name = ?
+GROUP BY Gender;
+"""
+
+CUBE_TOTAL_LONGEVITY_PAY_SQL = """
+SELECT SUM(Longevity_Pay_sum) AS total_longevity_pay
+FROM salaries_2023_cube
+WHERE Grade = ?;
+"""
+
+
+def _cube_fetch_one(cube_query, table_query, params):
+    """Answer from the aggregate cube, falling back to the base table."""
+    try:
+        return pool.fetch_one(cube_query, params)
+    except sqlite3.OperationalError:  # no cube table (database built elsewhere)
+        return pool.fetch_one(table_query, params)
+
+
+def _cube_fetch_all(cube_query, table_query, params):
+    """Answer from the aggregate cube, falling back to the base table."""
+    try:
+        return pool.fetch_all(cube_query, params)
+    except sqlite3.OperationalError:
+        return pool.fetch_all(table_query, params)
+
+
+@registry.tool(
+    """Retrieves the average salary and the count of
+    female employees in a specific division.""",
+    division_name="""The name of the division
+    (e.g., 'ABS 85 Administrative Services').""",
+)
+def get_avg_salary_and_female_count_for_division(division_name: str):
     try:
-        query = f"""
-        SELECT AVG(Base_Salary) AS avg_salary, COUNT(*) AS female_count
-        FROM salaries_2023
-        WHERE Division = '{division_name}' AND Gender = 'F';
-        """
-        query = text(query)
-
-        with engine.connect() as connection:
-            result = pd.read_sql_query(query, connection)
-        if not result.empty:
-
-            return result.to_dict("records")[0]
+        result = _cube_fetch_one(
+            CUBE_AVG_SALARY_AND_FEMALE_COUNT_SQL,
+            AVG_SALARY_AND_FEMALE_COUNT_SQL,
+            (division_name,),
+        )
+        if result is not None:
+
+            return result
         else:
             return json.dumps({"avg_salary": np.nan, "female_count": 0})
             # return {"avg_salary": np.nan, "female_count": 0}
@@ -130,20 +140,20 @@ def get_avg_salary_and_female_count_for_division(division_name):
         # return {"avg_salary": np.nan, "female_count": 0}
 
 
-def get_total_overtime_pay_for_department(department_name):
+@registry.tool(
+    """Retrieves the total overtime pay for a
+    specific department.""",
+    department_name="""The name of the department
+    (e.g., 'Alcohol Beverage Services').""",
+)
+def get_total_overtime_pay_for_department(department_name: str):
     try:
-        query = f"""
-        SELECT SUM(Overtime_Pay) AS total_overtime_pay
-        FROM salaries_2023
-        WHERE Department_Name = '{department_name}';
-        """
-        query = text(query)
-
-        with engine.connect() as connection:
-            result = pd.read_sql_query(query, connection)
-        if not result.empty:
-
-            return result.to_dict("records")[0]
+        result = _cube_fetch_one(
+            CUBE_TOTAL_OVERTIME_PAY_SQL, TOTAL_OVERTIME_PAY_SQL, (department_name,)
+        )
+        if result is not None:
+
+            return result
         else:
             return {"total_overtime_pay": 0}
     except Exception as e:
@@ -151,62 +161,112 @@ def get_total_overtime_pay_for_department(department_name):
         return {"total_overtime_pay": 0}
 
 
-def get_employees_with_overtime_above(amount):
+def _encode_page_token(amount, overtime_pay, rowid):
+    payload = json.dumps([amount, overtime_pay, rowid]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def _decode_page_token(page_token, amount):
+    token_amount, overtime_pay, rowid = json.loads(base64.urlsafe_b64decode(page_token))
+    if token_amount != amount:
+        raise ValueError("page_token belongs to a different amount")
+    return overtime_pay, rowid
+
+
+@registry.tool(
+    """Retrieves the employees with overtime pay
+    above a specified amount. Always returns the total count and
+    overtime aggregates; rows come back one page at a time, highest
+    overtime first. Pass next_page_token back as page_token for more.""",
+    amount="""The minimum amount of overtime pay
+    (e.g., 1000.0).""",
+    page_token="""Continuation token from a previous call (omit for the first page).""",
+    page_size=f"""Rows per page (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE}).""",
+)
+def get_employees_with_overtime_above(
+    amount: float, page_token: str = None, page_size: int = DEFAULT_PAGE_SIZE
+):
+    empty = {"total_count": 0, "rows": [], "next_page_token": None}
     try:
-        query = f"""
-        SELECT * 
-        FROM salaries_2023
-        WHERE Overtime_Pay > {amount};
-        """
-        query = text(query)
-
-        with engine.connect() as connection:
-            result = pd.read_sql_query(query, connection)
-        if not result.empty:
-            return result.to_dict("records")
+        amount = float(amount)
+        page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        summary = pool.fetch_one(OVERTIME_ABOVE_SUMMARY_SQL, (amount,))
+
+        if page_token:
+            try:
+                overtime_pay, rowid = _decode_page_token(page_token, amount)
+            except (ValueError, TypeError) as e:
+                return {**empty, "error": f"invalid page_token: {e}"}
+            query = OVERTIME_ABOVE_NEXT_PAGE_SQL
+            params = (amount, overtime_pay, overtime_pay, rowid)
         else:
-            return []
+            query = OVERTIME_ABOVE_FIRST_PAGE_SQL
+            params = (amount,)
+
+        # Stream from the cursor and stop at the row or byte cap
+        rows = []
+        page_bytes = 0
+        next_page_token = None
+        last = None
+        for row in pool.iterate(query, params):
+            row_bytes = len(json.dumps(row))
+            if len(rows) >= page_size or (rows and page_bytes + row_bytes > MAX_PAGE_BYTES):
+                next_page_token = _encode_page_token(amount, last["Overtime_Pay"], last["_rowid"])
+                break
+            last = row
+            rows.append(row)
+            page_bytes += row_bytes
+
+        for row in rows:
+            del row["_rowid"]
+        return {
+            **summary,
+            "returned": len(rows),
+            "rows": rows,
+            "next_page_token": next_page_token,
+        }
     except Exception as e:
         print(e)
-        return []
+        return empty
 
 
-def get_employee_count_by_gender_in_department(department_name):
+@registry.tool(
+    """Retrieves the count of employees by gender
+    in a specific department.""",
+    department_name="""The name of the department
+    (e.g., 'Alcohol Beverage Services').""",
+)
+def get_employee_count_by_gender_in_department(department_name: str):
     try:
-        query = f"""
-        SELECT Gender, COUNT(*) AS employee_count
-        FROM salaries_2023
-        WHERE Department_Name = '{department_name}'
-        GROUP BY Gender;
-        """
-        query = text(query)
-
-        with engine.connect() as connection:
-            result = pd.read_sql_query(query, connection)
-        if not result.empty:
-            return result.to_dict("records")
-        else:
-            return []
+        return _cube_fetch_all(
+            CUBE_EMPLOYEE_COUNT_BY_GENDER_SQL,
+            EMPLOYEE_COUNT_BY_GENDER_SQL,
+            (department_name,),
+        )
     except Exception as e:
         print(e)
         return []
 
 
-def get_total_longevity_pay_for_grade(grade):
+@registry.tool(
+    """Retrieves the total longevity pay for a
+    specific grade.""",
+    grade="""The grade of the employees
+    (e.g., 'M3', 'N25').""",
+)
+def get_total_longevity_pay_for_grade(grade: str):
     try:
-        query = f"""
-        SELECT SUM(Longevity_Pay) AS total_longevity_pay
-        FROM salaries_2023
-        WHERE Grade = '{grade}';
-        """
-        query = text(query)
-
-        with engine.connect() as connection:
-            result = pd.read_sql_query(query, connection)
-        if not result.empty:
-            return result.to_dict("records")[0]
+        result = _cube_fetch_one(
+            CUBE_TOTAL_LONGEVITY_PAY_SQL, TOTAL_LONGEVITY_PAY_SQL, (grade,)
+        )
+        if result is not None:
+            return result
         else:
             return {"total_longevity_pay": 0}
     except Exception as e:
         print(e)
         return {"total_longevity_pay": 0}
+
+
+# OpenAI tool schemas, in registration order
+tools_sql = registry.schemas()
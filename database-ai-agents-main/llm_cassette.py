@@ -0,0 +1,186 @@
+"""
+Record/Replay LLM Cassettes
+
+Captures every chat-model response into a local cassette file and serves
+it back later, so the benchmarks and demos can run offline and
+deterministically. Everything that isn't an LLM call (agent framework,
+tool execution, pandas code) still runs for real, so replay timings show
+our own overhead and catch regressions in it.
+
+- Plugs in as LangChain's global LLM cache, so ChatOpenAI and
+  ChatAnthropic (and any agent built on them) are covered without code
+  changes
+- Keys are a SHA-256 of the model parameters (model, temperature, bound
+  tools, stop words) and the messages, with per-run message IDs and
+  response metadata stripped so replays match
+- Cassettes are append-only JSONL in ./data/cassettes/<name>.jsonl
+- Replay can simulate the recorded latency (scaled); a request that was
+  never recorded raises CassetteMissError instead of going to the network
+- Replayed generations carry REPLAYED_FLAG in their generation_info, so
+  usage accounting can tell them from real API calls (usage.is_replayed)
+
+Modes come from the environment so scripts need no edits to switch:
+
+    LLM_CASSETTE_MODE=record python csv_agent_benchmark.py
+    LLM_CASSETTE_MODE=replay LLM_CASSETTE_LATENCY=0 python csv_agent_benchmark.py
+
+LLM_CASSETTE_MODE is off (default), record (always call the API and
+record), replay (never call it) or auto (replay what is recorded, record
+the rest). LLM_CASSETTE_LATENCY scales the recorded latency during replay
+(default 0, i.e. no waiting).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import warnings
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.load import dumps, loads
+
+# loads() is marked beta but is what LangChain's own caches use
+warnings.filterwarnings("ignore", message=".*`loads` is in beta.*", category=LangChainBetaWarning)
+
+CASSETTE_DIR = "./data/cassettes"
+MODES = ("off", "record", "replay", "auto")
+
+# Message fields that differ between otherwise identical calls
+VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+# generation_info key marking a generation served from a cassette
+REPLAYED_FLAG = "cassette_replayed"
+
+# Replay never calls the API, but the clients still want a key at construction
+PLACEHOLDER_KEYS = ("OPENAI_API_KEY", "ANTHROPIC_API_KEY")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def _strip_volatile(value):
+    if isinstance(value, dict):
+        if value.get("lc") == 1 and isinstance(value.get("kwargs"), dict):
+            value = {
+                **value,
+                "kwargs": {
+                    key: item
+                    for key, item in value["kwargs"].items()
+                    if key not in VOLATILE_MESSAGE_FIELDS
+                },
+            }
+        return {key: _strip_volatile(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_strip_volatile(item) for item in value]
+    return value
+
+
+def request_key(prompt, llm_string):
+    """Canonical hash of a cache lookup (serialized messages + model parameters)."""
+    try:
+        messages = _strip_volatile(json.loads(prompt))
+    except ValueError:
+        messages = prompt
+    canonical = json.dumps({"llm": llm_string, "messages": messages}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMCassette(BaseCache):
+    """LangChain LLM cache that records responses to, and replays them from, a file."""
+
+    def __init__(self, path, mode="replay", latency_scale=0.0):
+        if mode not in MODES[1:]:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.entries = {}  # key -> {"generations": [...], "latency": seconds}
+        self._started = {}  # key -> perf_counter() of the miss, to time the real call
+        self._lock = threading.Lock()
+        self.counters = {"replayed": 0, "recorded": 0, "missed": 0}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry  # later recordings win
+        except FileNotFoundError:
+            pass
+
+    def lookup(self, prompt, llm_string):
+        key = request_key(prompt, llm_string)
+        with self._lock:
+            # record mode always calls the API (re-recording); auto replays hits
+            entry = None if self.mode == "record" else self.entries.get(key)
+            if entry is None:
+                self.counters["missed"] += 1
+                if self.mode == "replay":
+                    raise CassetteMissError(
+                        f"No recording for request {key[:12]} in {self.path}; "
+                        "run with LLM_CASSETTE_MODE=record first"
+                    )
+                self._started[key] = time.perf_counter()
+                return None
+            self.counters["replayed"] += 1
+        if self.latency_scale:
+            time.sleep(entry["latency"] * self.latency_scale)
+        generations = [loads(generation) for generation in entry["generations"]]
+        for generation in generations:
+            generation.generation_info = {**(generation.generation_info or {}), REPLAYED_FLAG: True}
+        return generations
+
+    def update(self, prompt, llm_string, return_val):
+        key = request_key(prompt, llm_string)
+        with self._lock:
+            started = self._started.pop(key, None)
+            entry = {
+                "key": key,
+                "latency": time.perf_counter() - started if started is not None else 0.0,
+                "generations": [dumps(generation) for generation in return_val],
+                "recorded_at": time.time(),
+            }
+            self.entries[key] = entry
+            self.counters["recorded"] += 1
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self.entries.clear()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "entries": len(self.entries), "mode": self.mode}
+
+
+def install_cassette(name, mode=None, latency_scale=None, cassette_dir=CASSETTE_DIR):
+    """Install a cassette as the global LLM cache according to LLM_CASSETTE_MODE.
+
+    Returns the LLMCassette, or None when cassettes are off.
+    """
+    mode = mode or os.getenv("LLM_CASSETTE_MODE", "off").lower()
+    if mode not in MODES:
+        raise ValueError(f"LLM_CASSETTE_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+    if mode == "off":
+        return None
+    if latency_scale is None:
+        latency_scale = float(os.getenv("LLM_CASSETTE_LATENCY", "0"))
+
+    path = os.path.join(cassette_dir, f"{name}.jsonl")
+    cassette = LLMCassette(path, mode=mode, latency_scale=latency_scale)
+    if mode == "replay":
+        for variable in PLACEHOLDER_KEYS:
+            os.environ.setdefault(variable, "replay-only")
+    set_llm_cache(cassette)
+    print(f"LLM cassette: {mode} {path} ({len(cassette.entries)} recorded responses)")
+    return cassette
@@ -0,0 +1,240 @@
+"""
+Incremental CSV-to-SQLite Loader
+
+Loads data/salaries_2023.csv into db/salary.db only when the CSV changed.
+
+- Fingerprints the CSV (size, mtime, SHA-256) and stores it in an
+  `_ingest_metadata` table next to the data
+- Warm starts compare size/mtime only, so they cost one metadata lookup
+- Cold starts stream the CSV in chunks (see ingest.py) into a staging table
+  with large `executemany` batches inside one transaction, then swap it in atomically
+  (drop + rename + index build + metadata update commit together)
+- The aggregate cube (cube.py) is built in the same pass and swapped in
+  the same transaction, so it can never disagree with the base table
+
+Run `python loader.py` to (re)load ./data/salaries_2023.csv.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+from cube import create_cube_indexes, create_cube_table, update_cube
+from ingest import iter_salary_chunks, peak_rss_mb
+from schema import (
+    SALARY_COLUMNS,
+    TABLE_NAME,
+    create_salary_indexes,
+    create_salary_table,
+)
+
+METADATA_TABLE = "_ingest_metadata"
+CHUNK_SIZE = 100_000
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_csv(csv_path, with_hash=True):
+    """Return {size, mtime_ns, sha256} for the CSV (sha256 is None if skipped)."""
+    stat = os.stat(csv_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(csv_path) if with_hash else None,
+    }
+
+
+def _ensure_metadata_table(connection):
+    connection.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS "{METADATA_TABLE}" (
+            table_name TEXT PRIMARY KEY,
+            source_path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            loaded_at REAL NOT NULL
+        )
+        """
+    )
+
+
+def stored_fingerprint(connection, table_name=TABLE_NAME):
+    """Return the fingerprint recorded for the last load of table_name (or None)."""
+    _ensure_metadata_table(connection)
+    row = connection.execute(
+        f'SELECT size, mtime_ns, sha256, row_count FROM "{METADATA_TABLE}" '
+        "WHERE table_name = ?",
+        (table_name,),
+    ).fetchone()
+    if row is None:
+        return None
+    return {"size": row[0], "mtime_ns": row[1], "sha256": row[2], "row_count": row[3]}
+
+
+def table_version(database_file_path, table_name=TABLE_NAME):
+    """Version string of the loaded data ("<sha256>:<rows>"), or None if never loaded.
+
+    Caches keyed on this are invalidated whenever a different CSV is loaded.
+    """
+    try:
+        connection = sqlite3.connect(f"file:{database_file_path}?mode=ro", uri=True)
+    except sqlite3.OperationalError:
+        return None
+    try:
+        row = connection.execute(
+            f'SELECT sha256, row_count FROM "{METADATA_TABLE}" WHERE table_name = ?',
+            (table_name,),
+        ).fetchone()
+    except sqlite3.OperationalError:  # no metadata table yet
+        return None
+    finally:
+        connection.close()
+    return None if row is None else f"{row[0]}:{row[1]}"
+
+
+def _table_exists(connection, table_name):
+    row = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table_name,),
+    ).fetchone()
+    return row is not None
+
+
+def _write_metadata(connection, table_name, csv_path, fingerprint, row_count):
+    connection.execute(
+        f"""
+        INSERT OR REPLACE INTO "{METADATA_TABLE}"
+            (table_name, source_path, size, mtime_ns, sha256, row_count, loaded_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            table_name,
+            os.path.abspath(csv_path),
+            fingerprint["size"],
+            fingerprint["mtime_ns"],
+            fingerprint["sha256"],
+            row_count,
+            time.time(),
+        ),
+    )
+
+
+def _ingest(connection, csv_path, table_name, chunk_size, stats):
+    """Stream the CSV into a staging table and swap it in. Returns row count."""
+    staging_table = f"{table_name}__staging"
+    insert_sql = (
+        f'INSERT INTO "{staging_table}" VALUES '
+        f"({', '.join('?' for _ in SALARY_COLUMNS)})"
+    )
+
+    cube_table = f"{table_name}_cube"
+    staging_cube = f"{cube_table}__staging"
+
+    connection.execute(f'DROP TABLE IF EXISTS "{staging_table}"')
+    connection.execute(f'DROP TABLE IF EXISTS "{staging_cube}"')
+    create_salary_table(connection, staging_table)
+    create_cube_table(connection, staging_cube)
+
+    row_count = 0
+    for chunk in iter_salary_chunks(csv_path, chunk_size, stats=stats):
+        connection.executemany(
+            insert_sql, chunk[list(SALARY_COLUMNS)].itertuples(index=False, name=None)
+        )
+        # The aggregate cube is maintained incrementally, chunk by chunk
+        update_cube(connection, chunk, staging_cube)
+        row_count += len(chunk)
+
+    # Atomic swap: readers keep seeing the old tables until COMMIT
+    connection.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    connection.execute(f'ALTER TABLE "{staging_table}" RENAME TO "{table_name}"')
+    connection.execute(f'DROP TABLE IF EXISTS "{cube_table}"')
+    connection.execute(f'ALTER TABLE "{staging_cube}" RENAME TO "{cube_table}"')
+    create_salary_indexes(connection, table_name)
+    create_cube_indexes(connection, cube_table)
+    return row_count
+
+
+def load_salary_csv(csv_path, database_file_path, table_name=TABLE_NAME, chunk_size=CHUNK_SIZE, force=False):
+    """Load the CSV into SQLite unless the stored fingerprint says it is unchanged.
+
+    Returns {"status": "skipped" | "loaded", "rows": int, "seconds": float,
+    "peak_rss_mb": float}.
+    """
+    start_time = time.perf_counter()
+    stats = {"peak_rss_mb": peak_rss_mb()}
+    os.makedirs(os.path.dirname(database_file_path) or ".", exist_ok=True)
+
+    connection = sqlite3.connect(database_file_path, isolation_level=None)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA cache_size = -262144")  # ~256 MB for index builds
+
+        stored = stored_fingerprint(connection, table_name)
+        current = fingerprint_csv(csv_path, with_hash=False)
+
+        tables_exist = _table_exists(connection, table_name) and _table_exists(
+            connection, f"{table_name}_cube"
+        )
+        if not force and stored is not None and tables_exist:
+            # Databases built before the cube had indexes get them here (no-op after)
+            create_cube_indexes(connection, f"{table_name}_cube")
+            if (stored["size"], stored["mtime_ns"]) == (current["size"], current["mtime_ns"]):
+                return {
+                    "status": "skipped",
+                    "rows": stored["row_count"],
+                    "seconds": time.perf_counter() - start_time,
+                    "peak_rss_mb": stats["peak_rss_mb"],
+                }
+            # Same size but touched/copied: only a hash mismatch forces a reload
+            current["sha256"] = file_sha256(csv_path)
+            if stored["size"] == current["size"] and stored["sha256"] == current["sha256"]:
+                connection.execute("BEGIN IMMEDIATE")
+                _write_metadata(connection, table_name, csv_path, current, stored["row_count"])
+                connection.execute("COMMIT")
+                return {
+                    "status": "skipped",
+                    "rows": stored["row_count"],
+                    "seconds": time.perf_counter() - start_time,
+                    "peak_rss_mb": stats["peak_rss_mb"],
+                }
+
+        if current["sha256"] is None:
+            current["sha256"] = file_sha256(csv_path)
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row_count = _ingest(connection, csv_path, table_name, chunk_size, stats)
+            _write_metadata(connection, table_name, csv_path, current, row_count)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+    return {
+        "status": "loaded",
+        "rows": row_count,
+        "seconds": time.perf_counter() - start_time,
+        "peak_rss_mb": stats["peak_rss_mb"],
+    }
+
+
+if __name__ == "__main__":
+    result = load_salary_csv("./data/salaries_2023.csv", "./db/salary.db")
+    print(f"{result['status']}: {result['rows']:,} rows in {result['seconds']:.3f}s")
+    if result["peak_rss_mb"] is not None:
+        print(f"Peak RSS: {result['peak_rss_mb']:.1f} MB")
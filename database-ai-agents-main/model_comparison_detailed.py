@@ -6,21 +6,33 @@ import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
-import pandas as pd
+from dataset import load_salaries, optimize_dataframe
+from ground_truth import load_ground_truth
+from llm_cassette import install_cassette
+from results_store import ResultsStore
+from scoring import score_answer
+from tracing import AgentTracer
+from usage import UsageLedger, print_usage_report
 from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
 import time
 
 load_dotenv()
+
+# LLM_CASSETTE_MODE=record|replay|auto records or replays every LLM call
+cassette = install_cassette("model_comparison_detailed")
+
 openai_key = os.getenv("OPENAI_API_KEY")
 anthropic_key = os.getenv("ANTHROPIC_API_KEY")
 
 # Load data
-df = pd.read_csv("./data/salaries_2023.csv").fillna(value=0)
+# compact categorical/numeric dtypes before handing the frame to the agent
+df = optimize_dataframe(load_salaries("./data/salaries_2023.csv"))
 
 # Prompt setup
 CSV_PROMPT_PREFIX = """
 First set the pandas display options to show all the columns,
 get the column names, then answer the question.
+The text columns are pandas categoricals, so pass observed=True to groupby.
 """
 
 CSV_PROMPT_SUFFIX = """
@@ -61,16 +73,30 @@ test_configs = [
 print("=" * 100)
 print("DETAILED MODEL COMPARISON TEST - Parameter Impact Analysis")
 print("=" * 100)
+truth = load_ground_truth()
+top_grade = truth["grade_highest_avg_base_salary"]
+top_salary = truth["grade_highest_avg_base_salary_value"]
+female_avg = truth["avg_base_salary_by_gender"]["F"]
+male_avg = truth["avg_base_salary_by_gender"]["M"]
+
 print("\n📊 Ground Truth (Direct Pandas):")
-print("  - Highest grade: EX0 ($292,000.00)")
-print("  - Female average (all): $87,497.50")
-print("  - Male average (all): $92,382.93")
-print("  - Gap: $4,885.43 (Male higher)")
+print(f"  - Highest grade: {top_grade} (${top_salary:,.2f})")
+print(f"  - Female average (all): ${female_avg:,.2f}")
+print(f"  - Male average (all): ${male_avg:,.2f}")
+print(f"  - Gap: ${truth['gender_pay_gap']:,.2f} ({'Male' if truth['gender_pay_gap_higher'] == 'M' else 'Female'} higher)")
 print("\n" + "=" * 100)
 
 results_summary = []
+ledger = UsageLedger()
+store = ResultsStore()
+run_id = store.start_run("model_comparison_detailed", config={
+    "configs": [display_name for _, display_name, _, _, _ in test_configs],
+    "cassette": cassette.mode if cassette else "off",
+})
 
 for model_name, display_name, provider, agent_type, temperature in test_configs:
+    labels = {"model": model_name, "agent_type": agent_type}
+    tracer = AgentTracer(display_name)
     print(f"\n\n🤖 Testing {display_name}")
     print(f"   Model: {model_name}")
     print(f"   Provider: {provider.upper()} | Agent Type: {agent_type} | Temperature: {temperature}")
@@ -93,7 +119,10 @@ for model_name, display_name, provider, agent_type, temperature in test_configs:
 
     start_time = time.time()
     try:
-        res = agent.invoke(CSV_PROMPT_PREFIX + QUESTION + CSV_PROMPT_SUFFIX)
+        res = agent.invoke(
+            CSV_PROMPT_PREFIX + QUESTION + CSV_PROMPT_SUFFIX,
+            config={"callbacks": [tracer, ledger.handler(**labels)]},
+        )
         elapsed = time.time() - start_time
 
         # Handle both string and list outputs
@@ -105,13 +134,22 @@ for model_name, display_name, provider, agent_type, temperature in test_configs:
         print(output[:500] + ("..." if len(output) > 500 else ""))
         print("-" * 100)
 
-        # Check for accuracy markers
-        has_ex0 = "EX0" in output or "Ex0" in output or "ex0" in output
-        has_292000 = "292,000" in output or "292000" in output
-        has_correct_female = "87,497" in output or "87497" in output
-        has_correct_male = "92,382" in output or "92382" in output
+        # Score each part of the answer against the ground truth
+        has_ex0 = score_answer(output, top_grade)["correct"]
+        has_292000 = score_answer(output, top_salary, tolerance=1.0)["correct"]
+        gender_score = score_answer(output, {"F": female_avg, "M": male_avg}, tolerance=1.0)["found"]
+        has_correct_female = gender_score["F"] is not None
+        has_correct_male = gender_score["M"] is not None
 
         accuracy_score = sum([has_ex0, has_292000, has_correct_female, has_correct_male])
+        ledger.record_run(labels, answered=True, correct=accuracy_score == 4)
+        store.record(
+            run_id, display_name, agent_type, QUESTION,
+            success=True, correct=accuracy_score == 4, latency_seconds=elapsed, trace=tracer.summary(),
+            cost=ledger.summary(by=("model", "agent_type")).get((model_name, agent_type), {}).get("cost"),
+            output=output,
+            score={"grade": has_ex0, "salary": has_292000, "female": has_correct_female, "male": has_correct_male},
+        )
 
         results_summary.append({
             "config": display_name,
@@ -126,6 +164,11 @@ for model_name, display_name, provider, agent_type, temperature in test_configs:
     except Exception as e:
         elapsed = time.time() - start_time
         print(f"\n❌ Error after {elapsed:.2f}s: {str(e)[:200]}")
+        ledger.record_run(labels, answered=False, correct=False)
+        store.record(
+            run_id, display_name, agent_type, QUESTION,
+            success=False, correct=False, latency_seconds=elapsed, trace=tracer.summary(), error=str(e),
+        )
         results_summary.append({
             "config": display_name,
             "time": elapsed,
@@ -144,6 +187,12 @@ print("-" * 100)
 for result in results_summary:
     print(f"{result['config']:<45} {result['time']:>7.2f}s {result['accuracy']:>10} {result['ex0']:>5} {result['salary']:>7} {result['female']:>8} {result['male']:>6}")
 
+print_usage_report(ledger.summary(by=("model", "agent_type")), "TOKEN USAGE AND COST BY CONFIGURATION")
+print_usage_report(ledger.summary(by=("model",)), "TOKEN USAGE AND COST BY MODEL")
+
+store.finish_run(run_id)
+print(f"\nResults stored as run {run_id} in {store.path}")
+
 print("\n" + "=" * 100)
 print("KEY INSIGHTS:")
 print("=" * 100)
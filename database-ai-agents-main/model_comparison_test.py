@@ -6,21 +6,32 @@ import os
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
-import pandas as pd
+from dataset import load_salaries, optimize_dataframe
+from ground_truth import load_ground_truth
+from llm_cassette import install_cassette
+from results_store import ResultsStore
+from tracing import AgentTracer
+from usage import UsageLedger, print_usage_report
 from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
 import time
 
 load_dotenv()
+
+# LLM_CASSETTE_MODE=record|replay|auto records or replays every LLM call
+cassette = install_cassette("model_comparison_test")
+
 openai_key = os.getenv("OPENAI_API_KEY")
 anthropic_key = os.getenv("ANTHROPIC_API_KEY")
 
 # Load data
-df = pd.read_csv("./data/salaries_2023.csv").fillna(value=0)
+# compact categorical/numeric dtypes before handing the frame to the agent
+df = optimize_dataframe(load_salaries("./data/salaries_2023.csv"))
 
 # Prompt setup
 CSV_PROMPT_PREFIX = """
 First set the pandas display options to show all the columns,
 get the column names, then answer the question.
+The text columns are pandas categoricals, so pass observed=True to groupby.
 """
 
 CSV_PROMPT_SUFFIX = """
@@ -55,18 +66,36 @@ models = [
 print("=" * 100)
 print("MODEL COMPARISON TEST - Accuracy Verification")
 print("=" * 100)
+truth = load_ground_truth()
+top_grade = truth["grade_highest_avg_base_salary"]
+top_counts = truth["grade_highest_avg_base_salary_gender_counts"]
+mixed_grade = truth["grade_both_genders_highest_avg"]
+mixed_by_gender = truth["grade_both_genders_avg_by_gender"]
+gender_avg = truth["avg_base_salary_by_gender"]
+gap_higher = "Male" if truth["gender_pay_gap_higher"] == "M" else "Female"
+top_members = ", ".join(f"{count} {'male' if gender == 'M' else 'female'}" for gender, count in top_counts.items())
+
 print("\n📊 Ground Truth (Direct Pandas):")
-print("  - Highest grade overall: EX0 ($292,000.00) - only has 1 male employee")
-print("  - Highest grade with both genders: EX1 ($225,958.33)")
-print("    • Female in EX1: $226,000.00")
-print("    • Male in EX1: $225,937.50")
+print(f"  - Highest grade overall: {top_grade} (${truth['grade_highest_avg_base_salary_value']:,.2f}) - has {top_members}")
+print(f"  - Highest grade with both genders: {mixed_grade} (${truth['grade_both_genders_highest_avg_value']:,.2f})")
+print(f"    • Female in {mixed_grade}: ${mixed_by_gender['F']:,.2f}")
+print(f"    • Male in {mixed_grade}: ${mixed_by_gender['M']:,.2f}")
 print("  - Overall gender pay comparison:")
-print("    • Female average (all grades): $87,497.50")
-print("    • Male average (all grades): $92,382.93")
-print("    • Gap: $4,885.43 (Male higher)")
+print(f"    • Female average (all grades): ${gender_avg['F']:,.2f}")
+print(f"    • Male average (all grades): ${gender_avg['M']:,.2f}")
+print(f"    • Gap: ${truth['gender_pay_gap']:,.2f} ({gap_higher} higher)")
 print("\n" + "=" * 100)
 
+ledger = UsageLedger()
+store = ResultsStore()
+run_id = store.start_run("model_comparison_test", config={
+    "models": [model_name for model_name, _, _, _ in models],
+    "cassette": cassette.mode if cassette else "off",
+})
+
 for model_name, display_name, provider, agent_type in models:
+    labels = {"model": display_name, "agent_type": agent_type}
+    tracer = AgentTracer(display_name)
     print(f"\n\n🤖 Testing {display_name} ({model_name})")
     print(f"   Provider: {provider.upper()} | Agent Type: {agent_type}")
     print("-" * 100)
@@ -88,7 +117,10 @@ for model_name, display_name, provider, agent_type in models:
 
     start_time = time.time()
     try:
-        res = agent.invoke(CSV_PROMPT_PREFIX + QUESTION + CSV_PROMPT_SUFFIX)
+        res = agent.invoke(
+            CSV_PROMPT_PREFIX + QUESTION + CSV_PROMPT_SUFFIX,
+            config={"callbacks": [tracer, ledger.handler(**labels)]},
+        )
         elapsed = time.time() - start_time
 
         print(f"\n⏱️  Response time: {elapsed:.2f}s")
@@ -98,20 +130,37 @@ for model_name, display_name, provider, agent_type in models:
         output = res['output'] if isinstance(res['output'], str) else res['output'][0].get('text', str(res['output']))
         print(output)
         print("-" * 100)
+        ledger.record_run(labels, answered=True)
+        error = None
 
     except Exception as e:
         elapsed = time.time() - start_time
         print(f"\n❌ Error after {elapsed:.2f}s: {str(e)}")
+        ledger.record_run(labels, answered=False)
+        output, error = None, str(e)
+
+    # Answers here are judged by reading them, so correct stays unset
+    store.record(
+        run_id, display_name, agent_type, QUESTION,
+        success=error is None, latency_seconds=elapsed, trace=tracer.summary(),
+        cost=ledger.summary(by=("model",)).get((display_name,), {}).get("cost"),
+        error=error, output=output,
+    )
+
+store.finish_run(run_id)
+
+print_usage_report(ledger.summary(by=("model", "agent_type")))
+print(f"\nResults stored as run {run_id} in {store.path}")
 
 print("\n\n" + "=" * 100)
 print("COMPARISON COMPLETE")
 print("=" * 100)
 print("\n💡 How to evaluate accuracy:")
-print("  1. Check if the model identified EX0 as highest grade ($292,000)")
+print(f"  1. Check if the model identified {top_grade} as highest grade (${truth['grade_highest_avg_base_salary_value']:,.0f})")
 print("  2. Check if overall gender comparison is accurate:")
-print("     - Female average: $87,497.50")
-print("     - Male average: $92,382.93")
-print("     - Gap: $4,885.43 (Male higher)")
+print(f"     - Female average: ${gender_avg['F']:,.2f}")
+print(f"     - Male average: ${gender_avg['M']:,.2f}")
+print(f"     - Gap: ${truth['gender_pay_gap']:,.2f} ({gap_higher} higher)")
 print("  3. Check if it tried two methods and verified results")
 print("  4. Check if final answer matches intermediate calculations")
 print("\n⚠️  Note: Claude may have correct calculations but wrong final summary")
@@ -0,0 +1,382 @@
+"""
+Benchmark Results Store
+
+Keeps the history of every benchmark run in a local SQLite database
+(./data/results/benchmarks.db) so latency and accuracy can be compared
+across commits:
+- runs: run id, script, git commit (and whether the tree was dirty),
+  start/finish time and the run's configuration as JSON
+- results: one row per agent invocation - model, agent type, query,
+  category, success / correct, total latency and its breakdown (LLM,
+  tools, pandas, framework overhead), tokens, cost, the answer and its
+  score details
+- compare_runs() reports p50/p95 latency and accuracy per model / agent
+  type between two runs, with significance tests: Mann-Whitney U for
+  latency, Fisher's exact test for accuracy (no SciPy needed)
+
+Commands:
+
+    python results_store.py runs [--script csv_agent_benchmark]
+    python results_store.py compare [BASELINE_RUN] [CANDIDATE_RUN] [--by query]
+                                    [--fail-on-regression]
+
+compare without run ids compares the two latest runs of the same script;
+--fail-on-regression exits with status 1 when a model got significantly
+slower or less accurate, so it can gate a deploy.
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import closing
+
+import numpy as np
+
+RESULTS_PATH = "./data/results/benchmarks.db"
+SIGNIFICANCE_LEVEL = 0.05
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    script TEXT NOT NULL,
+    git_commit TEXT,
+    git_dirty INTEGER,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    model TEXT NOT NULL,
+    agent_type TEXT,
+    query TEXT NOT NULL,
+    category TEXT,
+    answer_key TEXT,
+    trial INTEGER NOT NULL DEFAULT 0,
+    success INTEGER NOT NULL,
+    correct INTEGER,
+    latency_seconds REAL NOT NULL,
+    llm_seconds REAL,
+    tool_seconds REAL,
+    pandas_seconds REAL,
+    overhead_seconds REAL,
+    llm_calls INTEGER,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cost REAL,
+    error TEXT,
+    output TEXT,
+    score TEXT
+);
+CREATE INDEX IF NOT EXISTS results_run ON results(run_id);
+"""
+
+# Tracer summary fields stored with each result (tracing.AgentTracer.summary())
+TRACE_FIELDS = (
+    "llm_seconds",
+    "tool_seconds",
+    "pandas_seconds",
+    "overhead_seconds",
+    "llm_calls",
+    "input_tokens",
+    "output_tokens",
+)
+
+
+def git_commit(path="."):
+    """(commit sha, dirty) of the checkout at path, or (None, None) outside git."""
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=path, capture_output=True, text=True, check=True,
+        ).stdout
+        return sha, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+class ResultsStore:
+    """SQLite store of benchmark runs and their per-query results."""
+
+    def __init__(self, path=RESULTS_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def start_run(self, script, config=None):
+        """Register a new run and return its id."""
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        sha, dirty = git_commit(os.path.dirname(os.path.abspath(__file__)))
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO runs (run_id, script, git_commit, git_dirty, started_at, config) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, script, sha, dirty, time.time(), json.dumps(config or {}, default=str)),
+            )
+        return run_id
+
+    def finish_run(self, run_id):
+        with closing(self._connect()) as connection, connection:
+            connection.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def record(self, run_id, model, agent_type, query, *, success, latency_seconds, category=None,
+               answer_key=None, trial=0, correct=None, trace=None, cost=None, error=None,
+               output=None, score=None):
+        """Store one agent invocation; trace is an AgentTracer.summary() dict."""
+        trace = trace or {}
+        row = {
+            "run_id": run_id,
+            "model": model,
+            "agent_type": agent_type,
+            "query": query,
+            "category": category,
+            "answer_key": answer_key,
+            "trial": trial,
+            "success": bool(success),
+            "correct": None if correct is None else bool(correct),
+            "latency_seconds": latency_seconds,
+            **{field: trace.get(field) for field in TRACE_FIELDS},
+            "cost": cost,
+            "error": error,
+            "output": output,
+            "score": None if score is None else json.dumps(score, default=str),
+        }
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(f"INSERT INTO results ({columns}) VALUES ({placeholders})", tuple(row.values()))
+
+    def runs(self, script=None, limit=20):
+        """Latest runs (newest first) with their result counts."""
+        query = (
+            "SELECT runs.*, COUNT(results.id) AS results FROM runs "
+            "LEFT JOIN results ON results.run_id = runs.run_id "
+            + ("WHERE runs.script = ? " if script else "")
+            + "GROUP BY runs.run_id ORDER BY runs.started_at DESC LIMIT ?"
+        )
+        params = (script, limit) if script else (limit,)
+        with closing(self._connect()) as connection:
+            return [dict(row) for row in connection.execute(query, params)]
+
+    def run(self, run_id):
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown run: {run_id}")
+        return dict(row)
+
+    def results(self, run_id):
+        with closing(self._connect()) as connection:
+            return [
+                dict(row)
+                for row in connection.execute("SELECT * FROM results WHERE run_id = ? ORDER BY id", (run_id,))
+            ]
+
+    def latest_pair(self, script=None):
+        """(baseline, candidate) ids: the two latest finished runs of a script."""
+        with closing(self._connect()) as connection:
+            if script is None:
+                row = connection.execute(
+                    "SELECT script FROM runs WHERE finished_at IS NOT NULL ORDER BY started_at DESC LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    raise LookupError("No finished runs in the results store")
+                script = row["script"]
+            ids = [
+                row["run_id"]
+                for row in connection.execute(
+                    "SELECT run_id FROM runs WHERE script = ? AND finished_at IS NOT NULL "
+                    "ORDER BY started_at DESC LIMIT 2",
+                    (script,),
+                )
+            ]
+        if len(ids) < 2:
+            raise LookupError(f"Need two finished runs of {script} to compare")
+        return ids[1], ids[0]
+
+
+def mann_whitney_p(sample_a, sample_b):
+    """Two-sided Mann-Whitney U p-value (normal approximation, tie-corrected)."""
+    n_a, n_b = len(sample_a), len(sample_b)
+    if not n_a or not n_b:
+        return None
+    combined = sorted([(value, 0) for value in sample_a] + [(value, 1) for value in sample_b])
+    n = n_a + n_b
+    rank_sum_a = 0.0
+    tie_term = 0.0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        average_rank = (i + j) / 2 + 1
+        rank_sum_a += average_rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 0)
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    u_a = rank_sum_a - n_a * (n_a + 1) / 2
+    mean = n_a * n_b / 2
+    variance = n_a * n_b / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0.0
+    if variance <= 0:
+        return 1.0
+    z = (abs(u_a - mean) - 0.5) / math.sqrt(variance)  # continuity correction
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def fisher_exact_p(correct_a, total_a, correct_b, total_b):
+    """Two-sided Fisher's exact test p-value for two proportions."""
+    if not total_a or not total_b:
+        return None
+    correct = correct_a + correct_b
+    total = total_a + total_b
+
+    def probability(k):
+        return math.comb(total_a, k) * math.comb(total_b, correct - k) / math.comb(total, correct)
+
+    observed = probability(correct_a)
+    low, high = max(0, correct - total_b), min(correct, total_a)
+    return min(1.0, sum(p for p in map(probability, range(low, high + 1)) if p <= observed * (1 + 1e-7)))
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+def _group_stats(rows):
+    latencies = [row["latency_seconds"] for row in rows if row["success"]]
+    checked = [row for row in rows if row["correct"] is not None]
+    return {
+        "n": len(rows),
+        "latencies": latencies,
+        "p50": _percentile(latencies, 50),
+        "p95": _percentile(latencies, 95),
+        "checked": len(checked),
+        "correct": sum(row["correct"] for row in checked),
+        "accuracy": sum(row["correct"] for row in checked) / len(checked) if checked else None,
+    }
+
+
+def compare_runs(store, baseline_id, candidate_id, by=("model", "agent_type"), alpha=SIGNIFICANCE_LEVEL):
+    """Per-group latency / accuracy deltas between two runs, over their common queries."""
+    baseline_rows = store.results(baseline_id)
+    candidate_rows = store.results(candidate_id)
+    common = {row["query"] for row in baseline_rows} & {row["query"] for row in candidate_rows}
+
+    def grouped(rows):
+        groups = {}
+        for row in rows:
+            if row["query"] in common:
+                groups.setdefault(tuple(row[key] for key in by), []).append(row)
+        return groups
+
+    baseline_groups, candidate_groups = grouped(baseline_rows), grouped(candidate_rows)
+    comparison = []
+    for key in sorted(set(baseline_groups) & set(candidate_groups), key=lambda key: tuple(map(str, key))):
+        base, cand = _group_stats(baseline_groups[key]), _group_stats(candidate_groups[key])
+        latency_p = mann_whitney_p(base["latencies"], cand["latencies"])
+        accuracy_p = fisher_exact_p(base["correct"], base["checked"], cand["correct"], cand["checked"])
+        slower = latency_p is not None and latency_p < alpha and cand["p50"] > base["p50"]
+        less_accurate = (
+            accuracy_p is not None and accuracy_p < alpha and cand["accuracy"] < base["accuracy"]
+        )
+        comparison.append({
+            "group": key,
+            "baseline": base,
+            "candidate": cand,
+            "latency_p": latency_p,
+            "accuracy_p": accuracy_p,
+            "regression": slower or less_accurate,
+        })
+    return comparison
+
+
+def print_comparison(comparison, baseline, candidate):
+    """Print compare_runs() output as a table."""
+    def seconds(value):
+        return "n/a" if value is None else f"{value:.2f}s"
+
+    def change(before, after):
+        return "n/a" if not before or after is None else f"{(after - before) / before * 100:+.0f}%"
+
+    def percent(value):
+        return "n/a" if value is None else f"{value * 100:.0f}%"
+
+    def p_value(value):
+        return "n/a" if value is None else f"{value:.3f}"
+
+    print(f"\nBaseline:  {baseline['run_id']} ({baseline['script']} @ {(baseline['git_commit'] or '?')[:10]}"
+          f"{' dirty' if baseline['git_dirty'] else ''})")
+    print(f"Candidate: {candidate['run_id']} ({candidate['script']} @ {(candidate['git_commit'] or '?')[:10]}"
+          f"{' dirty' if candidate['git_dirty'] else ''})")
+    print(f"\n{'Group':<44} {'n':>7} {'p50':>15} {'Δp50':>6} {'p95':>15} {'Δp95':>6} {'p(lat)':>7} "
+          f"{'Accuracy':>11} {'p(acc)':>7}")
+    print("-" * 126)
+    for row in comparison:
+        base, cand = row["baseline"], row["candidate"]
+        label = " / ".join(str(part) for part in row["group"])
+        print(
+            f"{label[:44]:<44} {base['n']:>3}/{cand['n']:<3} "
+            f"{seconds(base['p50']):>7}→{seconds(cand['p50']):<7} {change(base['p50'], cand['p50']):>6} "
+            f"{seconds(base['p95']):>7}→{seconds(cand['p95']):<7} {change(base['p95'], cand['p95']):>6} "
+            f"{p_value(row['latency_p']):>7} {percent(base['accuracy']):>5}→{percent(cand['accuracy']):<5} "
+            f"{p_value(row['accuracy_p']):>7}"
+            + ("  ⚠️ REGRESSION" if row["regression"] else "")
+        )
+    regressions = sum(row["regression"] for row in comparison)
+    print(f"\n{regressions} significant regression(s) at p < {SIGNIFICANCE_LEVEL}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark results history and regression comparison")
+    parser.add_argument("--db", default=RESULTS_PATH, help="results database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runs_parser = commands.add_parser("runs", help="list recent runs")
+    runs_parser.add_argument("--script")
+    runs_parser.add_argument("--limit", type=int, default=20)
+
+    compare_parser = commands.add_parser("compare", help="compare two runs")
+    compare_parser.add_argument("baseline", nargs="?")
+    compare_parser.add_argument("candidate", nargs="?")
+    compare_parser.add_argument("--script", help="script whose two latest runs to compare")
+    compare_parser.add_argument("--by", nargs="+", default=["model", "agent_type"],
+                                choices=["model", "agent_type", "category", "query"])
+    compare_parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.db)
+    if args.command == "runs":
+        for run in store.runs(args.script, args.limit):
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["started_at"]))
+            print(f"{run['run_id']:<24} {run['script']:<28} {started} "
+                  f"{(run['git_commit'] or '?')[:10]}{'*' if run['git_dirty'] else ' '} {run['results']:>5} results"
+                  + ("" if run["finished_at"] else "  (unfinished)"))
+        return 0
+
+    if args.baseline and args.candidate:
+        baseline_id, candidate_id = args.baseline, args.candidate
+    else:
+        baseline_id, candidate_id = store.latest_pair(args.script)
+    comparison = compare_runs(store, baseline_id, candidate_id, by=tuple(args.by))
+    print_comparison(comparison, store.run(baseline_id), store.run(candidate_id))
+    return 1 if args.fail_on_regression and any(row["regression"] for row in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,377 @@
+"""
+Sandboxed Code Execution Pool
+
+Runs the pandas agent's python_repl_ast code in a pool of worker processes
+instead of the Streamlit process:
+- Workers are started once (forked from a fork server where available)
+  and each opens the salary DataFrame from the memory-mapped column cache
+  (dataset.py), so the data is shared through the page cache instead of
+  being pickled to every worker
+- pandas copy-on-write is on in the workers, so each session gets a cheap
+  shallow copy of df and code that mutates it never changes another
+  session's data or the cache files
+- Per execution limits: CPU seconds (RLIMIT_CPU), wall time (SIGALRM, with
+  a kill-and-restart of the worker as backstop) and extra memory on top of
+  the worker's baseline (RLIMIT_AS); writing to files fails (RLIMIT_FSIZE)
+- Each agent session sticks to one worker so its variables survive between
+  tool calls; sessions spread over the workers, so concurrent users run
+  in parallel across cores
+- A restarted worker has lost every session's variables: each session on
+  it is told so on its next execution (workers count their restarts as
+  generations)
+- IPC is one bytes message each way over a pipe: the code in, a status
+  byte plus the (truncated) printed result out
+
+The limits contain runaway or buggy code; they are not a security boundary
+against hostile code (there is no syscall filtering).
+
+Usage:
+
+    pool = SandboxPool(csv_path)
+    agent = use_sandbox(create_pandas_dataframe_agent(llm, df, ...), pool)
+
+Run `python sandbox.py` for a smoke test of the limits.
+"""
+
+import ast
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from io import StringIO
+from typing import Any, Type
+
+try:
+    import resource
+except ImportError:  # not available on Windows: only the wall-time limit applies
+    resource = None
+
+from langchain_core.tools import BaseTool
+from langchain_experimental.tools.python.tool import PythonInputs, sanitize_input
+from pydantic import BaseModel, Field
+
+from ingest import CSV_PATH
+
+TIMEOUT_SECONDS = 15
+CPU_SECONDS = 10
+MEMORY_MB = 1024
+MAX_OUTPUT_CHARS = 20_000
+MAX_SESSIONS_PER_WORKER = 32
+KILL_GRACE_SECONDS = 2.0
+START_TIMEOUT_SECONDS = 60.0
+
+# Reply status bytes
+OK, ERROR = b"0", b"1"
+# Request op bytes
+EXECUTE, CLOSE = b"x", b"c"
+
+
+class ExecutionLimitError(Exception):
+    """Raised inside a worker when code exceeds its CPU or wall-time limit."""
+
+
+def _raise_limit(signum, frame):
+    kind = "CPU time" if signum == getattr(signal, "SIGXCPU", None) else "time"
+    raise ExecutionLimitError(f"code exceeded its {kind} limit and was stopped")
+
+
+def _vm_bytes():
+    """Current virtual memory size of this process (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def run_code(code, namespace):
+    """Execute agent code like PythonAstREPLTool: the last expression's value or stdout."""
+    tree = ast.parse(sanitize_input(code))
+    io_buffer = StringIO()
+    with redirect_stdout(io_buffer):
+        exec(ast.unparse(ast.Module(tree.body[:-1], type_ignores=[])), namespace)
+        last = ast.unparse(ast.Module(tree.body[-1:], type_ignores=[]))
+        try:
+            value = eval(last, namespace)
+        except SyntaxError:  # a statement, not an expression
+            exec(last, namespace)
+            value = None
+    return io_buffer.getvalue() if value is None else str(value)
+
+
+def _worker_main(conn, csv_path, cpu_seconds, timeout_seconds, memory_mb, max_output_chars):
+    """Worker process: preload the frame, then execute code until the pipe closes."""
+    import pandas as pd
+
+    from dataset import load_salaries, optimize_dataframe
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is the parent's to handle
+    pd.set_option("mode.copy_on_write", True)
+    df = optimize_dataframe(load_salaries(csv_path))
+    os.chdir(tempfile.mkdtemp(prefix="sandbox-"))
+
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _raise_limit)
+        signal.signal(signal.SIGXFSZ, signal.SIG_IGN)  # writes fail with EFBIG instead
+        resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+        baseline = _vm_bytes()
+        if baseline is not None:
+            limit = baseline + memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        cpu_hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    signal.signal(signal.SIGALRM, _raise_limit)
+
+    sessions = OrderedDict()  # session id -> namespace, least recently used first
+    conn.send_bytes(b"ready")
+    while True:
+        try:
+            message = conn.recv_bytes()
+        except (EOFError, OSError):
+            return
+        op, _, rest = message.partition(b"\0")
+        session_id, _, code = rest.partition(b"\0")
+        if op == CLOSE:
+            sessions.pop(session_id, None)
+            continue
+
+        namespace = sessions.pop(session_id, None) or {"df": df.copy(deep=False)}
+        sessions[session_id] = namespace
+        while len(sessions) > MAX_SESSIONS_PER_WORKER:
+            sessions.popitem(last=False)
+
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+            if cpu_hard != resource.RLIM_INFINITY:
+                soft = min(soft, cpu_hard)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, cpu_hard))
+        signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+        try:
+            status, text = OK, run_code(code.decode("utf-8"), namespace)
+        except ExecutionLimitError as e:
+            status, text = ERROR, f"{type(e).__name__}: {e}"
+        except MemoryError:
+            status, text = ERROR, f"MemoryError: code exceeded the {memory_mb} MB memory limit"
+        except BaseException as e:  # SystemExit etc. must not take the worker down
+            status, text = ERROR, f"{type(e).__name__}: {e}"
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            if resource is not None:
+                resource.setrlimit(resource.RLIMIT_CPU, (cpu_hard, cpu_hard))
+
+        if len(text) > max_output_chars:
+            text = text[:max_output_chars] + f"\n... [output truncated at {max_output_chars} characters]"
+        conn.send_bytes(status + text.encode("utf-8", "replace"))
+
+
+class _Worker:
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.generation = 0  # bumped on every (re)start
+        self.sessions = {}  # session id -> generation its variables live in (None: no run yet)
+        self.lock = threading.Lock()
+
+
+class SandboxPool:
+    """Pre-started worker processes that execute agent code under limits."""
+
+    def __init__(self, csv_path=CSV_PATH, workers=None, timeout_seconds=TIMEOUT_SECONDS,
+                 cpu_seconds=CPU_SECONDS, memory_mb=MEMORY_MB, max_output_chars=MAX_OUTPUT_CHARS):
+        self.csv_path = os.path.abspath(csv_path)
+        self.timeout_seconds = timeout_seconds
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_output_chars = max_output_chars
+        # Streamlit is multi-threaded, and forking it directly can copy a held
+        # lock; a fork server forks workers from a clean process that has
+        # already imported pandas and this module
+        methods = multiprocessing.get_all_start_methods()
+        if "forkserver" in methods:
+            self._context = multiprocessing.get_context("forkserver")
+            self._context.set_forkserver_preload(["dataset", "sandbox"])
+        else:
+            self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._assignments = OrderedDict()  # session id -> worker, least recently used first
+        self.counters = {"executions": 0, "errors": 0, "timeouts": 0, "crashes": 0, "restarts": 0}
+
+        self._workers = [_Worker(index) for index in range(workers or os.cpu_count() or 1)]
+        for worker in self._workers:
+            self._start(worker)
+        for worker in self._workers:
+            self._wait_ready(worker)
+
+    def _start(self, worker):
+        parent_conn, child_conn = self._context.Pipe()
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.csv_path, self.cpu_seconds, self.timeout_seconds,
+                  self.memory_mb, self.max_output_chars),
+            name=f"sandbox-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        child_conn.close()
+        worker.conn = parent_conn
+        worker.generation += 1
+
+    def _wait_ready(self, worker):
+        try:
+            ready = worker.conn.poll(START_TIMEOUT_SECONDS) and worker.conn.recv_bytes() == b"ready"
+        except (EOFError, OSError):
+            ready = False
+        if not ready:
+            raise RuntimeError(f"Sandbox worker {worker.index} failed to start")
+
+    def _restart(self, worker):
+        worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+        self._start(worker)
+        self._wait_ready(worker)
+        with self._lock:
+            self.counters["restarts"] += 1
+
+    def _worker_for(self, session_id):
+        with self._lock:
+            worker = self._assignments.pop(session_id, None)
+            if worker is None:
+                worker = min(self._workers, key=lambda candidate: len(candidate.sessions))
+                worker.sessions[session_id] = None
+            self._assignments[session_id] = worker
+            # Workers evict their least recently used sessions; forget them here too
+            while len(self._assignments) > MAX_SESSIONS_PER_WORKER * len(self._workers):
+                stale_id, stale_worker = self._assignments.popitem(last=False)
+                stale_worker.sessions.pop(stale_id, None)
+            return worker
+
+    def execute(self, session_id, code):
+        """Run code in the session's namespace; returns the tool output text."""
+        worker = self._worker_for(session_id)
+        with worker.lock:
+            if not worker.process.is_alive():
+                self._restart(worker)
+            # Restarted since this session last ran (e.g. another session's timeout)
+            generation = worker.sessions.get(session_id)
+            lost_state = generation is not None and generation != worker.generation
+            worker.sessions[session_id] = worker.generation
+            worker.conn.send_bytes(EXECUTE + b"\0" + session_id.encode() + b"\0" + code.encode("utf-8"))
+
+            reply, failure = None, None
+            if worker.conn.poll(self.timeout_seconds + KILL_GRACE_SECONDS):
+                try:
+                    reply = worker.conn.recv_bytes()
+                except (EOFError, OSError):
+                    failure = "crashes"
+            else:
+                failure = "timeouts"
+            if failure:
+                self._restart(worker)
+                worker.sessions[session_id] = None  # the reply below already says so
+
+        with self._lock:
+            self.counters["executions"] += 1
+            if failure:
+                self.counters[failure] += 1
+            elif reply[:1] == ERROR:
+                self.counters["errors"] += 1
+        if failure == "timeouts":
+            return (f"ExecutionLimitError: code ran longer than {self.timeout_seconds}s and its worker "
+                    "was restarted; variables from earlier steps are gone, redefine them")
+        if failure == "crashes":
+            return ("WorkerCrashed: the code crashed its worker process, which was restarted; "
+                    "variables from earlier steps are gone, redefine them")
+        output = reply[1:].decode("utf-8")
+        if lost_state:
+            return ("WorkerRestarted: this session's worker was restarted since the last step; "
+                    "variables from earlier steps are gone, redefine them\n" + output)
+        return output
+
+    def close_session(self, session_id):
+        """Drop a session's variables."""
+        with self._lock:
+            worker = self._assignments.pop(session_id, None)
+        if worker is None:
+            return
+        with worker.lock:
+            worker.sessions.pop(session_id, None)
+            if worker.process.is_alive():
+                worker.conn.send_bytes(CLOSE + b"\0" + session_id.encode())
+
+    def close(self):
+        """Stop every worker."""
+        for worker in self._workers:
+            with worker.lock:
+                worker.conn.close()
+                worker.process.join(timeout=1)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counters,
+                "workers": len(self._workers),
+                "alive": sum(worker.process.is_alive() for worker in self._workers),
+                "sessions": len(self._assignments),
+            }
+
+
+class SandboxedPythonTool(BaseTool):
+    """Drop-in python_repl_ast tool that executes in a SandboxPool."""
+
+    name: str = "python_repl_ast"
+    description: str = (
+        "A Python shell. Use this to execute python commands. "
+        "Input should be a valid python command. "
+        "When using this tool, sometimes output is abbreviated - "
+        "make sure it does not look abbreviated before using it in your answer."
+    )
+    args_schema: Type[BaseModel] = PythonInputs
+    pool: Any = None
+    session_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+
+    def _run(self, query, run_manager=None):
+        return self.pool.execute(self.session_id, query)
+
+
+def use_sandbox(agent, pool):
+    """Swap the agent's python_repl_ast tool for one that runs in the pool."""
+    for i, tool in enumerate(agent.tools):
+        if tool.name == "python_repl_ast":
+            agent.tools[i] = SandboxedPythonTool(pool=pool, description=tool.description)
+    return agent
+
+
+if __name__ == "__main__":
+    start_time = time.perf_counter()
+    pool = SandboxPool(workers=2, timeout_seconds=3, cpu_seconds=2, memory_mb=256)
+    print(f"Started {pool.stats()['workers']} workers in {time.perf_counter() - start_time:.2f}s")
+
+    checks = [
+        ("row count", "len(df)"),
+        ("state kept", "top = df.groupby('Grade', observed=True)['Base_Salary'].mean().idxmax()"),
+        ("state read", "top"),
+        ("mutation isolated", "df['Base_Salary'] = 0; df['Base_Salary'].sum()"),
+        ("file write blocked", "with open('out.txt', 'w') as f: f.write('x' * 10)"),
+        ("cpu limit", "while True: pass"),
+        ("memory limit", "b = bytearray(1024 * 1024 * 1024)"),
+    ]
+    for label, code in checks:
+        start_time = time.perf_counter()
+        output = pool.execute("demo", code)
+        print(f"  {label:<20} {time.perf_counter() - start_time:>6.2f}s  {output.strip()[:90]}")
+    print(f"  {'other session':<20} {'':>7} {pool.execute('other', 'df.Base_Salary.sum()')}")
+    pool.execute("neighbour", "x = 1")  # least-loaded worker: the one "demo" uses
+    pool.execute("demo", "import os; os._exit(1)")  # crashes, and restarts, that worker
+    print(f"  {'neighbour restarted':<20} {'':>7} {pool.execute('neighbour', 'x').strip()[:90]}")
+    print(pool.stats())
+    pool.close()
@@ -0,0 +1,199 @@
+"""
+Salary Table Schema Management
+
+Defines `salaries_2023` with typed columns and secondary indexes matching the
+helpers.py tool filters (loader.py builds and ANALYZEs it), and reports
+EXPLAIN QUERY PLAN output so we can confirm the tool and agent queries are
+served by indexes.
+
+Also builds a compact schema summary (column types, distinct counts,
+ranges and example values) that agents can be given up front instead of
+discovering the schema with tool calls.
+
+Run `python schema.py` to print the index report and schema summary for
+./db/salary.db.
+"""
+
+import sqlite3
+
+TABLE_NAME = "salaries_2023"
+
+# Column name -> SQLite type, in CSV order
+SALARY_COLUMNS = {
+    "Department": "TEXT NOT NULL",
+    "Department_Name": "TEXT NOT NULL",
+    "Division": "TEXT NOT NULL",
+    "Gender": "TEXT NOT NULL",
+    "Base_Salary": "REAL NOT NULL",
+    "Overtime_Pay": "REAL NOT NULL",
+    "Longevity_Pay": "REAL NOT NULL",
+    "Grade": "TEXT",
+}
+
+# Index name suffix -> indexed columns. Trailing measure columns make the
+# helpers.py aggregates covering queries (no table lookups at all).
+SALARY_INDEXES = {
+    "division_gender": ("Division", "Gender", "Base_Salary"),
+    "department_name_gender": ("Department_Name", "Gender", "Overtime_Pay"),
+    "grade": ("Grade", "Longevity_Pay", "Base_Salary"),
+    "overtime_pay": ("Overtime_Pay",),
+    "department": ("Department",),
+}
+
+# Frequent agent questions (see questions_sql_agent.md) checked by the report
+AGENT_QUERIES = {
+    "avg salary by department": (
+        f"SELECT Department_Name, AVG(Base_Salary) FROM {TABLE_NAME} GROUP BY Department_Name",
+        (),
+    ),
+    "avg salary by grade": (
+        f"SELECT Grade, AVG(Base_Salary) FROM {TABLE_NAME} GROUP BY Grade",
+        (),
+    ),
+    "employees in division": (
+        f"SELECT COUNT(*) FROM {TABLE_NAME} WHERE Division = ?",
+        ("ABS 85 Administration",),
+    ),
+    "female avg salary in department": (
+        f"SELECT AVG(Base_Salary) FROM {TABLE_NAME} WHERE Department_Name = ? AND Gender = 'F'",
+        ("Alcohol Beverage Services",),
+    ),
+    "max overtime pay": (f"SELECT MAX(Overtime_Pay) FROM {TABLE_NAME}", ()),
+}
+
+
+def create_salary_table(connection, table_name=TABLE_NAME):
+    """Create the typed salary table (without indexes)."""
+    columns = ",\n    ".join(f'"{name}" {kind}' for name, kind in SALARY_COLUMNS.items())
+    connection.execute(f'CREATE TABLE "{table_name}" (\n    {columns}\n)')
+
+
+def create_salary_indexes(connection, table_name=TABLE_NAME):
+    """Create the secondary indexes on the salary table."""
+    for suffix, columns in SALARY_INDEXES.items():
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        connection.execute(
+            f'CREATE INDEX IF NOT EXISTS "idx_{table_name}_{suffix}" '
+            f'ON "{table_name}" ({column_list})'
+        )
+
+
+def explain_query_plan(connection, query, params=()):
+    """Return the EXPLAIN QUERY PLAN detail lines for a query."""
+    rows = connection.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+def column_stats(connection, table_name=TABLE_NAME, top_values=3):
+    """Return [{name, type, distinct, min, max, examples}] for every column."""
+    columns = connection.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+    stats = []
+    for _, name, kind, *_ in columns:
+        distinct, low, high = connection.execute(
+            f'SELECT COUNT(DISTINCT "{name}"), MIN("{name}"), MAX("{name}") FROM "{table_name}"'
+        ).fetchone()
+        examples = []
+        if kind.upper().startswith("TEXT"):
+            examples = [
+                row[0]
+                for row in connection.execute(
+                    f'SELECT "{name}" FROM "{table_name}" WHERE "{name}" IS NOT NULL '
+                    f'GROUP BY "{name}" ORDER BY COUNT(*) DESC LIMIT ?',
+                    (top_values,),
+                )
+            ]
+        stats.append(
+            {
+                "name": name,
+                "type": kind,
+                "distinct": distinct,
+                "min": low,
+                "max": high,
+                "examples": examples,
+            }
+        )
+    return stats
+
+
+def schema_summary(database_file_path, table_names=(TABLE_NAME,), top_values=3):
+    """Compact text description of the tables for an agent prompt."""
+    lines = []
+    connection = sqlite3.connect(f"file:{database_file_path}?mode=ro", uri=True)
+    try:
+        for table_name in table_names:
+            (row_count,) = connection.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()
+            lines.append(f"Table {table_name} ({row_count:,} rows):")
+            for column in column_stats(connection, table_name, top_values):
+                if column["examples"]:
+                    examples = ", ".join(repr(value) for value in column["examples"])
+                    detail = f"{column['distinct']:,} distinct, most common: {examples}"
+                elif isinstance(column["min"], (int, float)):
+                    detail = f"{column['min']:,.2f} to {column['max']:,.2f}"
+                else:
+                    detail = f"{column['distinct']:,} distinct"
+                lines.append(f"- {column['name']} {column['type'].split()[0]}: {detail}")
+    finally:
+        connection.close()
+    return "\n".join(lines)
+
+
+def index_report(database_file_path):
+    """Return {query label: (uses_index, plan lines)} for tool and agent queries."""
+    import helpers
+
+    queries = {
+        "get_avg_salary_and_female_count_for_division": (
+            helpers.AVG_SALARY_AND_FEMALE_COUNT_SQL,
+            ("ABS 85 Administration",),
+        ),
+        "get_total_overtime_pay_for_department": (
+            helpers.TOTAL_OVERTIME_PAY_SQL,
+            ("Alcohol Beverage Services",),
+        ),
+        "get_total_longevity_pay_for_grade": (helpers.TOTAL_LONGEVITY_PAY_SQL, ("M3",)),
+        "get_employee_count_by_gender_in_department": (
+            helpers.EMPLOYEE_COUNT_BY_GENDER_SQL,
+            ("Alcohol Beverage Services",),
+        ),
+        "get_employees_with_overtime_above (summary)": (
+            helpers.OVERTIME_ABOVE_SUMMARY_SQL,
+            (5000.0,),
+        ),
+        "get_employees_with_overtime_above (first page)": (
+            helpers.OVERTIME_ABOVE_FIRST_PAGE_SQL,
+            (5000.0,),
+        ),
+        "get_employees_with_overtime_above (next page)": (
+            helpers.OVERTIME_ABOVE_NEXT_PAGE_SQL,
+            (5000.0, 20000.0, 20000.0, 100),
+        ),
+        **AGENT_QUERIES,
+    }
+
+    report = {}
+    connection = sqlite3.connect(database_file_path)
+    try:
+        for label, (query, params) in queries.items():
+            plan = explain_query_plan(connection, query, params)
+            uses_index = any("INDEX" in line for line in plan)
+            report[label] = (uses_index, plan)
+    finally:
+        connection.close()
+    return report
+
+
+def print_index_report(database_file_path):
+    """Print the EXPLAIN QUERY PLAN report."""
+    print("=" * 80)
+    print("EXPLAIN QUERY PLAN REPORT")
+    print("=" * 80)
+    for label, (uses_index, plan) in index_report(database_file_path).items():
+        status = "✅" if uses_index else "⚠️  FULL SCAN"
+        print(f"\n{status} {label}")
+        for line in plan:
+            print(f"    {line}")
+
+
+if __name__ == "__main__":
+    print_index_report("./db/salary.db")
+    print(f"\n{schema_summary('./db/salary.db')}")
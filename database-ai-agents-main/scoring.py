@@ -0,0 +1,300 @@
+"""
+Benchmark Answer Scoring
+
+Scores free-text agent answers against the ground truth (ground_truth.py)
+without calling an LLM, so stored outputs can be re-scored in bulk:
+- Numbers are extracted with one compiled regex: thousands separators,
+  decimals, "$" amounts and $90k / $1.2M / "3 million" style suffixes
+- A number matches when it is within the question's tolerance, or when it
+  is the expected value rounded to the precision the answer shows and it
+  shows at least MIN_SIGNIFICANT_FIGURES digits ("$90,312" and "$90.3k"
+  both match 90312.17, "about $0.1M" doesn't)
+- Given the question, a scalar answer is the number nearest the
+  question's words ("There are 41 departments"), not any number in the
+  text; "It is not 42; there are 41 departments" doesn't match 42
+- Labeled mappings ({"M": 5929, "F": 4362}) match when every label
+  ("M", "male", "men", ...) has the expected number right after it or
+  right before it on the same line
+- Text answers (department, grade) match as whole words, case-insensitive
+- Patterns are compiled once per label set / text value and reused
+
+Usage:
+
+    score = score_answer(output, expected=92382.93, tolerance=1.0)
+    score["correct"]  # True / False
+
+Run `python scoring.py` to measure scoring throughput, or
+`python scoring.py outputs.jsonl` to re-score stored outputs (one JSON
+object per line with "output" and an "answer" key from ground_truth.py).
+"""
+
+import json
+import re
+import sys
+import time
+from functools import lru_cache
+
+NUMBER_PATTERN = re.compile(
+    r"(?<![\w.,])(?P<currency>\$\s?)?"
+    r"(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+    r"(?:\s?(?P<suffix>[kKmM]\b|thousand\b|million\b))?"
+)
+
+# Short suffixes only scale currency ("$90k"); "5929 M" means male, not millions
+SUFFIX_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6}
+
+# Ways an answer refers to a mapping label besides the label itself
+LABEL_ALIASES = {
+    "M": ("male", "males", "men", "man"),
+    "F": ("female", "females", "women", "woman"),
+}
+
+# How far (in characters, same line) a number may sit from its label
+LABEL_WINDOW_AFTER = 80
+LABEL_WINDOW_BEFORE = 30
+
+# A rounded number must show this many digits to match by precision
+MIN_SIGNIFICANT_FIGURES = 3
+
+# Question words that don't locate the answer in the text
+QUESTION_STOPWORDS = {
+    "a", "an", "and", "are", "by", "can", "do", "does", "for", "has", "have",
+    "how", "in", "is", "many", "much", "of", "on", "the", "there", "to",
+    "what", "which", "who", "with",
+}
+
+
+def extract_numbers(text):
+    """Every number in text as (value, shown, decimals, multiplier, start, end).
+
+    shown is the number as written (before any k/M multiplier) and decimals
+    its precision, so callers can compare at the precision of the answer.
+    """
+    numbers = []
+    for match in NUMBER_PATTERN.finditer(text):
+        raw = match.group("number")
+        shown = float(raw.replace(",", ""))
+        decimals = len(raw) - raw.index(".") - 1 if "." in raw else 0
+        suffix = (match.group("suffix") or "").lower()
+        multiplier = 1.0
+        if suffix and (match.group("currency") or len(suffix) > 1):
+            multiplier = SUFFIX_MULTIPLIERS[suffix]
+        numbers.append((shown * multiplier, shown, decimals, multiplier, match.start(), match.end()))
+    return numbers
+
+
+def significant_figures(shown, decimals):
+    """Digits shown, ignoring leading zeros ("0.10" -> 2, "90.3" -> 3, "90312" -> 5)."""
+    return len(f"{shown:.{decimals}f}".replace(".", "").lstrip("0")) or 1
+
+
+def number_matches(number, expected, tolerance=0.0):
+    """Whether an extracted number is the expected value (see module docstring)."""
+    value, shown, decimals, multiplier, _, _ = number
+    if abs(value - expected) <= tolerance:
+        return True
+    if significant_figures(shown, decimals) < MIN_SIGNIFICANT_FIGURES:
+        return False
+    return round(expected / multiplier, decimals) == shown
+
+
+@lru_cache(maxsize=256)
+def _word_pattern(text):
+    return re.compile(rf"(?<!\w){re.escape(text)}(?!\w)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def _label_pattern(label):
+    """Label as written (case-sensitive for one-letter codes) or any alias."""
+    aliases = "|".join(re.escape(alias) for alias in LABEL_ALIASES.get(label, ()))
+    own = re.escape(label) if len(label) == 1 else f"(?i:{re.escape(label)})"
+    return re.compile(rf"(?<!\w)(?:(?i:{aliases})|{own})(?!\w)" if aliases else rf"(?<!\w){own}(?!\w)")
+
+
+def _same_line(text, start, end):
+    return "\n" not in text[start:end]
+
+
+def _word_forms(word):
+    """A question word plus its singular/plural forms."""
+    singular = re.sub(r"ies$", "y", word) if len(word) > 4 else word
+    if singular == word and word.endswith("s") and len(word) > 3:
+        singular = word[:-1]
+    forms = {word, singular, singular + "s"}
+    if singular.endswith("y"):
+        forms.add(singular[:-1] + "ies")
+    return forms
+
+
+@lru_cache(maxsize=256)
+def _phrase_pattern(question):
+    """Any content word of the question (singular or plural), or None."""
+    words = {word.lower() for word in re.findall(r"[A-Za-z]+", question)} - QUESTION_STOPWORDS
+    forms = sorted({form for word in words for form in _word_forms(word)}, key=len, reverse=True)
+    if not forms:
+        return None
+    return re.compile(rf"(?<!\w)(?:{'|'.join(map(re.escape, forms))})(?!\w)", re.IGNORECASE)
+
+
+def answer_number(text, question, numbers=None):
+    """The number nearest the question's words (same line first); the first number without any."""
+    numbers = numbers if numbers is not None else extract_numbers(text)
+    if not numbers:
+        return None
+    pattern = _phrase_pattern(question)
+    mentions = [(m.start(), m.end()) for m in pattern.finditer(text)] if pattern is not None else []
+    if not mentions:
+        return numbers[0]
+
+    def distance(number):
+        return min(
+            (
+                not _same_line(text, min(number[5], start), max(number[4], end)),
+                max(start - number[5], number[4] - end, 0),
+            )
+            for start, end in mentions
+        )
+
+    return min(numbers, key=distance)
+
+
+def extract_mapping(text, labels, numbers=None):
+    """{label: [candidate numbers]} - the numbers next to each label mention."""
+    numbers = numbers if numbers is not None else extract_numbers(text)
+    candidates = {}
+    for label in labels:
+        found = candidates.setdefault(label, [])
+        for mention in _label_pattern(label).finditer(text):
+            after = next((n for n in numbers if n[4] >= mention.end()), None)
+            if (
+                after is not None
+                and after[4] - mention.end() <= LABEL_WINDOW_AFTER
+                and _same_line(text, mention.end(), after[4])
+            ):
+                found.append(after)
+            before = next((n for n in reversed(numbers) if n[5] <= mention.start()), None)
+            if (
+                before is not None
+                and mention.start() - before[5] <= LABEL_WINDOW_BEFORE
+                and _same_line(text, before[5], mention.start())
+            ):
+                found.append(before)
+    return candidates
+
+
+def score_answer(output, expected, tolerance=0.0, question=None):
+    """Score one answer: {"correct": bool, "found": ..., "expected": expected}.
+
+    expected may be a number, a string or a {label: number} mapping. With
+    the question, a number is judged by the one nearest the question's
+    words; without it (answers covering several parts) any number counts.
+    """
+    if not output:
+        return {"correct": False, "found": None, "expected": expected}
+
+    if isinstance(expected, str):
+        match = _word_pattern(expected).search(output)
+        return {"correct": match is not None, "found": match and match.group(0), "expected": expected}
+
+    numbers = extract_numbers(output)
+    if isinstance(expected, dict):
+        candidates = extract_mapping(output, tuple(expected), numbers)
+        found = {}
+        for label, value in expected.items():
+            hit = next((n for n in candidates[label] if number_matches(n, value, tolerance)), None)
+            found[label] = hit[0] if hit else None
+        return {
+            "correct": all(value is not None for value in found.values()),
+            "found": found,
+            "expected": expected,
+        }
+
+    if question is not None:
+        number = answer_number(output, question, numbers)
+        correct = number is not None and number_matches(number, expected, tolerance)
+        return {"correct": correct, "found": number[0] if number else None, "expected": expected}
+
+    hit = next((n for n in numbers if number_matches(n, expected, tolerance)), None)
+    return {"correct": hit is not None, "found": hit[0] if hit else None, "expected": expected}
+
+
+def score_query(output, query):
+    """Score an answer to one of ground_truth.benchmark_queries()."""
+    return score_answer(output, query["expected"], query.get("tolerance", 0.0), query.get("query"))
+
+
+def score_records(records, answers, tolerances=None, questions=None):
+    """Re-score stored outputs: records have "output" and an "answer" key.
+
+    tolerances and questions map answer keys to tolerances and question
+    text (default: those of ground_truth.BENCHMARK_QUERIES). Returns one
+    score per record.
+    """
+    if tolerances is None or questions is None:
+        from ground_truth import BENCHMARK_QUERIES
+
+        if tolerances is None:
+            tolerances = {query["answer"]: query.get("tolerance", 0.0) for query in BENCHMARK_QUERIES}
+        if questions is None:
+            questions = {query["answer"]: query["query"] for query in BENCHMARK_QUERIES}
+    return [
+        score_answer(
+            record.get("output"),
+            answers[record["answer"]],
+            tolerances.get(record["answer"], 0.0),
+            questions.get(record["answer"]),
+        )
+        for record in records
+    ]
+
+
+def _sample_outputs(answers):
+    """Typical agent phrasings of the benchmark answers (for the throughput run)."""
+    genders = answers["gender_counts"]
+    averages = answers["avg_base_salary_by_gender"]
+    return [
+        {"answer": "row_count", "output": f"The dataframe has {answers['row_count']:,} rows."},
+        {"answer": "avg_base_salary", "output": f"The average base salary is ${answers['avg_base_salary']:,.2f}."},
+        {"answer": "max_base_salary", "output": f"The highest base salary is **${answers['max_base_salary']:,.0f}**"},
+        {"answer": "unique_departments", "output": f"There are {answers['unique_departments']} unique departments."},
+        {
+            "answer": "gender_counts",
+            "output": f"There are {genders['M']:,} male employees and {genders['F']:,} female employees.",
+        },
+        {
+            "answer": "avg_base_salary_by_gender",
+            "output": f"- Female: ${averages['F']:,.2f}\n- Male: ${averages['M']:,.2f}",
+        },
+        {
+            "answer": "department_most_employees",
+            "output": f"The {answers['department_most_employees']} department has the most employees.",
+        },
+        {
+            "answer": "grade_highest_avg_base_salary",
+            "output": f"Grade {answers['grade_highest_avg_base_salary']} has the highest average "
+            f"(${answers['grade_highest_avg_base_salary_value'] / 1000:.1f}k).",
+        },
+    ]
+
+
+if __name__ == "__main__":
+    from ground_truth import load_ground_truth
+
+    answers = load_ground_truth()
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    else:
+        records = _sample_outputs(answers) * 2000
+
+    start_time = time.perf_counter()
+    scores = score_records(records, answers)
+    elapsed = time.perf_counter() - start_time
+
+    correct = sum(score["correct"] for score in scores)
+    print(f"Scored {len(scores):,} outputs in {elapsed * 1000:.1f} ms "
+          f"({len(scores) / elapsed:,.0f} outputs/s), {correct:,} correct")
+    if len(sys.argv) == 1 and correct != len(scores):
+        for record, score in zip(records, scores):
+            if not score["correct"]:
+                print(f"  MISSED {record['answer']}: {record['output']!r} -> {score}")
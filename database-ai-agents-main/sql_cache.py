@@ -0,0 +1,280 @@
+"""
+Generated-SQL Result Cache
+
+CachedSQLDatabase is a drop-in SQLDatabase for SQLDatabaseToolkit that
+caches `run` results, so repeated agent steps (the same aggregate with
+different whitespace/casing, re-checks of a query) don't hit the database:
+- SQL is normalized before keying: with sqlglot installed it is parsed and
+  re-rendered; otherwise a small lexer drops comments, collapses
+  whitespace and lowercases everything outside string literals (SQLite
+  keywords and identifiers are case-insensitive)
+- Only read-only statements (SELECT / WITH / VALUES / EXPLAIN without
+  write keywords) are cached; errors are never cached
+- Keys are (SQL fingerprint, fetch mode, parameters, data version); the
+  data version comes from loader.table_version, so a reload invalidates
+- Memory is bounded by total result bytes with LRU eviction
+- stats() reports hits, misses, bypasses, evictions and cached bytes
+- Schema discovery (sql_db_list_tables / sql_db_schema) is memoized per
+  data version too: table info with sample rows and the compact
+  schema.schema_summary() text are computed once and served from memory
+
+Example:
+
+    db = CachedSQLDatabase.from_uri(
+        "sqlite:///./db/salary.db",
+        version=lambda: table_version("./db/salary.db"),
+    )
+    toolkit = SQLDatabaseToolkit(db=db, llm=model)
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+from langchain_community.utilities import SQLDatabase
+
+from schema import schema_summary
+
+try:
+    import sqlglot
+except ImportError:
+    sqlglot = None
+
+MAX_CACHE_BYTES = 8 * 1024 * 1024
+
+READ_KEYWORDS = {"select", "with", "values", "explain"}
+WRITE_KEYWORDS = {
+    "insert", "update", "delete", "replace", "create", "drop", "alter",
+    "attach", "detach", "vacuum", "reindex", "analyze", "pragma", "begin",
+    "commit", "rollback", "savepoint", "release",
+}
+
+# Comments, quoted strings/identifiers, words, numbers, then any other symbol
+SQL_TOKEN = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|/\*.*?(?:\*/|$))
+    |(?P<quoted>'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+    |(?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+    |(?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+)
+    |(?P<space>\s+)
+    |(?P<symbol>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def _lex(sql):
+    """(kind, text) tokens without comments and whitespace."""
+    return [
+        (match.lastgroup, match.group())
+        for match in SQL_TOKEN.finditer(sql)
+        if match.lastgroup not in ("comment", "space")
+    ]
+
+
+def normalize_sql(sql, dialect="sqlite"):
+    """Canonical text for a statement; equivalent formatting maps to the same string."""
+    if sqlglot is not None:
+        try:
+            expressions = sqlglot.parse(sql, read=dialect)
+            return "; ".join(
+                expression.sql(dialect=dialect, normalize=True)
+                for expression in expressions
+                if expression is not None
+            )
+        except sqlglot.errors.SqlglotError:
+            pass  # fall back to the lexer
+    tokens = [text if kind == "quoted" else text.lower() for kind, text in _lex(sql)]
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    # Single spaces between tokens, none around "." or inside parentheses
+    normalized = []
+    for index, token in enumerate(tokens):
+        if index and token not in (".", ",", ")") and tokens[index - 1] not in (".", "("):
+            normalized.append(" ")
+        normalized.append(token)
+    return "".join(normalized)
+
+
+def is_read_only(sql):
+    """True for a single statement that can only read."""
+    tokens = _lex(sql)
+    while tokens and tokens[-1] == ("symbol", ";"):
+        tokens.pop()
+    if ("symbol", ";") in tokens:
+        return False  # more than one statement
+    words = [text.lower() for kind, text in tokens if kind == "word"]
+    if not words or words[0] not in READ_KEYWORDS:
+        return False
+    return not WRITE_KEYWORDS.intersection(words)
+
+
+def sql_fingerprint(sql, dialect="sqlite"):
+    """Short hash of the normalized statement."""
+    return hashlib.sha1(normalize_sql(sql, dialect).encode("utf-8")).hexdigest()
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """SQLDatabase whose run() serves repeated read-only queries from memory."""
+
+    def __init__(self, engine, *args, version=None, max_cache_bytes=MAX_CACHE_BYTES, **kwargs):
+        # Set before SQLDatabase.__init__, which already lists the tables
+        self.version = version  # callable returning the current data version
+        self.max_cache_bytes = max_cache_bytes
+        self._results = OrderedDict()  # key -> (result, size in bytes)
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "bypassed": 0, "evictions": 0, "schema_hits": 0}
+        self._schema_memo = {}  # (kind, args) -> text, for self._schema_version
+        self._schema_version = None
+        super().__init__(engine, *args, **kwargs)
+
+    def _cache_key(self, command, fetch, include_columns, parameters):
+        return (
+            sql_fingerprint(command, self.dialect),
+            fetch,
+            include_columns,
+            json.dumps(parameters, sort_keys=True, default=str) if parameters else None,
+            self._current_version(),
+        )
+
+    def run(self, command, fetch="all", include_columns=False, *, parameters=None, execution_options=None):
+        if fetch == "cursor" or not isinstance(command, str) or not is_read_only(command):
+            with self._lock:
+                self.counters["bypassed"] += 1
+            return super().run(
+                command,
+                fetch,
+                include_columns,
+                parameters=parameters,
+                execution_options=execution_options,
+            )
+
+        key = self._cache_key(command, fetch, include_columns, parameters)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.counters["hits"] += 1
+                return cached[0]
+            self.counters["misses"] += 1
+
+        result = super().run(
+            command,
+            fetch,
+            include_columns,
+            parameters=parameters,
+            execution_options=execution_options,
+        )
+        size = len(result.encode("utf-8")) if isinstance(result, str) else len(repr(result))
+        if size > self.max_cache_bytes:
+            return result
+        with self._lock:
+            if key in self._results:
+                self._cached_bytes -= self._results.pop(key)[1]
+            self._results[key] = (result, size)
+            self._cached_bytes += size
+            while self._cached_bytes > self.max_cache_bytes:
+                _, (_, evicted_size) = self._results.popitem(last=False)
+                self._cached_bytes -= evicted_size
+                self.counters["evictions"] += 1
+        return result
+
+    def _current_version(self):
+        return self.version() if self.version is not None else None
+
+    def _memoized_schema(self, key, compute):
+        version = self._current_version()
+        with self._lock:
+            if version != self._schema_version:
+                self._schema_memo.clear()
+                self._schema_version = version
+            if key in self._schema_memo:
+                self.counters["schema_hits"] += 1
+                return self._schema_memo[key]
+        value = compute()
+        with self._lock:
+            self._schema_memo[key] = value
+        return value
+
+    def get_usable_table_names(self):
+        """Data tables only; bookkeeping tables such as _ingest_metadata start with "_"."""
+        return self._memoized_schema(
+            ("tables",),
+            lambda: [
+                name
+                for name in super(CachedSQLDatabase, self).get_usable_table_names()
+                if not name.startswith("_")
+            ],
+        )
+
+    def get_table_info(self, table_names=None):
+        key = ("table_info", tuple(sorted(table_names)) if table_names else None)
+        return self._memoized_schema(
+            key, lambda: super(CachedSQLDatabase, self).get_table_info(table_names)
+        )
+
+    def schema_summary(self, table_names=None):
+        """Compact schema text (see schema.schema_summary); defaults to the data tables."""
+        table_names = tuple(table_names or self.get_usable_table_names())
+        return self._memoized_schema(
+            ("summary", table_names),
+            lambda: schema_summary(self._engine.url.database, table_names),
+        )
+
+    def warm_schema(self):
+        """Precompute the table list, table info and summary for the current version."""
+        self.get_table_info()
+        for table_name in self.get_usable_table_names():
+            self.get_table_info([table_name])
+        return self.schema_summary()
+
+    def clear_cache(self):
+        with self._lock:
+            self._results.clear()
+            self._cached_bytes = 0
+            self._schema_memo.clear()
+
+    def stats(self):
+        """Hit/miss counters, hit rate and cached entries/bytes."""
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._results),
+                "cached_bytes": self._cached_bytes,
+            }
+
+
+if __name__ == "__main__":
+    import time
+
+    from loader import table_version
+
+    database_file_path = "./db/salary.db"
+    db = CachedSQLDatabase.from_uri(
+        f"sqlite:///{database_file_path}",
+        version=lambda: table_version(database_file_path),
+    )
+    queries = [
+        "SELECT Department_Name, AVG(Base_Salary) FROM salaries_2023 GROUP BY Department_Name ORDER BY 2 DESC LIMIT 5;",
+        "select department_name, avg(base_salary)\nfrom SALARIES_2023\ngroup by department_name order by 2 desc limit 5",
+        "SELECT Department_Name, AVG(Base_Salary)  -- same query\nFROM salaries_2023 GROUP BY Department_Name ORDER BY 2 DESC LIMIT 5",
+        "SELECT COUNT(*) FROM salaries_2023 WHERE Gender = 'F'",
+        "SELECT COUNT(*) FROM salaries_2023 WHERE Gender = 'f'",
+    ]
+    for query in queries:
+        start_time = time.perf_counter()
+        db.run(query)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        print(f"{elapsed_ms:8.2f} ms  {normalize_sql(query)}")
+    start_time = time.perf_counter()
+    db.warm_schema()
+    print(f"\nSchema warm-up: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+    start_time = time.perf_counter()
+    db.get_table_info(["salaries_2023"])
+    print(f"Cached table info: {(time.perf_counter() - start_time) * 1000:.3f} ms")
+    print(db.stats())
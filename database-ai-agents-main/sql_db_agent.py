@@ -3,7 +3,9 @@ from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 import pandas as pd
 
-from sqlalchemy import create_engine
+from answer_cache import AnswerCache
+from loader import load_salary_csv, table_version
+from sql_cache import CachedSQLDatabase
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,6 +19,7 @@ model = ChatOpenAI(api_key=openai_key, model=llm_name)
 from langchain.agents import create_sql_agent
 from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
 from langchain_community.utilities import SQLDatabase
+import streamlit as st
 
 # create a db from csv file
 
@@ -24,13 +27,9 @@ from langchain_community.utilities import SQLDatabase
 database_file_path = "./db/salary.db"
 
 
-# Create an engine to connect to the SQLite database
-# SQLite only requires the path to the database file
-engine = create_engine(f"sqlite:///{database_file_path}")
 file_url = "./data/salaries_2023.csv"
-os.makedirs(os.path.dirname(database_file_path), exist_ok=True)
-df = pd.read_csv(file_url).fillna(value=0)
-df.to_sql("salaries_2023", con=engine, if_exists="replace", index=False)
+# skips the ingest entirely when the CSV hasn't changed since the last load
+load_salary_csv(file_url, database_file_path)
 
 # print(f"Database created successfully! {df}")
 
@@ -66,6 +65,13 @@ part of the explanation section.
 below tools to construct your query and final answer.
 - Do not make up table names, only use the tables returned by any of the
 tools below.
+- For counts, sums, averages, minimums or maximums grouped or filtered by
+Department, Department_Name, Division, Gender or Grade, query the
+pre-aggregated `salaries_2023_cube` table first: each row is one combination
+of those columns with `row_count` and, for Base_Salary, Overtime_Pay and
+Longevity_Pay, `<column>_sum`, `<column>_min` and `<column>_max`
+(average = SUM(<column>_sum) / SUM(row_count)). Use `salaries_2023` for
+anything the cube cannot answer.
 - as part of your final answer, please include the SQL query you used in json format or code format
 
 ## Tools:
@@ -115,25 +121,60 @@ SELECT [salary] FROM xyztable WHERE department = 'IGM' AND date LIKE '2020%'"
 """
 
 
-db = SQLDatabase.from_uri(f"sqlite:///{database_file_path}")
-toolkit = SQLDatabaseToolkit(db=db, llm=model)
+# Give the agent the schema up front so it can skip the sql_db_list_tables /
+# sql_db_schema discovery turns; computed once per data version
+INJECT_SCHEMA_SUMMARY = True
+
+
+def build_sql_agent(db, toolkit):
+    """SQL agent whose prompt carries the schema summary of the current data."""
+    agent_prefix = MSSQL_AGENT_PREFIX
+    if INJECT_SCHEMA_SUMMARY:
+        summary = db.warm_schema().replace("{", "{{").replace("}", "}}")
+        agent_prefix = MSSQL_AGENT_PREFIX.replace(
+            "## Tools:",
+            "## Schema (current, no need to look it up with tools):\n"
+            f"{summary}\n\n## Tools:",
+        )
+    return create_sql_agent(
+        prefix=agent_prefix,
+        format_instructions=MSSQL_AGENT_FORMAT_INSTRUCTIONS,
+        llm=model,
+        toolkit=toolkit,
+        top_k=30,
+        verbose=True,
+    )
+
 
 QUESTION = """what is the highest average salary by department, and give me the number?"
 """
-sql_agent = create_sql_agent(
-    prefix=MSSQL_AGENT_PREFIX,
-    format_instructions=MSSQL_AGENT_FORMAT_INSTRUCTIONS,
-    llm=model,
-    toolkit=toolkit,
-    top_k=30,
-    verbose=True,
-)
 
-# res = sql_agent.invoke(QUESTION)
 
-# print(res)
+# Built once per data version: Streamlit reruns reuse it, and a reload changes
+# the key so the agent (and its row counts/ranges) is rebuilt. The db lives
+# here too, so identical or reformatted read-only queries from the agent are
+# served from its result cache across reruns until the data is reloaded.
+@st.cache_resource
+def get_sql_agent(version):
+    db = CachedSQLDatabase.from_uri(
+        f"sqlite:///{database_file_path}",
+        version=lambda: table_version(database_file_path),
+    )
+    return build_sql_agent(db, SQLDatabaseToolkit(db=db, llm=model))
 
-import streamlit as st
+
+# Repeated or paraphrased questions skip the agent loop; a reload of the
+# data clears the cache. cache_resource keeps it across Streamlit reruns.
+@st.cache_resource
+def get_answer_cache():
+    return AnswerCache(version=lambda: table_version(database_file_path))
+
+
+answer_cache = get_answer_cache()
+
+# res = answer_cache.cached_invoke(get_sql_agent(table_version(database_file_path)).invoke, QUESTION)
+
+# print(res)
 
 st.title("SQL Query AI Agent")
 
@@ -141,7 +182,9 @@ question = st.text_input("Enter your query:")
 
 if st.button("Run Query"):
     if question:
-        res = sql_agent.invoke(question)
+        res = answer_cache.cached_invoke(
+            lambda prompt: get_sql_agent(table_version(database_file_path)).invoke(prompt), question
+        )
 
         st.markdown(res["output"])
 else:
@@ -0,0 +1,132 @@
+"""
+Tool Execution Benchmark: per-call SQLAlchemy + pandas vs pooled SQLite
+
+Measures calls/sec for the helpers.py queries, sequentially and under
+concurrent tool calls, comparing:
+- Legacy: f-string query, fresh engine connection, pd.read_sql_query
+- Pooled: the same base-table queries, parameterized, through the
+  per-thread read-only connection pool (cached statements, plain dict rows)
+- Cube: the helpers.py tools as the agents call them, answered from the
+  precomputed aggregate cube (cube.py) through the pool
+
+Also reports the tool registry's dispatch overhead (argument parsing,
+validation and lookup) per call.
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+import helpers
+
+DIVISION = "ABS 85 Administration"
+DEPARTMENT = "Alcohol Beverage Services"
+GRADE = "M3"
+
+CALLS = 2000
+THREADS = 8
+
+engine = create_engine(f"sqlite:///{helpers.database_file_path}")
+
+
+def legacy_query(query):
+    """The original helpers.py path: new connection + DataFrame per call."""
+    with engine.connect() as connection:
+        result = pd.read_sql_query(text(query), connection)
+    return result.to_dict("records")
+
+
+legacy_tools = [
+    lambda: legacy_query(
+        f"""SELECT AVG(Base_Salary) AS avg_salary, COUNT(*) AS female_count
+        FROM salaries_2023 WHERE Division = '{DIVISION}' AND Gender = 'F';"""
+    ),
+    lambda: legacy_query(
+        f"""SELECT SUM(Overtime_Pay) AS total_overtime_pay
+        FROM salaries_2023 WHERE Department_Name = '{DEPARTMENT}';"""
+    ),
+    lambda: legacy_query(
+        f"""SELECT SUM(Longevity_Pay) AS total_longevity_pay
+        FROM salaries_2023 WHERE Grade = '{GRADE}';"""
+    ),
+    lambda: legacy_query(
+        f"""SELECT Gender, COUNT(*) AS employee_count FROM salaries_2023
+        WHERE Department_Name = '{DEPARTMENT}' GROUP BY Gender;"""
+    ),
+]
+
+pooled_tools = [
+    lambda: helpers.pool.fetch_one(helpers.AVG_SALARY_AND_FEMALE_COUNT_SQL, (DIVISION,)),
+    lambda: helpers.pool.fetch_one(helpers.TOTAL_OVERTIME_PAY_SQL, (DEPARTMENT,)),
+    lambda: helpers.pool.fetch_one(helpers.TOTAL_LONGEVITY_PAY_SQL, (GRADE,)),
+    lambda: helpers.pool.fetch_all(helpers.EMPLOYEE_COUNT_BY_GENDER_SQL, (DEPARTMENT,)),
+]
+
+cube_tools = [
+    lambda: helpers.get_avg_salary_and_female_count_for_division(DIVISION),
+    lambda: helpers.get_total_overtime_pay_for_department(DEPARTMENT),
+    lambda: helpers.get_total_longevity_pay_for_grade(GRADE),
+    lambda: helpers.get_employee_count_by_gender_in_department(DEPARTMENT),
+]
+
+
+def run_sequential(tools, calls):
+    """Return calls/sec running the tools round-robin on one thread."""
+    start_time = time.perf_counter()
+    for i in range(calls):
+        tools[i % len(tools)]()
+    return calls / (time.perf_counter() - start_time)
+
+
+def run_concurrent(tools, calls, threads):
+    """Return calls/sec running the tools round-robin on a thread pool."""
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda i: tools[i % len(tools)](), range(calls)))
+    return calls / (time.perf_counter() - start_time)
+
+
+def measure_dispatch_overhead(calls):
+    """Mean µs per call spent in registry dispatch vs a direct function call."""
+    arguments = json.dumps({"grade": GRADE})
+    for _ in range(20):
+        helpers.registry.dispatch("get_total_longevity_pay_for_grade", arguments)
+    tool = helpers.registry.tools["get_total_longevity_pay_for_grade"]
+    tool.calls = 0
+    tool.overhead_seconds = tool.call_seconds = 0.0
+    for _ in range(calls):
+        helpers.registry.dispatch("get_total_longevity_pay_for_grade", arguments)
+    return helpers.registry.stats()["get_total_longevity_pay_for_grade"]
+
+
+def main():
+    print("=" * 80)
+    print("TOOL EXECUTION BENCHMARK")
+    print("=" * 80)
+    print(f"Calls per run: {CALLS} | Threads (concurrent): {THREADS}\n")
+
+    paths = [("Legacy", legacy_tools), ("Pooled", pooled_tools), ("Cube (tools)", cube_tools)]
+    # Warm up every path (engine pool, page cache, statement cache)
+    for _, tools in paths:
+        run_sequential(tools, 20)
+
+    rates = {label: (run_sequential(tools, CALLS), run_concurrent(tools, CALLS, THREADS)) for label, tools in paths}
+    legacy_seq, legacy_conc = rates["Legacy"]
+
+    print(f"{'Path':<15} {'Sequential (calls/s)':>22} {'Speedup':>9} {'Concurrent (calls/s)':>22} {'Speedup':>9}")
+    print("-" * 80)
+    for label, (seq, conc) in rates.items():
+        print(f"{label:<15} {seq:>22,.0f} {seq / legacy_seq:>8.1f}x {conc:>22,.0f} {conc / legacy_conc:>8.1f}x")
+    print("\nPooled vs legacy: same base-table queries; cube adds the precomputed aggregates")
+
+    stats = measure_dispatch_overhead(CALLS)
+    print(f"\nRegistry dispatch ({stats['calls']} calls): "
+          f"{stats['overhead_us']:.1f} µs overhead vs {stats['call_us']:.1f} µs in the tool "
+          f"({stats['overhead_us'] / (stats['overhead_us'] + stats['call_us']) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Compact Tool-Result Encoding
+
+Serializes tool results for the model instead of `str(result)`:
+- Lists of row dicts become columnar tables: {"columns": [...], "rows": [[...]]}
+  (header once, rows as arrays)
+- Floats are rounded; NaN/inf become null, same as None
+- Minimal JSON separators
+
+Run `python tool_encoding.py` to compare token counts of str() vs the
+compact encoding for each helpers.py tool.
+"""
+
+import json
+import math
+
+import numpy as np
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+FLOAT_DIGITS = 2
+TOKEN_ENCODING = "cl100k_base"
+
+_encoder = None
+
+
+def _normalize(value, float_digits):
+    """Recursively convert a tool result into compact, JSON-safe values."""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        if not math.isfinite(value):
+            return None
+        rounded = round(value, float_digits)
+        return int(rounded) if rounded.is_integer() else rounded
+    if isinstance(value, dict):
+        return {str(key): _normalize(item, float_digits) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            columns = list(value[0])
+            if all(list(item) == columns for item in value):
+                return {
+                    "columns": columns,
+                    "rows": [
+                        [_normalize(item[column], float_digits) for column in columns]
+                        for item in value
+                    ],
+                }
+        return [_normalize(item, float_digits) for item in value]
+    return value
+
+
+def encode_tool_result(result, float_digits=FLOAT_DIGITS):
+    """Encode a tool result as compact JSON for a tool message."""
+    if isinstance(result, str):
+        # Some tools already return JSON (possibly with NaN); re-encode it
+        try:
+            result = json.loads(result)
+        except ValueError:
+            return result
+    return json.dumps(
+        _normalize(result, float_digits),
+        separators=(",", ":"),
+        ensure_ascii=False,
+        allow_nan=False,
+    )
+
+
+def count_tokens(text):
+    """Prompt tokens for text (cl100k_base via tiktoken, else ~4 chars/token)."""
+    global _encoder
+    if _encoder is None:
+        _encoder = False
+        if tiktoken is not None:
+            try:
+                _encoder = tiktoken.get_encoding(TOKEN_ENCODING)
+            except Exception as e:  # BPE file is downloaded on first use
+                print(f"tiktoken unavailable, estimating tokens: {e.__class__.__name__}")
+    if not _encoder:
+        return max(1, len(text) // 4)
+    return len(_encoder.encode(text))
+
+
+def payload_report(result):
+    """Token counts for str(result) vs the compact encoding."""
+    before = count_tokens(str(result))
+    after = count_tokens(encode_tool_result(result))
+    return {"str_tokens": before, "encoded_tokens": after, "saved": before - after}
+
+
+if __name__ == "__main__":
+    import helpers
+
+    samples = {
+        "get_avg_salary_and_female_count_for_division": helpers.get_avg_salary_and_female_count_for_division(
+            "ABS 85 Administration"
+        ),
+        "get_total_overtime_pay_for_department": helpers.get_total_overtime_pay_for_department(
+            "Alcohol Beverage Services"
+        ),
+        "get_total_longevity_pay_for_grade": helpers.get_total_longevity_pay_for_grade("M3"),
+        "get_employee_count_by_gender_in_department": helpers.get_employee_count_by_gender_in_department(
+            "Alcohol Beverage Services"
+        ),
+        "get_employees_with_overtime_above": helpers.get_employees_with_overtime_above(5000),
+    }
+
+    print(f"{'Tool':<46} {'str()':>8} {'compact':>8} {'saved':>8}")
+    print("-" * 74)
+    for name, result in samples.items():
+        report = payload_report(result)
+        print(
+            f"{name:<46} {report['str_tokens']:>8} {report['encoded_tokens']:>8} "
+            f"{report['saved'] / report['str_tokens'] * 100:>7.0f}%"
+        )
@@ -0,0 +1,197 @@
+"""
+Tool Registry for Function Calling
+
+Each tool function is registered once with a decorator; the registry
+- generates the OpenAI JSON schema from the signature and type hints
+- validates and coerces model-supplied arguments (unknown ones are dropped)
+- dispatches through a precomputed name -> tool table
+- counts calls and measures dispatch overhead vs time spent in the tool
+- encodes results compactly for the model (see tool_encoding.py)
+
+Example:
+
+    registry = ToolRegistry()
+
+    @registry.tool(
+        "Retrieves the total longevity pay for a specific grade.",
+        grade="The grade of the employees (e.g., 'M3', 'N25').",
+    )
+    def get_total_longevity_pay_for_grade(grade: str):
+        ...
+"""
+
+import inspect
+import json
+import threading
+import time
+
+from tool_encoding import encode_tool_result
+
+JSON_TYPES = {str: "string", float: "number", int: "integer", bool: "boolean"}
+
+
+class ToolArgumentError(ValueError):
+    """Raised when the model's arguments don't match the tool signature."""
+
+
+def _coerce_boolean(value):
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("true", "1", "yes"):
+            return True
+        if lowered in ("false", "0", "no"):
+            return False
+        raise ValueError(f"not a boolean: {value!r}")
+    return bool(value)
+
+
+def _coerce_string(value):
+    if isinstance(value, (list, dict)):
+        raise TypeError(f"not a string: {value!r}")
+    return str(value)
+
+
+def _coerce_integer(value):
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(f"not an integer: {value!r}")
+    return int(number)
+
+
+COERCERS = {
+    "string": _coerce_string,
+    "number": float,
+    "integer": _coerce_integer,
+    "boolean": _coerce_boolean,
+}
+
+
+def _clean(text):
+    """Collapse the indentation of triple-quoted descriptions."""
+    return " ".join(text.split())
+
+
+class Tool:
+    """A registered function plus its schema and precomputed argument plan."""
+
+    def __init__(self, function, description, param_descriptions):
+        self.function = function
+        self.name = function.__name__
+        self.calls = 0
+        self.overhead_seconds = 0.0
+        self.call_seconds = 0.0
+
+        # (name, coercer, required, default) per parameter, in signature order
+        self.parameters = []
+        properties = {}
+        required = []
+        for parameter in inspect.signature(function).parameters.values():
+            json_type = JSON_TYPES.get(parameter.annotation, "string")
+            properties[parameter.name] = {"type": json_type}
+            if parameter.name in param_descriptions:
+                properties[parameter.name]["description"] = _clean(
+                    param_descriptions[parameter.name]
+                )
+            is_required = parameter.default is inspect.Parameter.empty
+            if is_required:
+                required.append(parameter.name)
+            self.parameters.append(
+                (parameter.name, COERCERS[json_type], is_required, parameter.default)
+            )
+
+        self.schema = {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": _clean(description),
+                "parameters": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": required,
+                },
+            },
+        }
+
+    def bind(self, arguments):
+        """Validate and coerce raw arguments into keyword arguments."""
+        kwargs = {}
+        for name, coerce, required, default in self.parameters:
+            value = arguments.get(name)
+            if value is None:
+                if required:
+                    raise ToolArgumentError(f"{self.name}: missing argument '{name}'")
+                kwargs[name] = default
+                continue
+            try:
+                kwargs[name] = coerce(value)
+            except (TypeError, ValueError) as e:
+                raise ToolArgumentError(f"{self.name}: bad argument '{name}': {e}") from e
+        return kwargs
+
+
+class ToolRegistry:
+    """Name -> Tool table shared by every function-calling entry point."""
+
+    def __init__(self):
+        self.tools = {}
+        self._stats_lock = threading.Lock()  # tools run concurrently (tool_runner.py)
+
+    def tool(self, description, **param_descriptions):
+        """Decorator registering a function as a tool."""
+
+        def register(function):
+            tool = Tool(function, description, param_descriptions)
+            self.tools[tool.name] = tool
+            return function
+
+        return register
+
+    def schemas(self):
+        """OpenAI `tools=` list for every registered tool."""
+        return [tool.schema for tool in self.tools.values()]
+
+    def dispatch(self, name, arguments):
+        """Call a tool by name; arguments may be a dict or a JSON string."""
+        start_time = time.perf_counter()
+        try:
+            tool = self.tools[name]
+        except KeyError:
+            raise ToolArgumentError(f"Unknown tool: {name}") from None
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        if not isinstance(arguments, dict):
+            raise ToolArgumentError(
+                f"{name}: arguments must be a JSON object, got {type(arguments).__name__}"
+            )
+        kwargs = tool.bind(arguments)
+
+        call_start = time.perf_counter()
+        try:
+            return tool.function(**kwargs)
+        finally:
+            end_time = time.perf_counter()
+            with self._stats_lock:
+                tool.calls += 1
+                tool.overhead_seconds += call_start - start_time
+                tool.call_seconds += end_time - call_start
+
+    def execute(self, tool_call):
+        """Run an OpenAI tool call object and return its result as message content."""
+        try:
+            result = self.dispatch(tool_call.function.name, tool_call.function.arguments)
+        except (ToolArgumentError, json.JSONDecodeError) as e:
+            # Let the model see the problem and retry instead of crashing the loop
+            return json.dumps({"error": str(e)})
+        return encode_tool_result(result)
+
+    def stats(self):
+        """Per-tool call counts, mean dispatch overhead and mean call time (µs)."""
+        with self._stats_lock:
+            return {
+                name: {
+                    "calls": tool.calls,
+                    "overhead_us": tool.overhead_seconds / tool.calls * 1e6 if tool.calls else 0.0,
+                    "call_us": tool.call_seconds / tool.calls * 1e6 if tool.calls else 0.0,
+                }
+                for name, tool in self.tools.items()
+            }
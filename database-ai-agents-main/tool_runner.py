@@ -0,0 +1,115 @@
+"""
+Async Tool-Calling Conversation Runner
+
+Drives a chat-completions tool loop:
+- All tool calls of a turn run concurrently (DB tools in a thread pool)
+- One follow-up completion per turn carrying every tool result
+- Multi-turn tool loops bounded by a max-step budget; when the budget is
+  spent the model is asked to answer without tools
+- Per-turn latency breakdown (LLM vs tool time) and tool payload tokens
+"""
+
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tool_encoding import count_tokens
+
+MAX_STEPS = 5
+TOOL_WORKERS = 8
+
+# Shared pool for blocking tool functions (SQLite, pandas)
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+
+
+async def _timed_tool(execute_tool, tool_call, executor):
+    loop = asyncio.get_running_loop()
+    start_time = time.perf_counter()
+    # Run in a copy of this task's context so the active tracer (tracing.py) follows
+    context = contextvars.copy_context()
+    content = await loop.run_in_executor(executor, context.run, execute_tool, tool_call)
+    return content, time.perf_counter() - start_time
+
+
+async def run_tool_loop(
+    client,
+    model,
+    messages,
+    tools,
+    execute_tool,
+    max_steps=MAX_STEPS,
+    executor=None,
+):
+    """Run the conversation until the model answers without tool calls.
+
+    client is an AsyncOpenAI client; execute_tool(tool_call) -> str is called
+    in the executor for every tool call. messages is extended in place.
+    Returns (final_response, turns) where turns is a list of
+    {"step", "llm_seconds", "tool_seconds", "tool_calls", "tool_tokens"} dicts.
+    """
+    executor = executor or tool_executor
+    turns = []
+
+    for step in range(1, max_steps + 2):
+        budget_spent = step > max_steps
+        request = {"model": model, "messages": messages, "tools": tools}
+        # Out of steps: still show the tools for context, but force an answer
+        request["tool_choice"] = "none" if budget_spent else "auto"
+
+        start_time = time.perf_counter()
+        response = await client.chat.completions.create(**request)
+        llm_seconds = time.perf_counter() - start_time
+
+        response_message = response.choices[0].message
+        tool_calls = response_message.tool_calls or []
+        turn = {
+            "step": step,
+            "llm_seconds": llm_seconds,
+            "tool_seconds": 0.0,
+            "tool_calls": 0,
+            "tool_tokens": 0,
+        }
+        turns.append(turn)
+        if not tool_calls or budget_spent:
+            return response, turns
+
+        messages.append(response_message)  # extend conversation with assistant's reply
+
+        # Execute every tool call of this turn concurrently
+        start_time = time.perf_counter()
+        results = await asyncio.gather(
+            *(_timed_tool(execute_tool, tool_call, executor) for tool_call in tool_calls)
+        )
+        turn["tool_seconds"] = time.perf_counter() - start_time
+        turn["tool_calls"] = len(tool_calls)
+
+        for tool_call, (content, _) in zip(tool_calls, results):
+            turn["tool_tokens"] += count_tokens(content)
+            messages.append(
+                {
+                    "tool_call_id": tool_call.id,
+                    "role": "tool",
+                    "name": tool_call.function.name,
+                    "content": content,
+                }
+            )  # extend conversation with function responses
+
+    return response, turns
+
+
+def print_latency_report(turns):
+    """Print the per-turn LLM vs tool latency breakdown."""
+    print(f"\n{'Step':>4} {'LLM (s)':>10} {'Tools (s)':>10} {'Calls':>6} {'Tool tokens':>12}")
+    print("-" * 47)
+    for turn in turns:
+        print(
+            f"{turn['step']:>4} {turn['llm_seconds']:>10.2f} "
+            f"{turn['tool_seconds']:>10.3f} {turn['tool_calls']:>6} {turn['tool_tokens']:>12}"
+        )
+    llm_total = sum(turn["llm_seconds"] for turn in turns)
+    tool_total = sum(turn["tool_seconds"] for turn in turns)
+    calls_total = sum(turn["tool_calls"] for turn in turns)
+    tokens_total = sum(turn["tool_tokens"] for turn in turns)
+    print("-" * 47)
+    print(f"{'All':>4} {llm_total:>10.2f} {tool_total:>10.3f} {calls_total:>6} {tokens_total:>12}")
@@ -0,0 +1,277 @@
+"""
+Agent Run Tracing
+
+Records where the seconds of an agent run go, as spans:
+- AgentTracer is a LangChain callback handler: one span per LLM call
+  (tokens in/out, time to first token when streaming), per tool call and
+  for the whole agent invocation
+- instrument_repl_tool() times the pandas code inside the
+  python_repl_ast tool; instrument_registry() times the helpers.py tools
+- The active tracer is a context variable, so it follows asyncio tasks
+  and executor threads that run with a copied context
+  (contextvars.copy_context().run, as tool_runner.py and
+  assistant_runner.py do)
+- Framework overhead = agent time - LLM time - tool time
+- Spans export as JSON or Chrome trace format (open in chrome://tracing
+  or https://ui.perfetto.dev)
+
+Usage:
+
+    tracer = AgentTracer("gpt-4.1-mini / Q1")
+    with tracer.activate():
+        agent.invoke(query, config={"callbacks": [tracer]})
+    print(tracer.summary())
+    write_chrome_trace([tracer], "./data/traces/run.json")
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from usage import is_replayed, model_name, usage_from_result
+
+_active_tracer = contextvars.ContextVar("active_tracer", default=None)
+
+
+def active_tracer():
+    """The tracer activated in the current context, if any."""
+    return _active_tracer.get()
+
+
+class AgentTracer(BaseCallbackHandler):
+    """Collect llm / tool / agent spans for one agent run (plus manual spans)."""
+
+    def __init__(self, name="agent run"):
+        self.name = name
+        self.spans = []
+        self._open = {}  # run_id -> span
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, name, category, **attrs):
+        span = {
+            "name": name,
+            "category": category,
+            "start": time.perf_counter(),
+            "end": None,
+            "thread": threading.get_ident(),
+            "attrs": attrs,
+        }
+        with self._lock:
+            self._open[run_id] = span
+        return span
+
+    def _finish(self, run_id, **attrs):
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return None
+            span["end"] = time.perf_counter()
+            span["attrs"].update(attrs)
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name, category, **attrs):
+        """Time a block as a span (used by the tool instrumentation)."""
+        key = object()
+        self._start(key, name, category, **attrs)
+        try:
+            yield
+        finally:
+            self._finish(key)
+
+    @contextmanager
+    def activate(self):
+        """Route instrumented helper/pandas spans in this context to this tracer."""
+        token = _active_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _active_tracer.reset(token)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:  # the agent invocation itself
+            self._start(run_id, kwargs.get("name") or "agent", "agent")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=str(error))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, model_name(serialized, kwargs) or "llm", "llm", first_token=None)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, model_name(serialized, kwargs) or "llm", "llm", first_token=None)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            span = self._open.get(run_id)
+            if span is not None and span["attrs"]["first_token"] is None:
+                span["attrs"]["first_token"] = time.perf_counter() - span["start"]
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens, _, output_tokens = usage_from_result(response)
+        self._finish(
+            run_id, input_tokens=input_tokens, output_tokens=output_tokens, replayed=is_replayed(response)
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=str(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, (serialized or {}).get("name") or kwargs.get("name") or "tool", "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=str(error))
+
+    def _seconds(self, category):
+        return sum(span["end"] - span["start"] for span in self.spans if span["category"] == category)
+
+    def summary(self):
+        """Totals per category, token counts and framework overhead (seconds)."""
+        llm_spans = [span for span in self.spans if span["category"] == "llm"]
+        first_tokens = [
+            span["attrs"]["first_token"] for span in llm_spans if span["attrs"].get("first_token") is not None
+        ]
+        agent_seconds = self._seconds("agent")
+        llm_seconds = self._seconds("llm")
+        tool_seconds = self._seconds("tool")
+        return {
+            "agent_seconds": agent_seconds,
+            "llm_seconds": llm_seconds,
+            "llm_calls": len(llm_spans),
+            "input_tokens": sum(span["attrs"].get("input_tokens", 0) for span in llm_spans),
+            "output_tokens": sum(span["attrs"].get("output_tokens", 0) for span in llm_spans),
+            "time_to_first_token": sum(first_tokens) / len(first_tokens) if first_tokens else None,
+            "tool_seconds": tool_seconds,
+            "tool_calls": sum(1 for span in self.spans if span["category"] == "tool"),
+            "pandas_seconds": self._seconds("pandas"),
+            "helper_seconds": self._seconds("helper"),
+            "overhead_seconds": max(agent_seconds - llm_seconds - tool_seconds, 0.0),
+        }
+
+    def to_json(self):
+        """Spans as plain dicts with times relative to the first span."""
+        origin = min((span["start"] for span in self.spans), default=0.0)
+        return {
+            "name": self.name,
+            "summary": self.summary(),
+            "spans": [
+                {
+                    **span,
+                    "start": span["start"] - origin,
+                    "end": span["end"] - origin,
+                }
+                for span in sorted(self.spans, key=lambda span: span["start"])
+            ],
+        }
+
+    def chrome_events(self, pid=None):
+        """Chrome trace "complete" events (µs) for this tracer's spans."""
+        pid = pid if pid is not None else os.getpid()
+        return [
+            {
+                "name": span["name"],
+                "cat": span["category"],
+                "ph": "X",
+                "ts": span["start"] * 1e6,
+                "dur": (span["end"] - span["start"]) * 1e6,
+                "pid": pid,
+                "tid": span["thread"],
+                "args": {"run": self.name, **span["attrs"]},
+            }
+            for span in self.spans
+        ]
+
+
+def write_chrome_trace(tracers, path):
+    """Write the spans of several tracers into one Chrome trace file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    events = [event for tracer in tracers for event in tracer.chrome_events()]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def write_trace_json(tracers, path):
+    """Write the spans and summaries of several tracers as JSON."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump([tracer.to_json() for tracer in tracers], f, indent=2, default=str)
+
+
+def instrument_repl_tool(agent):
+    """Time the pandas code executed by the agent's python_repl_ast tool.
+
+    Spans go to the tracer active in the calling context; without one the
+    tool runs untimed.
+    """
+    for tool in getattr(agent, "tools", []):
+        if tool.name != "python_repl_ast" or getattr(tool, "_traced", False):
+            continue
+        run = tool._run
+
+        def traced_run(query, run_manager=None, _run=run):
+            tracer = active_tracer()
+            if tracer is None:
+                return _run(query, run_manager=run_manager)
+            with tracer.span("pandas exec", "pandas", code=query[:200]):
+                return _run(query, run_manager=run_manager)
+
+        # Tools are pydantic models; bypass validation to patch the instance
+        object.__setattr__(tool, "_run", traced_run)
+        object.__setattr__(tool, "_traced", True)
+    return agent
+
+
+def instrument_registry(registry):
+    """Time every helpers.py tool function called through the registry."""
+    for tool in registry.tools.values():
+        if getattr(tool.function, "_traced", False):
+            continue
+        function = tool.function
+
+        def traced(*args, _function=function, _name=tool.name, **kwargs):
+            tracer = active_tracer()
+            if tracer is None:
+                return _function(*args, **kwargs)
+            with tracer.span(_name, "helper"):
+                return _function(*args, **kwargs)
+
+        traced._traced = True
+        tool.function = traced
+    return registry
+
+
+def average_summaries(summaries):
+    """Mean of each summary field over several runs (None fields are skipped)."""
+    averaged = {}
+    for key in summaries[0]:
+        values = [summary[key] for summary in summaries if summary[key] is not None]
+        averaged[key] = sum(values) / len(values) if values else None
+    return averaged
+
+
+def print_trace_summary(summaries):
+    """Print a {label: summary} table of where agent time went."""
+    print(f"\n{'Run':<28} {'Total':>7} {'LLM':>7} {'Tools':>7} {'Pandas':>7} {'Overhd':>7} "
+          f"{'Calls':>5} {'Tok in':>8} {'Tok out':>8} {'TTFT':>6}")
+    print("-" * 104)
+    for label, summary in summaries.items():
+        ttft = summary["time_to_first_token"]
+        print(
+            f"{label[:28]:<28} {summary['agent_seconds']:>6.2f}s {summary['llm_seconds']:>6.2f}s "
+            f"{summary['tool_seconds']:>6.2f}s {summary['pandas_seconds']:>6.2f}s "
+            f"{summary['overhead_seconds']:>6.2f}s {summary['llm_calls']:>5} "
+            f"{summary['input_tokens']:>8,} {summary['output_tokens']:>8,} "
+            f"{'n/a' if ttft is None else f'{ttft:.2f}s':>6}"
+        )
@@ -0,0 +1,128 @@
+"""
+Repeated-Trial Latency Statistics
+
+One run per cell tells little about LLM latency, which is noisy and
+long-tailed. The benchmark runs warmups and several trials per cell and
+reports their distribution:
+- Warmup runs (discarded) absorb first-call costs: agent construction and
+  its client's connection setup (agents are pooled per model, see
+  benchmark_runner.AgentPool, so the trials reuse the warmed agents; each
+  run still starts from a fresh REPL namespace),
+  imports and provider-side prompt caching
+- Trials are interleaved (every cell once, then every cell again, ...) so a
+  transient provider slowdown spreads over cells instead of hitting all
+  repetitions of one
+- Mean, standard deviation, p50/p90/p99, bootstrap confidence intervals for
+  the mean and the median, and outliers by Tukey's fences (1.5 x IQR)
+- Text histograms on shared bins, so distributions compare at a glance
+
+BENCHMARK_WARMUPS and BENCHMARK_TRIALS override the defaults:
+
+    BENCHMARK_TRIALS=10 python csv_agent_benchmark.py
+"""
+
+import os
+
+import numpy as np
+
+WARMUP_RUNS = 1
+TRIALS = 5
+CONFIDENCE = 0.95
+BOOTSTRAP_RESAMPLES = 2000
+OUTLIER_IQR_FACTOR = 1.5
+HISTOGRAM_BINS = 12
+HISTOGRAM_WIDTH = 40
+
+
+def trial_settings():
+    """(warmups, trials) from BENCHMARK_WARMUPS / BENCHMARK_TRIALS or the defaults."""
+    warmups = int(os.getenv("BENCHMARK_WARMUPS", WARMUP_RUNS))
+    trials = int(os.getenv("BENCHMARK_TRIALS", TRIALS))
+    if warmups < 0 or trials < 1:
+        raise ValueError("BENCHMARK_WARMUPS must be >= 0 and BENCHMARK_TRIALS >= 1")
+    return warmups, trials
+
+
+def interleave_trials(cells, trials):
+    """[(cell, trial)]: every cell for trial 0, then every cell for trial 1, ..."""
+    return [(cell, trial) for trial in range(trials) for cell in cells]
+
+
+def find_outliers(samples, factor=OUTLIER_IQR_FACTOR):
+    """Samples outside Tukey's fences [Q1 - factor*IQR, Q3 + factor*IQR]."""
+    if len(samples) < 4:
+        return []
+    q1, q3 = np.percentile(samples, [25, 75])
+    low, high = q1 - factor * (q3 - q1), q3 + factor * (q3 - q1)
+    return [sample for sample in samples if sample < low or sample > high]
+
+
+def bootstrap_ci(samples, statistic=np.mean, confidence=CONFIDENCE, resamples=BOOTSTRAP_RESAMPLES, seed=0):
+    """Percentile-bootstrap confidence interval (low, high) of a statistic."""
+    if len(samples) < 2:
+        return None
+    values = np.asarray(samples, dtype=float)
+    rng = np.random.default_rng(seed)
+    draws = values[rng.integers(0, len(values), size=(resamples, len(values)))]
+    estimates = statistic(draws, axis=1)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(estimates, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def latency_stats(samples, confidence=CONFIDENCE):
+    """Distribution summary of latency samples (seconds); None when empty."""
+    if not samples:
+        return None
+    values = np.asarray(samples, dtype=float)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "n": len(values),
+        "mean": float(values.mean()),
+        "std": float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+        "min": float(values.min()),
+        "p50": float(p50),
+        "p90": float(p90),
+        "p99": float(p99),
+        "max": float(values.max()),
+        "mean_ci": bootstrap_ci(values, np.mean, confidence),
+        "p50_ci": bootstrap_ci(values, np.median, confidence),
+        "outliers": find_outliers(values.tolist()),
+    }
+
+
+def print_latency_stats(stats_by_label, confidence=CONFIDENCE):
+    """Print a {label: latency_stats()} table."""
+    def interval(ci):
+        return "n/a" if ci is None else f"{ci[0]:.2f}-{ci[1]:.2f}"
+
+    ci_header = f"{confidence * 100:.0f}% CI"
+    print(f"  {'':<32} {'n':>4} {'mean':>7} {'std':>6} {'p50':>7} {'p50 ' + ci_header:>15} "
+          f"{'p90':>7} {'p99':>7} {'max':>7} {'Outliers':>8}")
+    print("  " + "-" * 108)
+    for label, stats in stats_by_label.items():
+        if stats is None:
+            print(f"  {label[:32]:<32} {'N/A (no successful runs)':>30}")
+            continue
+        print(
+            f"  {label[:32]:<32} {stats['n']:>4} {stats['mean']:>6.2f}s {stats['std']:>5.2f}s "
+            f"{stats['p50']:>6.2f}s {interval(stats['p50_ci']):>15} {stats['p90']:>6.2f}s "
+            f"{stats['p99']:>6.2f}s {stats['max']:>6.2f}s {len(stats['outliers']):>8}"
+        )
+
+
+def print_latency_histograms(samples_by_label, bins=HISTOGRAM_BINS, width=HISTOGRAM_WIDTH):
+    """Print one text histogram per label, all on the same bins."""
+    all_samples = [sample for samples in samples_by_label.values() for sample in samples]
+    if not all_samples:
+        print("  (no samples)")
+        return
+    low, high = min(all_samples), max(all_samples)
+    edges = np.linspace(low, high if high > low else low + 1e-3, bins + 1)
+    for label, samples in samples_by_label.items():
+        counts, _ = np.histogram(samples, bins=edges)
+        peak = max(counts.max(), 1)
+        print(f"\n  {label} (n={len(samples)})")
+        for count, left, right in zip(counts, edges[:-1], edges[1:]):
+            bar = "█" * round(count / peak * width)
+            print(f"    {f'{left:.2f}-{right:.2f}s':>14} │{bar:<{width}} {count}")
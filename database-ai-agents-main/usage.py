@@ -0,0 +1,259 @@
+"""
+Token and Cost Accounting
+
+Collects per-call token usage from every LLM call of a benchmark and
+aggregates it by any labels (model, query category, agent type, ...):
+- Prompt, cached prompt and completion tokens per call, from LangChain's
+  usage_metadata or the provider's raw token_usage
+- Cost from a price table (USD per million tokens, cached input billed at
+  its own rate); LLM_PRICE_TABLE=path/to/prices.json overrides or extends
+  the built-in prices
+- Output tokens per second of LLM time (throughput); calls replayed from
+  a cassette (llm_cassette.py) are counted but left out of throughput
+- usage_from_result() and model_name() are shared with tracing.py
+- Cost per answered question and per correct answer
+
+Usage:
+
+    ledger = UsageLedger()
+    labels = {"model": "GPT-4.1-mini", "category": "Simple", "agent_type": "openai-tools"}
+    agent.invoke(query, config={"callbacks": [ledger.handler(**labels)]})
+    ledger.record_run(labels, answered=True, correct=True)
+    print_usage_report(ledger.summary(by=("model",)))
+"""
+
+import json
+import os
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from llm_cassette import REPLAYED_FLAG
+
+# USD per 1M tokens. Keys are model-name prefixes; the longest match wins.
+PRICES_PER_MILLION = {
+    "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+    "gpt-4.1-nano": {"input": 0.10, "cached_input": 0.025, "output": 0.40},
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-3.5-turbo": {"input": 0.50, "cached_input": 0.50, "output": 1.50},
+    "claude-haiku-4-5": {"input": 1.00, "cached_input": 0.10, "output": 5.00},
+    "claude-sonnet-4": {"input": 3.00, "cached_input": 0.30, "output": 15.00},
+}
+
+
+def load_price_table(path=None):
+    """Built-in prices updated with the JSON file at path (or $LLM_PRICE_TABLE)."""
+    prices = dict(PRICES_PER_MILLION)
+    path = path or os.getenv("LLM_PRICE_TABLE")
+    if path:
+        with open(path) as f:
+            prices.update(json.load(f))
+    return prices
+
+
+def price_for(model, prices):
+    """Price entry for a model name by longest prefix, or None if unknown."""
+    matches = [prefix for prefix in prices if model and model.startswith(prefix)]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def call_cost(model, input_tokens, cached_tokens, output_tokens, prices):
+    """USD cost of one call (None if the model has no price)."""
+    price = price_for(model, prices)
+    if price is None:
+        return None
+    cached_price = price.get("cached_input", price["input"])
+    return (
+        (input_tokens - cached_tokens) * price["input"]
+        + cached_tokens * cached_price
+        + output_tokens * price["output"]
+    ) / 1e6
+
+
+def model_name(serialized, kwargs, response=None):
+    """Model of an LLM call: the provider's reported name, else LangChain's ls_model_name."""
+    reported = ((response.llm_output or {}).get("model_name") if response is not None else None)
+    metadata = kwargs.get("metadata") or {}
+    return reported or metadata.get("ls_model_name") or (serialized or {}).get("name")
+
+
+def is_replayed(response):
+    """True when an LLMResult was served from a cassette instead of the API."""
+    return any(
+        (generation.generation_info or {}).get(REPLAYED_FLAG)
+        for generations in response.generations
+        for generation in generations
+    )
+
+
+def usage_from_result(response):
+    """(input, cached input, output) tokens of an LLMResult, in either provider format."""
+    input_tokens = cached_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+                cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    if input_tokens or output_tokens:
+        return input_tokens, cached_tokens, output_tokens
+
+    llm_output = response.llm_output or {}
+    usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+    input_tokens = usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0
+    output_tokens = usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+    details = usage.get("prompt_tokens_details") or {}
+    cached_tokens = details.get("cached_tokens", usage.get("cache_read_input_tokens", 0)) or 0
+    return input_tokens, cached_tokens, output_tokens
+
+
+class _UsageHandler(BaseCallbackHandler):
+    """Callback handler that reports each LLM call to a ledger with fixed labels."""
+
+    def __init__(self, ledger, labels):
+        self.ledger = ledger
+        self.labels = labels
+        self._started = {}  # run_id -> (perf_counter, model name)
+
+    def _start(self, run_id, serialized, kwargs):
+        self._started[run_id] = (time.perf_counter(), model_name(serialized, kwargs))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, serialized, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, serialized, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start_time, model = self._started.pop(run_id, (time.perf_counter(), None))
+        input_tokens, cached_tokens, output_tokens = usage_from_result(response)
+        self.ledger.record_call(
+            self.labels,
+            model=model_name(None, {}, response) or model,
+            input_tokens=input_tokens,
+            cached_tokens=cached_tokens,
+            output_tokens=output_tokens,
+            seconds=time.perf_counter() - start_time,
+            replayed=is_replayed(response),
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
+class UsageLedger:
+    """Thread-safe store of LLM calls and runs, aggregated on demand."""
+
+    def __init__(self, prices=None):
+        self.prices = prices or load_price_table()
+        self.calls = []
+        self.runs = []
+        self._lock = threading.Lock()
+
+    def handler(self, **labels):
+        """Callback handler recording calls under these labels."""
+        return _UsageHandler(self, labels)
+
+    def record_call(self, labels, model, input_tokens, cached_tokens, output_tokens, seconds, replayed=False):
+        call = {
+            **labels,
+            "api_model": model,
+            "input_tokens": input_tokens,
+            "cached_tokens": cached_tokens,
+            "output_tokens": output_tokens,
+            "seconds": seconds,
+            "replayed": replayed,
+            "cost": call_cost(model, input_tokens, cached_tokens, output_tokens, self.prices),
+        }
+        with self._lock:
+            self.calls.append(call)
+
+    def record_run(self, labels, answered, correct=None):
+        """One agent run; correct=None when the answer wasn't checked."""
+        with self._lock:
+            self.runs.append({**labels, "answered": answered, "correct": correct})
+
+    def summary(self, by=("model",)):
+        """{group tuple: totals, cost and throughput} grouped by the label names in by."""
+        with self._lock:
+            calls = list(self.calls)
+            runs = list(self.runs)
+
+        groups = {}
+        for call in calls:
+            group = groups.setdefault(tuple(call.get(key) for key in by), _empty_group())
+            group["calls"] += 1
+            for field in ("input_tokens", "cached_tokens", "output_tokens", "seconds"):
+                group[field] += call[field]
+            if call["replayed"]:
+                group["replayed_calls"] += 1
+            else:
+                group["live_output_tokens"] += call["output_tokens"]
+                group["live_seconds"] += call["seconds"]
+            if call["cost"] is None:
+                group["unpriced_calls"] += 1
+            else:
+                group["cost"] += call["cost"]
+        for run in runs:
+            group = groups.setdefault(tuple(run.get(key) for key in by), _empty_group())
+            group["runs"] += 1
+            group["answered"] += bool(run["answered"])
+            if run["correct"] is not None:
+                group["checked"] += 1
+                group["correct"] += bool(run["correct"])
+
+        for group in groups.values():
+            # Replayed calls take no provider time, so they'd inflate throughput
+            group["output_tokens_per_second"] = (
+                group["live_output_tokens"] / group["live_seconds"] if group["live_seconds"] else None
+            )
+            group["cost_per_answer"] = group["cost"] / group["answered"] if group["answered"] else None
+            group["cost_per_correct"] = (
+                group["cost"] / group["correct"] if group["checked"] and group["correct"] else None
+            )
+        return groups
+
+
+def _empty_group():
+    return {
+        "calls": 0,
+        "input_tokens": 0,
+        "cached_tokens": 0,
+        "output_tokens": 0,
+        "seconds": 0.0,
+        "replayed_calls": 0,
+        "live_output_tokens": 0,
+        "live_seconds": 0.0,
+        "cost": 0.0,
+        "unpriced_calls": 0,
+        "runs": 0,
+        "answered": 0,
+        "checked": 0,
+        "correct": 0,
+    }
+
+
+def print_usage_report(groups, title="TOKEN USAGE AND COST"):
+    """Print a ledger summary table."""
+    def money(value):
+        return "n/a" if value is None else f"${value:.4f}"
+
+    print(f"\n💰 {title}:")
+    print(f"  {'Group':<40} {'Calls':>5} {'Prompt':>9} {'Cached':>8} {'Output':>8} "
+          f"{'Tok/s':>7} {'Cost':>9} {'$/answer':>9} {'$/correct':>9}")
+    print("  " + "-" * 112)
+    for key, group in sorted(groups.items(), key=lambda item: tuple(str(part) for part in item[0])):
+        label = " / ".join(str(part) for part in key)
+        throughput = group["output_tokens_per_second"]
+        print(
+            f"  {label[:40]:<40} {group['calls']:>5} {group['input_tokens']:>9,} "
+            f"{group['cached_tokens']:>8,} {group['output_tokens']:>8,} "
+            f"{'n/a' if throughput is None else f'{throughput:.0f}':>7} {money(group['cost']):>9} "
+            f"{money(group['cost_per_answer']):>9} {money(group['cost_per_correct']):>9}"
+            + (f"  ({group['unpriced_calls']} unpriced)" if group["unpriced_calls"] else "")
+            + (f"  ({group['replayed_calls']} replayed)" if group["replayed_calls"] else "")
+        )
@@ -1,9 +1,15 @@
 """
 Ground Truth Verification Script
-Directly calculates answers using pandas (no LLM) to verify agent accuracy
+Prints the benchmark answers from ground_truth.compute_ground_truth() and
+checks each one against a direct pandas calculation on the raw CSV (plain
+read_csv, independent of dataset.py and its cache; no LLM), plus the cached
+answers the benchmarks actually read
 """
-import pandas as pd
+from dataset import load_salaries
+from ground_truth import compute_ground_truth, load_ground_truth
+import math
 import os
+import pandas as pd
 
 # Load the data
 csv_path = "./data/salaries_2023.csv"
@@ -11,59 +17,99 @@ if not os.path.exists(csv_path):
     raise FileNotFoundError(
         f"Required data file not found at '{csv_path}'. Please ensure the salaries CSV is available."
     )
+answers = compute_ground_truth(load_salaries(csv_path))
+# The reference side: the CSV as the original scripts read it
 df = pd.read_csv(csv_path).fillna(value=0)
+failures = []
+
+
+def same(actual, expected):
+    if isinstance(expected, dict):
+        return isinstance(actual, dict) and actual.keys() == expected.keys() and all(
+            same(actual[key], expected[key]) for key in expected
+        )
+    if isinstance(expected, float):
+        return math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-6)
+    return actual == expected
+
+
+def check(key, expected, label):
+    """Print the ground-truth answer for key and compare it with the direct calculation."""
+    ok = same(answers[key], expected)
+    if not ok:
+        failures.append(key)
+    print(f"{'✅' if ok else '❌'} {label}: {answers[key]}" + ("" if ok else f" (direct pandas: {expected})"))
+
 
 print("=" * 80)
-print("GROUND TRUTH VERIFICATION - Direct Pandas Calculations")
+print("GROUND TRUTH VERIFICATION - ground_truth.py vs Direct Pandas Calculations")
 print("=" * 80)
 
-print("\n1️⃣  HIGHEST AVERAGE BASE SALARY BY GRADE (Overall)")
+print("\n1️⃣  OVERALL FIGURES")
 print("-" * 80)
-avg_by_grade = df.groupby('Grade')['Base_Salary'].mean().sort_values(ascending=False)
-print(f"\nTop 10 Grades by Average Base Salary:")
-print(avg_by_grade.head(10))
-print(f"\n✅ ANSWER: Grade '{avg_by_grade.idxmax()}' has the highest average base salary: ${avg_by_grade.max():,.2f}")
+check("row_count", len(df), "Rows")
+check("avg_base_salary", float(df["Base_Salary"].mean()), "Average base salary")
+check("max_base_salary", float(df["Base_Salary"].max()), "Highest base salary")
+check("unique_departments", int(df["Department"].nunique()), "Unique departments")
+check("department_most_employees", str(df["Department"].value_counts().idxmax()), "Department with most employees")
 
-print("\n\n2️⃣  GENDER DISTRIBUTION IN TOP GRADE")
+print("\n\n2️⃣  GENDER")
 print("-" * 80)
-top_grade = avg_by_grade.idxmax()
-top_grade_data = df[df['Grade'] == top_grade]
-gender_counts = top_grade_data['Gender'].value_counts()
-print(f"\nGender distribution in grade {top_grade}:")
-print(gender_counts)
-if len(gender_counts) == 1:
-    print(f"⚠️  Grade {top_grade} only has {gender_counts.index[0]} employees (no gender comparison possible)")
+gender_counts = df["Gender"].value_counts()
+check("gender_counts", {str(gender): int(count) for gender, count in gender_counts.items()}, "Employees by gender")
+overall_by_gender = df.groupby("Gender")["Base_Salary"].mean()
+check(
+    "avg_base_salary_by_gender",
+    {str(gender): float(mean) for gender, mean in overall_by_gender.items()},
+    "Average base salary by gender",
+)
+check("gender_pay_gap", float(abs(overall_by_gender["M"] - overall_by_gender["F"])), "Pay gap")
+check(
+    "gender_pay_gap_higher", "M" if overall_by_gender["M"] > overall_by_gender["F"] else "F", "Higher-paid gender"
+)
 
-print("\n\n3️⃣  AVERAGE SALARY BY GRADE AND GENDER")
+print("\n\n3️⃣  HIGHEST AVERAGE BASE SALARY BY GRADE (Overall)")
 print("-" * 80)
-avg_by_grade_gender = df.groupby(['Grade', 'Gender'])['Base_Salary'].mean().unstack()
-print("\nTop 10 Grades with both Male and Female employees:")
-grades_with_both = avg_by_grade_gender.dropna()
-print(grades_with_both.sort_values(by=['F', 'M'], ascending=False).head(10))
+avg_by_grade = df.groupby("Grade")["Base_Salary"].mean().sort_values(ascending=False)
+print(f"\nTop 10 Grades by Average Base Salary:")
+print(avg_by_grade.head(10))
+top_grade = avg_by_grade.idxmax()
+check("grade_highest_avg_base_salary", str(top_grade), "Grade with the highest average base salary")
+check("grade_highest_avg_base_salary_value", float(avg_by_grade.max()), "Its average base salary")
+top_grade_counts = df[df["Grade"] == top_grade]["Gender"].value_counts()
+check(
+    "grade_highest_avg_base_salary_gender_counts",
+    {str(gender): int(count) for gender, count in top_grade_counts.items()},
+    f"Gender distribution in grade {top_grade}",
+)
+if len(top_grade_counts) == 1:
+    print(f"⚠️  Grade {top_grade} only has {top_grade_counts.index[0]} employees (no gender comparison possible)")
 
 print("\n\n4️⃣  HIGHEST GRADE WITH BOTH GENDERS")
 print("-" * 80)
-grades_with_both_avg = df[df['Grade'].isin(grades_with_both.index)].groupby('Grade')['Base_Salary'].mean().sort_values(ascending=False)
-highest_with_both = grades_with_both_avg.idxmax()
-print(f"✅ ANSWER: Grade '{highest_with_both}' has the highest average salary among grades with both genders")
-print(f"   Average: ${grades_with_both_avg.max():,.2f}")
-
-print(f"\n   Gender breakdown for grade {highest_with_both}:")
-female_avg = df[(df['Grade'] == highest_with_both) & (df['Gender'] == 'F')]['Base_Salary'].mean()
-male_avg = df[(df['Grade'] == highest_with_both) & (df['Gender'] == 'M')]['Base_Salary'].mean()
-print(f"   Female average: ${female_avg:,.2f}")
-print(f"   Male average: ${male_avg:,.2f}")
-print(f"   Difference: ${abs(female_avg - male_avg):,.2f} ({'Female higher' if female_avg > male_avg else 'Male higher'})")
+grades_with_both = df.groupby(["Grade", "Gender"])["Base_Salary"].mean().unstack().dropna()
+both_avg = avg_by_grade[avg_by_grade.index.isin(grades_with_both.index)]
+highest_with_both = both_avg.idxmax()
+check("grade_both_genders_highest_avg", str(highest_with_both), "Grade with the highest average among grades with both genders")
+check("grade_both_genders_highest_avg_value", float(both_avg.max()), "Its average base salary")
+check(
+    "grade_both_genders_avg_by_gender",
+    {str(gender): float(mean) for gender, mean in grades_with_both.loc[highest_with_both].items()},
+    f"Average base salary by gender in grade {highest_with_both}",
+)
 
-print("\n\n5️⃣  OVERALL GENDER PAY COMPARISON")
+print("\n\n5️⃣  CACHED ANSWERS (what the benchmarks read)")
 print("-" * 80)
-overall_by_gender = df.groupby('Gender')['Base_Salary'].mean()
-print("\nOverall average base salary by gender (all grades):")
-print(overall_by_gender)
-print(f"\n✅ Male average: ${overall_by_gender.get('M', 0):,.2f}")
-print(f"✅ Female average: ${overall_by_gender.get('F', 0):,.2f}")
-print(f"Pay gap: ${abs(overall_by_gender.get('M', 0) - overall_by_gender.get('F', 0)):,.2f}")
+cached = load_ground_truth(csv_path)
+stale = [key for key in answers if not same(cached.get(key), answers[key])]
+if stale:
+    failures.extend(f"cache:{key}" for key in stale)
+    print(f"❌ Cached ground truth differs for: {', '.join(stale)}")
+else:
+    print(f"✅ Cached ground truth matches ({len(answers)} answers)")
 
 print("\n" + "=" * 80)
-print("VERIFICATION COMPLETE")
+print("VERIFICATION COMPLETE" if not failures else f"VERIFICATION FAILED: {', '.join(failures)}")
 print("=" * 80)
+if failures:
+    raise SystemExit(1)